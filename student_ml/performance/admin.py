@@ -1,8 +1,112 @@
 from django.contrib import admin
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
 
 from .models import StudentPerformance
 
 
+def estimated_row_count(queryset):
+    """Planner row estimate for an unfiltered queryset, or None when unavailable."""
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        elif connection.vendor == "sqlite":
+            # Populated by ANALYZE; the first number of a table's stat row is its row count
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    estimate = int(float(str(row[0]).split()[0]))
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded COUNT(*) on a filtered list.
+
+    Unfiltered changelists use the database's row estimate once the table
+    is larger than ``count_limit``, capped by the primary-key span so a stale
+    estimate can't invent many pages; without an estimate they are counted
+    exactly. Filtered lists are counted only up to ``count_limit``
+    (``COUNT(*)`` over a ``LIMIT`` subquery). When the count is estimated or
+    capped, pages past it stay reachable for as long as they have rows.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        self.count_is_exact = True
+        if not self.object_list.query.where:
+            estimate = estimated_row_count(self.object_list)
+            if estimate is None:
+                return self.object_list.count()
+            if estimate > self.count_limit:
+                self.count_is_exact = False
+                span = self.object_list.aggregate(low=Min("pk"), high=Max("pk"))
+                if span["high"] is None:
+                    return 0
+                return min(estimate, span["high"] - span["low"] + 1)
+        count = self.object_list[:self.count_limit].count()
+        self.count_is_exact = count < self.count_limit
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_is_exact:
+                raise
+            number = int(number)
+            bottom = (number - 1) * self.per_page
+            if self.object_list[bottom:bottom + 1].exists():
+                return number
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number <= self.num_pages:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class PerformanceBandFilter(admin.SimpleListFilter):
+    """Performance index ranges, answered from the performance_index index."""
+
+    title = "performance index"
+    parameter_name = "performance_band"
+
+    BANDS = {
+        "0-40": (0, 40),
+        "40-60": (40, 60),
+        "60-80": (60, 80),
+        "80-100": (80, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(band, band) for band in self.BANDS]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.BANDS:
+            return queryset
+        low, high = self.BANDS[self.value()]
+        queryset = queryset.filter(performance_index__gte=low)
+        if high is not None:
+            queryset = queryset.filter(performance_index__lt=high)
+        return queryset
+
+
 @admin.register(StudentPerformance)
 class StudentPerformanceAdmin(admin.ModelAdmin):
     list_display = (
@@ -12,7 +116,25 @@ class StudentPerformanceAdmin(admin.ModelAdmin):
         "sleep_hours",
         "sample_papers",
         "performance_index",
+        "created_at",
+    )
+    list_filter = (
+        "extracurricular",
+        PerformanceBandFilter,
+        ("created_at", admin.DateFieldListFilter),
     )
-    list_filter = ("extracurricular",)
     search_fields = ("previous_scores",)
+    search_help_text = "Exact previous score, e.g. 75"
     ordering = ("-performance_index",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Exact integer match on previous_scores, which uses its index, instead of a text scan."""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        try:
+            return queryset.filter(previous_scores=int(search_term)), False
+        except ValueError:
+            return queryset.none(), False
@@ -0,0 +1,200 @@
+"""
+Admission control for the prediction endpoints.
+
+A concurrency limiter caps the number of requests being processed and the
+number waiting for a slot. Requests beyond that, or requests that wait
+longer than the queue timeout, are shed with a fast 503 and Retry-After,
+so tail latency stays bounded instead of every client queueing.
+"""
+import bisect
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.http import JsonResponse
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_IN_FLIGHT": 8,
+    "MAX_QUEUE": 16,
+    "QUEUE_TIMEOUT": 0.5,
+    "RETRY_AFTER": 1,
+}
+
+# Upper bounds (ms) of the queue-wait histogram buckets; the last bucket is open-ended
+WAIT_BUCKETS_MS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class ConcurrencyLimiter:
+    """At most ``max_in_flight`` holders, with up to ``max_queue`` callers waiting."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def _record_wait(self, waited_ms: float):
+        self.wait_histogram[bisect.bisect_left(WAIT_BUCKETS_MS, waited_ms)] += 1
+        self.wait_total_ms += waited_ms
+        self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the bounded queue if needed; False means shed."""
+        with self._condition:
+            if self.in_flight < self.max_in_flight and not self.waiting:
+                self.in_flight += 1
+                self.admitted += 1
+                self._record_wait(0)
+                return True
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+
+            self.waiting += 1
+            started = time.monotonic()
+            deadline = started + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+            self._record_wait((time.monotonic() - started) * 1000)
+            return True
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def _wait_percentile(self, fraction: float):
+        total = sum(self.wait_histogram)
+        if not total:
+            return None
+        threshold = fraction * total
+        seen = 0
+        for bucket, count in enumerate(self.wait_histogram):
+            seen += count
+            if seen >= threshold:
+                return WAIT_BUCKETS_MS[bucket] if bucket < len(WAIT_BUCKETS_MS) else self.wait_max_ms
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "shed": self.shed_queue_full + self.shed_timeout,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+                "queue_wait_ms": {
+                    "mean": round(self.wait_total_ms / self.admitted, 3) if self.admitted else None,
+                    "p50_upper_bound": self._wait_percentile(0.5),
+                    "p99_upper_bound": self._wait_percentile(0.99),
+                    "max": round(self.wait_max_ms, 3),
+                    "histogram": dict(zip(
+                        [f"<={bound}" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}"],
+                        self.wait_histogram,
+                    )),
+                },
+            }
+
+
+def get_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PREDICT_ADMISSION", {})}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> ConcurrencyLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                config = get_config()
+                _limiter = ConcurrencyLimiter(config["MAX_IN_FLIGHT"], config["MAX_QUEUE"], config["QUEUE_TIMEOUT"])
+    return _limiter
+
+
+def reset_limiter(**kwargs):
+    """Rebuild the limiter from settings on next use."""
+    global _limiter
+    if kwargs.get("setting", "PREDICT_ADMISSION") == "PREDICT_ADMISSION":
+        _limiter = None
+
+
+setting_changed.connect(reset_limiter)
+
+
+class _ReleasingContent:
+    """Streaming response content that gives back its admission slot when the response is closed."""
+
+    def __init__(self, content, release):
+        self._content = iter(content)
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._content)
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is None:
+            return
+        try:
+            if hasattr(self._content, "close"):
+                self._content.close()
+        finally:
+            release()
+
+
+def admission_control(view):
+    """Shed requests to ``view`` with a 503 when the shared limiter is saturated.
+
+    A streaming response keeps its slot until the server closes it.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        config = get_config()
+        if not config["ENABLED"]:
+            return view(request, *args, **kwargs)
+        limiter = get_limiter()
+        if not limiter.acquire():
+            response = JsonResponse({"error": "Server busy. Retry later."}, status=503)
+            response["Retry-After"] = str(config["RETRY_AFTER"])
+            return response
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            limiter.release()
+            raise
+        if getattr(response, "streaming", False):
+            response.streaming_content = _ReleasingContent(response.streaming_content, limiter.release)
+        else:
+            limiter.release()
+        return response
+    return wrapper
@@ -0,0 +1,117 @@
+"""
+Lean request/response encoding for the fast prediction endpoint.
+Uses orjson and msgpack when they are installed, falling back to the
+standard library json module.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional content type
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Fixed request schema: only these keys are read from the body
+REQUEST_FIELDS = (
+    "hours_studied",
+    "previous_scores",
+    "extracurricular",
+    "sleep_hours",
+    "sample_papers",
+)
+
+# Optional keys that pick which model answers rather than feeding it
+ROUTING_FIELDS = ("tenant", "tier")
+
+# Optional key of a streamed record, echoed back on its result line
+RECORD_ID_FIELD = "id"
+
+NDJSON = "application/x-ndjson"
+NDJSON_TYPES = (NDJSON, "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+class UnsupportedMediaType(Exception):
+    pass
+
+
+class MalformedRequest(Exception):
+    pass
+
+
+def _loads_json(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _default(obj):
+    """Serialize NumPy scalars and arrays the way DRF's encoder does."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def dumps_json(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), default=_default).encode()
+
+
+def decode(body: bytes, content_type: str) -> dict:
+    """Parse a request body into a dict holding only the fixed schema fields."""
+    if content_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType(content_type)
+        loads = msgpack.unpackb
+    elif content_type == JSON or not content_type:
+        loads = _loads_json
+    else:
+        raise UnsupportedMediaType(content_type)
+
+    try:
+        payload = loads(body)
+    except Exception as exc:
+        raise MalformedRequest(str(exc)) from exc
+    if not isinstance(payload, dict):
+        raise MalformedRequest("Expected an object")
+    return {field: payload[field] for field in REQUEST_FIELDS + ROUTING_FIELDS if field in payload}
+
+
+def decode_line(line: bytes) -> dict:
+    """Parse one NDJSON record into a dict of the fixed schema fields and its optional ``id``."""
+    try:
+        payload = _loads_json(line)
+    except Exception as exc:
+        raise MalformedRequest(str(exc)) from exc
+    if not isinstance(payload, dict):
+        raise MalformedRequest("Expected an object")
+    return {field: payload[field] for field in REQUEST_FIELDS + (RECORD_ID_FIELD,) if field in payload}
+
+
+def negotiate(accept: str) -> str:
+    """Pick the response media type from the Accept header."""
+    if msgpack is not None and accept and any(media in accept for media in MSGPACK_TYPES):
+        return MSGPACK
+    return JSON
+
+
+def encode(payload, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, default=_default)
+    return dumps_json(payload)
+
+
+def pre_encode(payload) -> dict:
+    """Encode a constant response body once for every supported media type."""
+    encoded = {JSON: dumps_json(payload)}
+    if msgpack is not None:
+        encoded[MSGPACK] = msgpack.packb(payload)
+    return encoded
@@ -0,0 +1,143 @@
+"""
+Columnar on-disk cache for dataset.csv.
+
+The CSV is parsed once into the compact types of ``schema.DATASET_DTYPES``
+and each column is stored as a NumPy ``.npy`` file under a directory named
+after the CSV's content hash and the schema version. Later reads memory-map
+only the columns a step needs, so nothing is re-parsed until the CSV itself
+(or the schema) changes.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from performance import schema
+
+DATASET_PATH = "dataset.csv"
+CACHE_DIR = ".dataset_cache"
+INDEX_FILE = "index.json"
+
+# Entry directories: a content hash plus, since schema version 2, "-v<version>"
+_ENTRY_NAME = re.compile(r"^[0-9a-f]{64}(?:-v(\d+))?$")
+
+
+def _read_index(cache_dir: str) -> dict:
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_index(cache_dir: str, index: dict):
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".json")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(index, fh)
+    os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILE))
+
+
+def content_hash(path: str = DATASET_PATH, cache_dir: str = CACHE_DIR) -> str:
+    """SHA-256 of the file, remembered per (size, mtime) so unchanged files aren't re-read."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    index = _read_index(cache_dir)
+    entry = index.get(key)
+    if entry and entry["signature"] == signature:
+        return entry["hash"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def entry_path(digest: str, cache_dir: str = CACHE_DIR) -> str:
+    """Cache entry for a CSV with content hash ``digest``, parsed with the current schema."""
+    return os.path.join(cache_dir, f"{digest}-v{schema.SCHEMA_VERSION}")
+
+
+def _drop_other_versions(cache_dir: str):
+    """Delete entries parsed with a schema version other than the current one."""
+    current = str(schema.SCHEMA_VERSION)
+    for name in os.listdir(cache_dir):
+        match = _ENTRY_NAME.match(name)
+        if match and match.group(1) != current:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _column_file(column: str) -> str:
+    return column.replace(" ", "_") + ".npy"
+
+
+def _remember(path: str, digest: str, cache_dir: str):
+    """Point ``path`` at the entry for ``digest`` and drop the entry it replaces."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    index = _read_index(cache_dir)
+    previous = index.get(key)
+    index[key] = {"signature": [stat.st_size, stat.st_mtime_ns], "hash": digest}
+    if previous == index[key]:
+        return
+    _write_index(cache_dir, index)
+    if previous and all(entry["hash"] != previous["hash"] for entry in index.values()):
+        shutil.rmtree(entry_path(previous["hash"], cache_dir), ignore_errors=True)
+
+
+def build_cache(path: str = DATASET_PATH, df: pd.DataFrame = None, cache_dir: str = CACHE_DIR) -> str:
+    """Write the columnar cache for ``path`` and return its directory.
+
+    Pass ``df`` when the frame is already in memory (e.g. right after
+    generating the CSV) to skip parsing the file again.
+    """
+    digest = content_hash(path, cache_dir)
+    entry_dir = entry_path(digest, cache_dir)
+    if not os.path.isdir(entry_dir):
+        df = schema.read_csv(path) if df is None else schema.to_compact(df)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_dir)
+        columns = {}
+        for column in df.columns:
+            np.save(os.path.join(staging, _column_file(column)), df[column].to_numpy())
+            columns[column] = _column_file(column)
+        with open(os.path.join(staging, "columns.json"), "w") as fh:
+            json.dump({"rows": len(df), "columns": columns}, fh)
+        try:
+            os.replace(staging, entry_dir)
+        except OSError:
+            # Another process finished the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+        # Entries parsed with an older schema are never read again
+        _drop_other_versions(cache_dir)
+
+    _remember(path, digest, cache_dir)
+    return entry_dir
+
+
+def load_columns(path: str = DATASET_PATH, columns=None, cache_dir: str = CACHE_DIR) -> dict:
+    """Memory-mapped column arrays for ``path``, building the cache on first use.
+
+    Dataset columns have the types in ``schema.DATASET_DTYPES``.
+    """
+    entry_dir = build_cache(path, cache_dir=cache_dir)
+    with open(os.path.join(entry_dir, "columns.json")) as fh:
+        manifest = json.load(fh)
+    names = manifest["columns"] if columns is None else columns
+    return {
+        name: np.load(os.path.join(entry_dir, manifest["columns"][name]), mmap_mode="r")
+        for name in names
+    }
+
+
+def load_frame(path: str = DATASET_PATH, columns=None, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """DataFrame view over the cached columns of ``path``."""
+    return pd.DataFrame(load_columns(path, columns, cache_dir), copy=False)
@@ -0,0 +1,140 @@
+"""
+Streaming input-drift monitor.
+
+Every validated input field is a bounded integer (or a boolean), so each
+feature is summarised by one counter per possible value. Updating a
+request costs a handful of list increments, and memory is fixed by the
+validation ranges however much traffic arrives. Reference histograms are
+computed from the training rows and stored in the model bundle under
+``drift_reference``; the live histograms are compared against them with
+the population stability index (PSI) and the Kolmogorov-Smirnov statistic.
+
+Live counts are kept per tenant and compared with that tenant's model, so
+routed traffic never mixes populations. They are per process: each
+prefork worker reports its own traffic.
+"""
+import math
+import threading
+
+import numpy as np
+
+from .model_registry import DEFAULT_TENANT
+from .rules import FIELD_SPECS
+
+# (low, high) of the counters kept for each field, taken from the validation ranges
+FEATURE_RANGES = {
+    field: (0, 1) if field_type is bool else (minimum, maximum)
+    for field, field_type, minimum, maximum, *_ in FIELD_SPECS
+}
+
+# Smoothing for empty bins so PSI stays finite
+PSI_EPSILON = 1e-4
+
+# Conventional PSI bands: below 0.1 stable, 0.1-0.25 moderate shift, above 0.25 significant
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+MIN_SAMPLES = 100
+
+
+def _bin(field: str, value) -> int:
+    low, high = FEATURE_RANGES[field]
+    return min(max(int(value), low), high) - low
+
+
+class FeatureHistograms:
+    """Fixed-size per-feature counters of live prediction inputs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {field: [0] * (high - low + 1) for field, (low, high) in FEATURE_RANGES.items()}
+            self.total = 0
+
+    def update(self, data: dict):
+        """Count one validated input."""
+        with self.lock:
+            for field, counts in self.counts.items():
+                counts[_bin(field, data[field])] += 1
+            self.total += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {field: np.array(counts, dtype=np.int64) for field, counts in self.counts.items()}
+
+
+_live = {}
+_live_lock = threading.Lock()
+
+
+def live_histograms(tenant: str = DEFAULT_TENANT) -> FeatureHistograms:
+    """Live histograms of the traffic scored by ``tenant``'s model, created on first use."""
+    histograms = _live.get(tenant)
+    if histograms is None:
+        with _live_lock:
+            histograms = _live.setdefault(tenant, FeatureHistograms())
+    return histograms
+
+
+def reference_histograms(columns: dict) -> dict:
+    """Counts per value for arrays of raw inputs keyed by field name, for the model bundle."""
+    histograms = {}
+    for field, (low, high) in FEATURE_RANGES.items():
+        values = np.clip(np.asarray(columns[field]).astype(np.int64), low, high) - low
+        histograms[field] = np.bincount(values, minlength=high - low + 1).tolist()
+    return histograms
+
+
+def population_stability_index(reference, current) -> float:
+    expected = np.asarray(reference, dtype=np.float64) + PSI_EPSILON
+    actual = np.asarray(current, dtype=np.float64) + PSI_EPSILON
+    expected /= expected.sum()
+    actual /= actual.sum()
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(reference, current) -> float:
+    """Largest gap between the two empirical CDFs."""
+    reference = np.asarray(reference, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    return float(np.max(np.abs(np.cumsum(reference) / reference.sum() - np.cumsum(current) / current.sum())))
+
+
+def _status(psi: float) -> str:
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+def drift_report(reference: dict, current: dict, min_samples: int = MIN_SAMPLES) -> dict:
+    """PSI, KS and a status per feature for live counts against reference counts."""
+    live_samples = int(sum(next(iter(current.values()))))
+    report = {
+        "live_samples": live_samples,
+        "reference_samples": int(sum(next(iter(reference.values())))),
+        "min_samples": min_samples,
+        "features": {},
+        "drifted": [],
+    }
+    if live_samples < min_samples:
+        return report
+
+    for field in FEATURE_RANGES:
+        psi = population_stability_index(reference[field], current[field])
+        ks = ks_statistic(reference[field], current[field])
+        # Critical value of the two-sample KS test at alpha = 0.05
+        n, m = report["reference_samples"], live_samples
+        report["features"][field] = {
+            "psi": round(psi, 4),
+            "ks": round(ks, 4),
+            "ks_critical": round(1.358 * math.sqrt((n + m) / (n * m)), 4),
+            "status": _status(psi),
+        }
+        if psi >= PSI_MODERATE:
+            report["drifted"].append(field)
+    return report
@@ -0,0 +1,155 @@
+"""
+Exact per-prediction feature attributions for the gradient boosting model.
+
+Path-dependent TreeSHAP splits each leaf's value among the distinct
+features on the path to it. For a leaf with path features ``U`` the
+share of feature ``j`` is
+
+    v * (o_j - z_j) * sum over S in U\\{j} of |S|! (d-|S|-1)! / d! * prod(o_S) * prod(z_(U\\S\\{j}))
+
+where ``z_k`` is the fraction of training cover that follows the path's
+splits on ``k`` and ``o_k`` is 1 when the input satisfies them. Only the
+``o`` terms depend on the input, and they are 0/1, so every leaf's shares
+are precomputed for each subset of satisfied path features. Explaining an
+input then takes one vectorized pass over the leaves: find each leaf's
+satisfied subset and add up the table rows.
+"""
+import math
+
+import numpy as np
+
+from .inference import FEATURE_DEPENDENCIES, RAW_COLUMNS
+
+
+def _leaf_paths(tree):
+    """(value, {feature: [low, high, zero_fraction]}) for every leaf of a fitted sklearn tree."""
+    leaves = []
+    stack = [(0, {})]
+    while stack:
+        node, path = stack.pop()
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            leaves.append((tree.value[node, 0, 0], path))
+            continue
+        feature, threshold = tree.feature[node], tree.threshold[node]
+        cover = tree.weighted_n_node_samples[node]
+        low, high, zero = path.get(feature, (-np.inf, np.inf, 1.0))
+        for child, bounds in ((left, (low, min(high, threshold))), (right, (max(low, threshold), high))):
+            child_path = dict(path)
+            child_path[feature] = (*bounds, zero * tree.weighted_n_node_samples[child] / cover)
+            stack.append((child, child_path))
+    return leaves
+
+
+def _shapley_weights(max_depth: int) -> np.ndarray:
+    """weights[d, s] = s! (d-s-1)! / d!, the weight of a size-s coalition among d features."""
+    weights = np.zeros((max_depth + 1, max_depth + 1))
+    for d in range(1, max_depth + 1):
+        for s in range(d):
+            weights[d, s] = math.factorial(s) * math.factorial(d - s - 1) / math.factorial(d)
+    return weights
+
+
+class TreeExplainer:
+    """Precomputed TreeSHAP tables for a fitted GradientBoostingRegressor."""
+
+    def __init__(self, model):
+        rate = model.learning_rate
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        self.n_features = model.n_features_in_
+        # E[f(x)] over the training cover: init plus each tree's cover-weighted mean (its root value)
+        self.expected_value = float(
+            model.init_.predict(np.zeros((1, self.n_features)))[0]
+            + rate * sum(tree.value[0, 0, 0] for tree in trees)
+        )
+
+        leaves = [leaf for tree in trees for leaf in _leaf_paths(tree)]
+        depth = max([len(path) for _, path in leaves] + [1])
+        n_leaves = len(leaves)
+
+        self.features = np.zeros((n_leaves, depth), dtype=np.intp)
+        self.low = np.full((n_leaves, depth), -np.inf)
+        self.high = np.full((n_leaves, depth), np.inf)
+        zero = np.ones((n_leaves, depth))
+        valid = np.zeros((n_leaves, depth), dtype=bool)
+        values = np.empty(n_leaves)
+        for i, (value, path) in enumerate(leaves):
+            values[i] = rate * value
+            for slot, (feature, (low, high, fraction)) in enumerate(path.items()):
+                self.features[i, slot] = feature
+                self.low[i, slot], self.high[i, slot], zero[i, slot] = low, high, fraction
+                valid[i, slot] = True
+        path_length = valid.sum(axis=1)
+
+        self.bits = 1 << np.arange(depth)
+        self.table = self._build_table(values, zero, valid, path_length, depth)
+
+    @staticmethod
+    def _build_table(values, zero, valid, path_length, depth):
+        """table[leaf, satisfied_mask, slot]: the leaf's share for that path slot."""
+        n_leaves = len(values)
+        weights = _shapley_weights(depth)[path_length]  # (leaves, depth + 1)
+        leaf_index = np.arange(n_leaves)
+        table = np.zeros((n_leaves, 1 << depth, depth))
+
+        for mask in range(1 << depth):
+            satisfied = np.array([(mask >> slot) & 1 for slot in range(depth)], dtype=bool)
+            for j in range(depth):
+                # Elementary symmetric polynomials of z over satisfied path features other than j,
+                # and the product of z over the unsatisfied ones
+                elementary = np.zeros((depth + 1, n_leaves))
+                elementary[0] = 1.0
+                satisfied_count = np.zeros(n_leaves, dtype=np.intp)
+                unsatisfied_zero = np.ones(n_leaves)
+                for k in range(depth):
+                    if k == j:
+                        continue
+                    if satisfied[k]:
+                        in_set = valid[:, k]
+                        shifted = elementary.copy()
+                        shifted[1:] += zero[:, k] * elementary[:-1]
+                        elementary = np.where(in_set, shifted, elementary)
+                        satisfied_count += in_set
+                    else:
+                        unsatisfied_zero *= np.where(valid[:, k], zero[:, k], 1.0)
+
+                # sum over coalitions S of the satisfied features: weight(|S|) * e_(|A| - |S|)
+                coalitions = np.zeros(n_leaves)
+                for size in range(depth):
+                    remaining = satisfied_count - size
+                    usable = remaining >= 0
+                    coalitions += np.where(
+                        usable,
+                        weights[:, size] * elementary[np.clip(remaining, 0, depth), leaf_index],
+                        0.0,
+                    )
+
+                one = 1.0 if satisfied[j] else 0.0
+                share = values * (one - zero[:, j]) * unsatisfied_zero * coalitions
+                table[:, mask, j] = np.where(valid[:, j], share, 0.0)
+        return table
+
+    def shap_values(self, x) -> np.ndarray:
+        """Attributions for one scaled feature row; they sum to the raw prediction minus ``expected_value``."""
+        # Trees compare float32 inputs against their thresholds
+        x = np.asarray(x, dtype=np.float32).astype(np.float64).ravel()
+        inputs = x[self.features]
+        satisfied = (inputs > self.low) & (inputs <= self.high)
+        masks = satisfied @ self.bits
+        shares = self.table[np.arange(len(masks)), masks]
+        return np.bincount(self.features.ravel(), weights=shares.ravel(), minlength=self.n_features)
+
+
+def raw_attributions(attributions: dict) -> dict:
+    """Fold engineered-feature attributions onto the five raw inputs.
+
+    Each engineered feature's attribution is split equally among the raw
+    inputs it is computed from.
+    """
+    fields = {column: field for field, column in RAW_COLUMNS.items()}
+    totals = dict.fromkeys(RAW_COLUMNS, 0.0)
+    for column, value in attributions.items():
+        dependencies = FEATURE_DEPENDENCIES[column]
+        for dependency in dependencies:
+            totals[fields[dependency]] += value / len(dependencies)
+    return totals
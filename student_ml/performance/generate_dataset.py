@@ -5,6 +5,8 @@ This creates data that reflects real-world student behaviors and outcomes.
 import pandas as pd
 import numpy as np
 
+from performance.schema import DATASET_DTYPES, write_csv
+
 np.random.seed(42)
 
 
@@ -73,8 +75,6 @@ def calculate_realistic_performance(hours, prev_score, extra, sleep, papers):
 def generate_dataset(n_samples=200):
     """Generate diverse, realistic student data."""
     
-    data = []
-    
     # Define realistic student profiles
     profiles = [
         # High performers
@@ -95,28 +95,7 @@ def generate_dataset(n_samples=200):
         {"hours_range": (4, 6), "prev_range": (70, 90), "extra_prob": 0.8, "sleep_range": (7, 9), "papers_range": (4, 8)},
     ]
     
-    samples_per_profile = n_samples // len(profiles)
-    
-    for profile in profiles:
-        for _ in range(samples_per_profile):
-            hours = np.random.randint(profile["hours_range"][0], profile["hours_range"][1] + 1)
-            prev_score = np.random.randint(profile["prev_range"][0], profile["prev_range"][1] + 1)
-            extra = np.random.random() < profile["extra_prob"]
-            sleep = np.random.randint(profile["sleep_range"][0], profile["sleep_range"][1] + 1)
-            papers = np.random.randint(profile["papers_range"][0], profile["papers_range"][1] + 1)
-            
-            performance = calculate_realistic_performance(hours, prev_score, extra, sleep, papers)
-            
-            data.append({
-                "Hours Studied": hours,
-                "Previous Scores": prev_score,
-                "Extracurricular Activities": "Yes" if extra else "No",
-                "Sleep Hours": sleep,
-                "Sample Question Papers Practiced": papers,
-                "Performance Index": performance
-            })
-    
-    # Add edge cases
+    # Edge cases, added after the profile samples
     edge_cases = [
         # No study, no sleep
         (0, 50, "No", 2, 0),
@@ -138,19 +117,37 @@ def generate_dataset(n_samples=200):
         (1, 35, "No", 9, 0),
     ]
     
+    samples_per_profile = n_samples // len(profiles)
+    
+    # Rows are written straight into compact column arrays
+    columns = {
+        column: np.empty(samples_per_profile * len(profiles) + len(edge_cases), dtype=dtype)
+        for column, dtype in DATASET_DTYPES.items()
+    }
+    row = 0
+    
+    for profile in profiles:
+        for _ in range(samples_per_profile):
+            hours = np.random.randint(profile["hours_range"][0], profile["hours_range"][1] + 1)
+            prev_score = np.random.randint(profile["prev_range"][0], profile["prev_range"][1] + 1)
+            extra = np.random.random() < profile["extra_prob"]
+            sleep = np.random.randint(profile["sleep_range"][0], profile["sleep_range"][1] + 1)
+            papers = np.random.randint(profile["papers_range"][0], profile["papers_range"][1] + 1)
+            
+            performance = calculate_realistic_performance(hours, prev_score, extra, sleep, papers)
+            
+            for column, value in zip(columns, (hours, prev_score, extra, sleep, papers, performance)):
+                columns[column][row] = value
+            row += 1
+    
     for hours, prev, extra, sleep, papers in edge_cases:
         extra_bool = extra == "Yes"
         performance = calculate_realistic_performance(hours, prev, extra_bool, sleep, papers)
-        data.append({
-            "Hours Studied": hours,
-            "Previous Scores": prev,
-            "Extracurricular Activities": extra,
-            "Sleep Hours": sleep,
-            "Sample Question Papers Practiced": papers,
-            "Performance Index": performance
-        })
-    
-    df = pd.DataFrame(data)
+        for column, value in zip(columns, (hours, prev, extra_bool, sleep, papers, performance)):
+            columns[column][row] = value
+        row += 1
+    
+    df = pd.DataFrame(columns, copy=False)
     return df
 
 
@@ -166,5 +163,5 @@ if __name__ == "__main__":
     print(df.describe())
     
     # Save to CSV
-    df.to_csv("dataset.csv", index=False)
+    write_csv(df, "dataset.csv")
     print("\n✓ Enhanced dataset saved to dataset.csv")
@@ -0,0 +1,183 @@
+"""
+Vectorized feature engineering and constraints for batch predictions.
+These mirror the single-row logic in views.py so whole grids or tables
+can be scored with one model call.
+"""
+import numpy as np
+
+from .schema import FEATURE_DTYPE
+
+RAW_FEATURES = (
+    "hours_studied",
+    "previous_scores",
+    "extracurricular",
+    "sleep_hours",
+    "sample_papers",
+)
+
+# Training column name for each raw input
+RAW_COLUMNS = {
+    "hours_studied": "Hours Studied",
+    "previous_scores": "Previous Scores",
+    "extracurricular": "Extracurricular Activities",
+    "sleep_hours": "Sleep Hours",
+    "sample_papers": "Sample Question Papers Practiced",
+}
+
+# Engineered features, named the same in training and on StudentPerformance
+ENGINEERED_FEATURES = (
+    "study_efficiency",
+    "sleep_quality",
+    "balance_score",
+    "practice_intensity",
+    "burnout_risk",
+    "underprepared_risk",
+    "cognitive_capacity",
+    "total_preparation",
+    "study_sleep_interaction",
+)
+
+# Raw training columns each model feature is computed from
+FEATURE_DEPENDENCIES = {
+    **{column: (column,) for column in RAW_COLUMNS.values()},
+    "study_efficiency": ("Previous Scores", "Hours Studied"),
+    "sleep_quality": ("Sleep Hours",),
+    "balance_score": ("Hours Studied", "Sleep Hours", "Extracurricular Activities"),
+    "practice_intensity": ("Sample Question Papers Practiced", "Hours Studied"),
+    "burnout_risk": ("Hours Studied", "Sleep Hours"),
+    "underprepared_risk": ("Hours Studied", "Sample Question Papers Practiced"),
+    "cognitive_capacity": ("Sleep Hours",),
+    "total_preparation": ("Hours Studied", "Sample Question Papers Practiced", "Previous Scores"),
+    "study_sleep_interaction": ("Hours Studied", "Sleep Hours"),
+}
+
+
+def engineer_features_array(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers):
+    """Engineer the training features for arrays of raw inputs, keyed by training column name."""
+    hours = np.asarray(hours_studied, dtype=np.float64)
+    previous = np.asarray(previous_scores, dtype=np.float64)
+    extra = np.asarray(extracurricular, dtype=np.float64)
+    sleep = np.asarray(sleep_hours, dtype=np.float64)
+    papers = np.asarray(sample_papers, dtype=np.float64)
+
+    # Sleep quality score: optimal sleep is 7-9 hours
+    sleep_quality = np.select(
+        [
+            (sleep >= 7) & (sleep <= 9),
+            ((sleep >= 6) & (sleep < 7)) | ((sleep > 9) & (sleep <= 10)),
+            ((sleep >= 5) & (sleep < 6)) | ((sleep > 10) & (sleep <= 11)),
+            ((sleep >= 4) & (sleep < 5)) | ((sleep > 11) & (sleep <= 12)),
+        ],
+        [1.0, 0.8, 0.5, 0.2],
+        default=0.0,
+    )
+
+    return {
+        "Hours Studied": hours,
+        "Previous Scores": previous,
+        "Extracurricular Activities": extra,
+        "Sleep Hours": sleep,
+        "Sample Question Papers Practiced": papers,
+        "study_efficiency": previous / (hours + 1),
+        "sleep_quality": sleep_quality,
+        "balance_score": (hours / 10) * 0.4 + sleep_quality * 0.3 + extra * 0.3,
+        "practice_intensity": papers / (hours + 1),
+        "burnout_risk": ((hours > 10) & (sleep < 6)).astype(np.float64),
+        "underprepared_risk": ((hours < 3) & (papers < 2)).astype(np.float64),
+        "cognitive_capacity": np.clip((sleep - 3) / 6, 0.0, 1.0),
+        "total_preparation": hours * 0.3 + papers * 2 + previous * 0.2,
+        "study_sleep_interaction": hours * sleep_quality,
+    }
+
+
+def feature_matrix(features: dict, feature_columns) -> np.ndarray:
+    """Stack engineered feature arrays into a 2D matrix in the model's column order.
+
+    The matrix is ``FEATURE_DTYPE``, like the training features the scaler was
+    fitted on, so both paths scale bit-identical inputs.
+    """
+    return np.column_stack([features[column] for column in feature_columns]).astype(FEATURE_DTYPE, copy=False)
+
+
+def apply_realistic_constraints_array(predictions, hours_studied, previous_scores, sleep_hours, sample_papers):
+    """Vectorized equivalent of views.apply_realistic_constraints_single."""
+    pred = np.array(predictions, dtype=np.float64)
+    hours = np.asarray(hours_studied)
+    previous = np.asarray(previous_scores, dtype=np.float64)
+    sleep = np.asarray(sleep_hours)
+    papers = np.asarray(sample_papers)
+
+    # ============ CRITICAL: IMPOSSIBLE SCENARIOS ============
+
+    pred = np.select(
+        [sleep == 0, sleep == 1, sleep == 2, sleep < 4, sleep < 5, sleep < 6],
+        [
+            np.zeros_like(pred),
+            np.minimum(pred * 0.05, 5),
+            np.minimum(pred * 0.1, 10),
+            pred * 0.2,
+            pred * 0.4,
+            pred * 0.6,
+        ],
+        default=pred,
+    )
+
+    no_study = hours == 0
+    pred = np.where(no_study, np.minimum(pred, previous * 0.3), pred)
+    pred = np.where(no_study & (papers == 0), np.minimum(pred, 5), pred)
+    pred = np.where(hours == 1, np.minimum(pred, previous * 0.5), pred)
+    pred = np.where((hours > 1) & (hours < 3), np.minimum(pred, previous * 0.7), pred)
+
+    # ============ EXCESSIVE/UNREALISTIC SCENARIOS ============
+
+    pred = pred * np.select([sleep > 14, sleep > 12, sleep > 10], [0.3, 0.5, 0.75], default=1.0)
+
+    # ============ BURNOUT SCENARIOS ============
+
+    pred = pred * np.select(
+        [
+            (hours > 12) & (sleep < 5),
+            (hours > 10) & (sleep < 6),
+            (hours > 8) & (sleep < 5),
+        ],
+        [0.3, 0.5, 0.6],
+        default=1.0,
+    )
+
+    # ============ PREPARATION QUALITY ============
+
+    pred = pred * np.select([papers == 0, papers < 3], [0.7, 0.85], default=1.0)
+
+    # ============ LOW EFFORT OVERALL ============
+
+    effort_cap = np.select(
+        [
+            (previous < 30) & (hours < 2) & (papers < 2),
+            (previous < 40) & (hours < 3) & (papers < 2),
+            (previous < 50) & (hours < 4) & (papers < 3),
+        ],
+        [15.0, 25.0, 35.0],
+        default=np.inf,
+    )
+    pred = np.minimum(pred, effort_cap)
+
+    # ============ FINAL BOUNDS AND CAPS ============
+
+    pred = np.clip(pred, 0, 100)
+    base_max = previous + np.select(
+        [
+            (hours >= 8) & (papers >= 7) & (sleep >= 7) & (sleep <= 9),
+            (hours >= 6) & (papers >= 5) & (sleep >= 6) & (sleep <= 10),
+        ],
+        [35.0, 30.0],
+        default=25.0,
+    )
+    return np.minimum(np.minimum(pred, base_max), 100)
+
+
+def predict_array(bundle: dict, hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> np.ndarray:
+    """Score arrays of raw inputs with a loaded model bundle, including constraints."""
+    features = engineer_features_array(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)
+    matrix = feature_matrix(features, bundle["feature_columns"])
+    raw = np.asarray(bundle["model"].predict(bundle["scaler"].transform(matrix)), dtype=np.float64)
+    return apply_realistic_constraints_array(raw, hours_studied, previous_scores, sleep_hours, sample_papers)
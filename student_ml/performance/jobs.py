@@ -0,0 +1,143 @@
+"""
+Background batch-scoring jobs.
+
+An uploaded CSV is stored as a queued ``ScoringJob``. The ``run_jobs``
+command claims queued jobs and scores them with ``scoring.score_csv``, so
+results are written chunk by chunk and an interrupted job resumes from its
+checkpoint. A claim is a conditional UPDATE on the job row, which needs no
+broker and lets several workers share one SQLite database. Rows that fail
+validation get an ``errors`` column in the result instead of a score.
+
+An upload is deleted once its job finishes. Finished jobs and their result
+files are purged after ``RETENTION`` seconds.
+"""
+import csv
+import io
+import os
+from contextlib import suppress
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ScoringJob
+
+# Seconds without a heartbeat after which a running job is assumed dead and requeued
+STALE_AFTER = 300
+
+# Seconds a finished job and its result file are kept before they are purged
+RETENTION = 7 * 24 * 3600
+
+
+def read_header(upload) -> list:
+    """Column names from the first line of an uploaded CSV."""
+    upload.seek(0)
+    first_line = upload.readline().decode("utf-8-sig", errors="replace")
+    upload.seek(0)
+    return next(csv.reader(io.StringIO(first_line)), [])
+
+
+def missing_columns(header: list) -> list:
+    """Raw inputs present under neither their API nor their dataset column name."""
+    from .inference import RAW_COLUMNS
+
+    return [field for field, column in RAW_COLUMNS.items() if field not in header and column not in header]
+
+
+def count_rows(upload) -> int:
+    """Data rows in an uploaded CSV, counted without parsing it."""
+    upload.seek(0)
+    newlines, last = 0, b"\n"
+    for chunk in upload.chunks():
+        newlines += chunk.count(b"\n")
+        last = chunk[-1:] or last
+    upload.seek(0)
+    lines = newlines + (last != b"\n")
+    return max(lines - 1, 0)
+
+
+def create_job(upload, tenant: str = "") -> ScoringJob:
+    job = ScoringJob(tenant=tenant, rows_total=count_rows(upload))
+    job.input_file.save(f"{job.id}.csv", upload, save=False)
+    job.save()
+    return job
+
+
+def requeue_stale(stale_after: float = STALE_AFTER) -> int:
+    """Put running jobs whose worker stopped heartbeating back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return ScoringJob.objects.filter(status=ScoringJob.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=ScoringJob.QUEUED
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running, or return None when the queue is empty."""
+    queued = ScoringJob.objects.filter(status=ScoringJob.QUEUED).order_by("created_at")
+    for job_id in queued.values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = ScoringJob.objects.filter(id=job_id, status=ScoringJob.QUEUED).update(
+            status=ScoringJob.RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return ScoringJob.objects.get(id=job_id)
+    return None
+
+
+def _finish(job: ScoringJob, status: str, error: str = ""):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    # The upload is only needed while the job can still resume
+    job.input_file.delete(save=False)
+    job.save(update_fields=[
+        "status", "error", "finished_at", "rows_done", "model_version", "input_file", "result_file",
+    ])
+
+
+def purge_finished(retention: float = RETENTION) -> int:
+    """Delete jobs that finished more than ``retention`` seconds ago, with their files."""
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    expired = ScoringJob.objects.filter(status__in=[ScoringJob.DONE, ScoringJob.FAILED], finished_at__lt=cutoff)
+    purged = 0
+    for job in expired.iterator():
+        if job.result_file:
+            # A failed job can leave its scoring checkpoint behind
+            with suppress(FileNotFoundError):
+                os.remove(f"{job.result_file.path}.progress")
+        job.input_file.delete(save=False)
+        job.result_file.delete(save=False)
+        job.delete()
+        purged += 1
+    return purged
+
+
+def run_job(job: ScoringJob, workers: int = 1, chunk_size: int = None, report=print) -> ScoringJob:
+    """Score a claimed job's upload into its result file, recording progress after every chunk."""
+    from .scoring import CHUNK_SIZE, score_csv
+    from .views import model_path, model_version
+
+    tenant = job.tenant or None
+    try:
+        path = model_path(tenant)
+        job.model_version = model_version(path)
+    except FileNotFoundError:
+        _finish(job, ScoringJob.FAILED, f"No model for tenant '{tenant}'." if tenant else "Model not found.")
+        return job
+
+    job.result_file.name = f"scoring_jobs/results/{job.id}.csv"
+    result_path = job.result_file.path
+    os.makedirs(os.path.dirname(result_path), exist_ok=True)
+
+    def on_chunk(rows):
+        job.rows_done = rows
+        ScoringJob.objects.filter(id=job.id).update(rows_done=rows, heartbeat_at=timezone.now())
+
+    try:
+        score_csv(path, job.model_version, job.input_file.path, result_path,
+                  workers=workers, chunk_size=chunk_size or CHUNK_SIZE, report=report, on_chunk=on_chunk)
+    except Exception as exc:
+        _finish(job, ScoringJob.FAILED, str(exc))
+        return job
+
+    _finish(job, ScoringJob.DONE)
+    return job
@@ -1,16 +1,85 @@
-import pandas as pd
+import numpy as np
 
+from performance.dataset_cache import DATASET_PATH, load_columns
+from performance.inference import ENGINEERED_FEATURES, engineer_features_array
 from performance.models import StudentPerformance
+from performance.schema import widen
 
+CHUNK_SIZE = 5000
 
-def run():
-    df = pd.read_csv("dataset.csv")
-    for _, row in df.iterrows():
-        StudentPerformance.objects.create(
-            hours_studied=row["Hours Studied"],
-            previous_scores=row["Previous Scores"],
-            extracurricular=row["Extracurricular Activities"] == "Yes",
-            sleep_hours=row["Sleep Hours"],
-            sample_papers=row["Sample Question Papers Practiced"],
-            performance_index=row["Performance Index"],
+
+def engineered_columns(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> dict:
+    """Vectorized engineered feature columns for a chunk of rows, keyed by model field name."""
+    features = engineer_features_array(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)
+    return {name: features[name] for name in ENGINEERED_FEATURES}
+
+
+def run(path=DATASET_PATH, chunk_size=CHUNK_SIZE):
+    columns = load_columns(path)
+    total = len(columns["Performance Index"])
+    for start in range(0, total, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        hours = columns["Hours Studied"][chunk]
+        previous = columns["Previous Scores"][chunk]
+        extra = columns["Extracurricular Activities"][chunk]
+        sleep = columns["Sleep Hours"][chunk]
+        papers = columns["Sample Question Papers Practiced"][chunk]
+        performance = widen(columns["Performance Index"][chunk])
+        features = engineered_columns(hours, previous, extra, sleep, papers)
+
+        StudentPerformance.objects.bulk_create(
+            [
+                StudentPerformance(
+                    hours_studied=int(hours[i]),
+                    previous_scores=int(previous[i]),
+                    extracurricular=bool(extra[i]),
+                    sleep_hours=int(sleep[i]),
+                    sample_papers=int(papers[i]),
+                    performance_index=float(performance[i]),
+                    **{name: float(values[i]) for name, values in features.items()},
+                )
+                for i in range(len(hours))
+            ],
+            batch_size=chunk_size,
+        )
+
+
+def backfill(chunk_size=CHUNK_SIZE, recompute=False) -> int:
+    """Fill engineered features for stored rows that don't have them yet.
+
+    With ``recompute``, every row is checked and rewritten when its stored
+    features don't match its inputs, e.g. after ``QuerySet.update()`` or
+    ``bulk_update()`` changed an input without going through ``save()``.
+    """
+    updated = 0
+    last_id = 0
+    pending = StudentPerformance.objects.order_by("id")
+    if not recompute:
+        pending = pending.filter(study_efficiency__isnull=True)
+    stored_fields = list(ENGINEERED_FEATURES) if recompute else []
+    while True:
+        rows = list(pending.filter(id__gt=last_id).values_list(
+            "id", "hours_studied", "previous_scores", "extracurricular", "sleep_hours", "sample_papers",
+            *stored_fields,
+        )[:chunk_size])
+        if not rows:
+            return updated
+        last_id = rows[-1][0]
+        columns = list(zip(*rows))
+        ids, hours, previous, extra, sleep, papers = columns[:6]
+        features = engineered_columns(hours, previous, extra, sleep, papers)
+        stale = range(len(ids))
+        if recompute:
+            stored = np.array(columns[6:], dtype=np.float64)
+            computed = np.array([features[name] for name in ENGINEERED_FEATURES], dtype=np.float64)
+            # NULL features come back as NaN and never match
+            stale = np.flatnonzero((stored != computed).any(axis=0))
+        StudentPerformance.objects.bulk_update(
+            [
+                StudentPerformance(id=ids[i], **{name: float(values[i]) for name, values in features.items()})
+                for i in stale
+            ],
+            list(ENGINEERED_FEATURES),
+            batch_size=500,
         )
+        updated += len(stale)
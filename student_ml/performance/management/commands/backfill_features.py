@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Fill engineered feature columns for stored rows that are missing them'
+
+    def add_arguments(self, parser):
+        from performance.load_data import CHUNK_SIZE
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows per chunk (default: {CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--recompute',
+            action='store_true',
+            help='Check every row and rewrite features that no longer match its inputs, not only missing ones'
+        )
+
+    def handle(self, *args, **options):
+        from performance.load_data import backfill
+
+        self.stdout.write('Backfilling engineered features...')
+        updated = backfill(options['chunk_size'], recompute=options['recompute'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated {updated} rows'))
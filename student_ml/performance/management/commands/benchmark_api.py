@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from performance import codec
+
+SAMPLE = {
+    "hours_studied": 6,
+    "previous_scores": 75,
+    "extracurricular": True,
+    "sleep_hours": 7,
+    "sample_papers": 5,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request overhead of the DRF and lean prediction endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Number of requests per endpoint (default: 2000)'
+        )
+
+    def _time(self, view, request_factory, count):
+        view(request_factory())  # warm up caches and the model
+        start = time.perf_counter()
+        for _ in range(count):
+            response = view(request_factory())
+            if hasattr(response, 'render'):
+                response.render()
+        return (time.perf_counter() - start) / count * 1e6
+
+    def handle(self, *args, **options):
+        from performance.views import load_model_bundle, predict_performance, predict_performance_fast
+
+        count = options['requests']
+        factory = RequestFactory()
+        json_body = json.dumps(SAMPLE)
+        load_model_bundle()
+
+        results = [
+            ('DRF JSON', self._time(
+                predict_performance,
+                lambda: factory.post('/api/predict/', json_body, content_type=codec.JSON),
+                count,
+            )),
+            ('Lean JSON', self._time(
+                predict_performance_fast,
+                lambda: factory.post('/api/predict/fast/', json_body, content_type=codec.JSON),
+                count,
+            )),
+        ]
+        if codec.msgpack is not None:
+            msgpack_body = codec.msgpack.packb(SAMPLE)
+            results.append(('Lean msgpack', self._time(
+                predict_performance_fast,
+                lambda: factory.post(
+                    '/api/predict/fast/', msgpack_body,
+                    content_type=codec.MSGPACK, HTTP_ACCEPT=codec.MSGPACK,
+                ),
+                count,
+            )))
+
+        baseline = results[0][1]
+        self.stdout.write(f'{"Endpoint":<14}{"us/request":>12}{"saved":>10}')
+        for name, micros in results:
+            self.stdout.write(f'{name:<14}{micros:>12.1f}{baseline - micros:>10.1f}')
+        if codec.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson not installed: lean endpoint used the json module'))
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import time
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _generate(rows, path):
+    from performance.generate_dataset import generate_dataset
+    from performance.schema import write_csv
+
+    write_csv(generate_dataset(rows), path)
+
+
+class Command(BaseCommand):
+    help = 'Measure peak memory, time and accuracy of row-level training on a generated dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1_000_000,
+            help='Rows to generate (default: 1000000)'
+        )
+        parser.add_argument(
+            '--stages',
+            type=int,
+            default=20,
+            help='Boosting stages to fit; the full 300 takes hours on millions of rows (default: 20)'
+        )
+        parser.add_argument(
+            '--dataset',
+            default=None,
+            help='Benchmark an existing CSV instead of generating one'
+        )
+
+    def handle(self, *args, **options):
+        import numpy as np
+        from sklearn.metrics import mean_squared_error, r2_score
+
+        from performance.dataset_cache import load_frame
+        from performance.inference import RAW_COLUMNS
+        from performance.train_model import (
+            apply_realistic_constraints, engineer_features, make_model, peak_rss_mb, prepare_split,
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = options['dataset']
+            if path is None:
+                path = os.path.join(tmp, 'dataset.csv')
+                self.stdout.write(f'Generating {options["rows"]} rows...')
+                # In a child process, so generating the rows does not count towards the peak
+                child = get_context('fork').Process(target=_generate, args=(options['rows'], path))
+                child.start()
+                child.join()
+                if child.exitcode:
+                    raise CommandError(f'Generating the dataset failed (exit code {child.exitcode})')
+
+            started = time.perf_counter()
+            df = load_frame(path, columns=list(RAW_COLUMNS.values()) + ['Performance Index'],
+                            cache_dir=os.path.join(tmp, 'cache'))
+            rows = len(df)
+            split = prepare_split(engineer_features(df))
+            del df
+            prepared = time.perf_counter()
+
+            model = make_model().set_params(n_estimators=options['stages'], n_iter_no_change=None)
+            model.fit(split['X_train_scaled'], split['y_train'])
+            fitted = time.perf_counter()
+
+            predictions = apply_realistic_constraints(model.predict(split['X_test_scaled']), split['X_test'])
+            y_test = split['y_test']
+
+        self.stdout.write(f'\nRows:          {rows}')
+        self.stdout.write(f'Load + split:  {prepared - started:.1f}s')
+        self.stdout.write(f'Fit:           {fitted - prepared:.1f}s ({options["stages"]} stages)')
+        self.stdout.write(f'Test RMSE:     {np.sqrt(mean_squared_error(y_test, predictions)):.4f}')
+        self.stdout.write(f'Test R²:       {r2_score(y_test, predictions):.4f}')
+        self.stdout.write(self.style.SUCCESS(f'Peak memory:   {peak_rss_mb():.0f} MB'))
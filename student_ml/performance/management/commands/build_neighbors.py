@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Build the similar-students index from the stored StudentPerformance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Fold rows added since the last build into the saved index instead of rebuilding it'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='With --update, repeat every N seconds until interrupted'
+        )
+
+    def handle(self, *args, **options):
+        from performance.neighbors import INDEX_PATH, build, update
+
+        if options['interval'] is not None and not options['update']:
+            raise CommandError('--interval repeats an --update; it needs --update')
+
+        if not options['update']:
+            self.stdout.write('Indexing stored students...')
+            started = time.perf_counter()
+            index = build(INDEX_PATH)
+            self.report(index, time.perf_counter() - started, INDEX_PATH)
+            return
+
+        if not os.path.exists(INDEX_PATH):
+            raise CommandError(f'{INDEX_PATH} does not exist; run build_neighbors without --update first')
+        while True:
+            started = time.perf_counter()
+            index = update(INDEX_PATH)
+            self.report(index, time.perf_counter() - started, INDEX_PATH)
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+
+    def report(self, index, elapsed, path):
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Indexed {len(index)} students as {len(index.tuples)} distinct inputs in {elapsed:.2f}s'
+        ))
+        self.stdout.write(f'Saved to {path} ({os.path.getsize(path) / 1024 ** 2:.1f} MB)')
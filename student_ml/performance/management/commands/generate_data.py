@@ -1,5 +1,4 @@
 from django.core.management.base import BaseCommand
-from performance.generate_dataset import generate_dataset
 
 
 class Command(BaseCommand):
@@ -14,11 +13,16 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        from performance.dataset_cache import build_cache
+        from performance.generate_dataset import generate_dataset
+        from performance.schema import write_csv
+
         n_samples = options['samples']
         self.stdout.write(f'Generating {n_samples} samples...')
         
         df = generate_dataset(n_samples)
-        df.to_csv("dataset.csv", index=False)
+        write_csv(df, "dataset.csv")
+        build_cache("dataset.csv", df)
         
         self.stdout.write(self.style.SUCCESS(f'✓ Generated {len(df)} samples'))
         self.stdout.write(self.style.SUCCESS(f'✓ Saved to dataset.csv'))
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Process queued batch-scoring jobs uploaded to /api/jobs/'
+
+    def add_arguments(self, parser):
+        from performance.jobs import RETENTION, STALE_AFTER
+        from performance.scoring import CHUNK_SIZE
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes scoring each job (default: 1)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows per chunk (default: {CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait before checking an empty queue again (default: 2)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=STALE_AFTER,
+            help=f'Requeue running jobs without progress for this many seconds (default: {STALE_AFTER})'
+        )
+        parser.add_argument(
+            '--retention',
+            type=float,
+            default=RETENTION,
+            help=f'Delete finished jobs and their results after this many seconds (default: {RETENTION})'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling for new jobs'
+        )
+
+    def handle(self, *args, **options):
+        from performance.jobs import claim_next_job, purge_finished, requeue_stale, run_job
+
+        self.stdout.write('Waiting for scoring jobs...')
+        while True:
+            requeued = requeue_stale(options['stale_after'])
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stalled jobs'))
+            purged = purge_finished(options['retention'])
+            if purged:
+                self.stdout.write(f'Purged {purged} expired jobs')
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Scoring job {job.id} ({job.rows_total} rows)...')
+            run_job(job, workers=options['workers'], chunk_size=options['chunk_size'], report=self.stdout.write)
+            if job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(f'✓ Job {job.id} scored {job.rows_done} rows'))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ Job {job.id} failed: {job.error}'))
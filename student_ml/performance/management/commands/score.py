@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Bulk-score stored students or a CSV file with the current model'
+
+    def add_arguments(self, parser):
+        from performance.scoring import CHUNK_SIZE
+
+        parser.add_argument(
+            '--csv',
+            help='Score this CSV instead of the StudentPerformance table'
+        )
+        parser.add_argument(
+            '--output',
+            help='Output CSV path (required with --csv)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes for scoring (default: 1)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Rows per chunk (default: {CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        from performance.scoring import score_csv, score_table
+        from performance.views import MODEL_PATH, model_version
+
+        try:
+            version = model_version(MODEL_PATH)
+        except FileNotFoundError:
+            raise CommandError('Model not found. Train the model first.')
+
+        report = self.stdout.write
+        if options['csv']:
+            if not options['output']:
+                raise CommandError('--output is required with --csv')
+            self.stdout.write(f'Scoring {options["csv"]} with model {version}...')
+            progress = score_csv(
+                MODEL_PATH, version, options['csv'], options['output'],
+                workers=options['workers'], chunk_size=options['chunk_size'], report=report,
+            )
+        else:
+            self.stdout.write(f'Scoring StudentPerformance rows with model {version}...')
+            progress = score_table(
+                MODEL_PATH, version,
+                workers=options['workers'], chunk_size=options['chunk_size'], report=report,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Scored {progress.rows} rows at {progress.rate:.0f} rows/sec'
+        ))
@@ -0,0 +1,175 @@
+import gc
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+
+
+def process_memory(pid: int) -> dict:
+    """RSS, PSS and unique (private) memory of a process in bytes, from /proc."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def memory_reports_supported() -> bool:
+    """Whether this system exposes /proc smaps_rollup (Linux), which process_memory reads."""
+    return os.path.exists(f"/proc/{os.getpid()}/smaps_rollup")
+
+
+class Command(BaseCommand):
+    help = 'Serve the app with prefork workers that share the preloaded model copy-on-write'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind',
+            default='127.0.0.1:8000',
+            help='Address to listen on (default: 127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--read-timeout',
+            type=float,
+            default=30.0,
+            help='Seconds a worker waits for the client to send more data before dropping it (default: 30)'
+        )
+        parser.add_argument(
+            '--report-interval',
+            type=float,
+            default=0,
+            help='Seconds between memory reports; 0 reports once after startup (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError('serve needs os.fork(); use runserver on this platform')
+
+        host, _, port = options['bind'].rpartition(':')
+        self.address = (host or '127.0.0.1', int(port))
+        self.worker_count = options['workers']
+        # A client that stops sending (e.g. mid-way through a stream) would otherwise hold its
+        # worker and its admission slot until the connection drops
+        self.handler = type('TimeoutWSGIRequestHandler', (WSGIRequestHandler,), {'timeout': options['read_timeout']})
+
+        # Import the heavy modules and load the model once, in the parent
+        self.stdout.write('Preloading application and model...')
+        from student_ml.wsgi import application
+        from performance import urls  # noqa: F401
+        from performance.views import load_model_bundle, preload_modules
+        preload_modules()
+        try:
+            load_model_bundle()
+        except Exception as exc:
+            self.stdout.write(self.style.WARNING(f'Model not preloaded ({exc}); workers will load it on demand'))
+        from django.db import connections
+        from performance import percentiles
+        if percentiles.get_config()['ENABLED']:
+            try:
+                percentiles.get_index().refresh()
+            except Exception as exc:
+                self.stdout.write(self.style.WARNING(
+                    f'Percentile index not built ({exc}); workers will build it in the background'
+                ))
+            # Workers must open their own connections rather than share the parent's
+            connections.close_all()
+        self.application = application
+
+        self.listener = socket.create_server(self.address, backlog=128)
+        # Fork-capable systems without /proc (e.g. macOS) serve without memory reports
+        self.parent_memory = process_memory(os.getpid()) if memory_reports_supported() else None
+
+        # Keep the garbage collector from touching (and so copying) preloaded objects
+        gc.collect()
+        gc.freeze()
+
+        self.workers = {}
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.worker_count):
+            self._spawn()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Serving on http://{self.address[0]}:{self.address[1]}/ with {self.worker_count} workers'
+        ))
+        if self.parent_memory is None:
+            self.stdout.write('Memory reports need /proc/<pid>/smaps_rollup; skipping them on this system')
+        self._supervise(options['report_interval'])
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        server = WSGIServer(self.address, self.handler, bind_and_activate=False)
+        server.socket = self.listener
+        server.server_name, server.server_port = self.address
+        server.setup_environ()
+        server.set_app(self.application)
+        try:
+            server.serve_forever()
+        finally:
+            os._exit(0)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def _supervise(self, report_interval):
+        next_report = time.monotonic() + max(report_interval, 2) if self.parent_memory is not None else None
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid in self.workers:
+                del self.workers[pid]
+                self.stdout.write(self.style.WARNING(f'Worker {pid} exited ({status}); restarting'))
+                self._spawn()
+            if next_report is not None and time.monotonic() >= next_report:
+                self.report_memory()
+                next_report = time.monotonic() + report_interval if report_interval > 0 else None
+            time.sleep(0.2)
+
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        for pid in self.workers:
+            os.waitpid(pid, 0)
+        self.stdout.write('Workers stopped.')
+
+    def report_memory(self):
+        mb = 1024 * 1024
+        self.stdout.write(
+            f'Parent before fork: RSS {self.parent_memory["rss"] / mb:.1f} MB'
+        )
+        self.stdout.write(f'{"worker":>8}{"RSS MB":>10}{"PSS MB":>10}{"unique MB":>11}{"shared MB":>11}')
+        total_unique = 0
+        for pid in sorted(self.workers):
+            try:
+                memory = process_memory(pid)
+            except OSError:
+                continue
+            total_unique += memory["uss"]
+            self.stdout.write(
+                f'{pid:>8}{memory["rss"] / mb:>10.1f}{memory["pss"] / mb:>10.1f}'
+                f'{memory["uss"] / mb:>11.1f}{memory["shared"] / mb:>11.1f}'
+            )
+        self.stdout.write(f'Total unique worker memory: {total_unique / mb:.1f} MB')
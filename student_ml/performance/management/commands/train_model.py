@@ -1,11 +1,138 @@
-from django.core.management.base import BaseCommand
-from performance.train_model import train
+import os
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+def aware_datetime(value):
+    """argparse type for ISO dates and datetimes; naive values are in the current time zone."""
+    parsed = datetime.fromisoformat(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
 
 
 class Command(BaseCommand):
     help = 'Train the advanced student performance prediction model'
 
+    def add_arguments(self, parser):
+        from performance.train_model import DB_FETCH_CHUNK
+
+        parser.add_argument(
+            '--source',
+            choices=['csv', 'db'],
+            default='csv',
+            help='Train from dataset.csv or from the stored StudentPerformance features (default: csv)'
+        )
+        parser.add_argument(
+            '--dedupe',
+            action='store_true',
+            help='Fit once per distinct input with its mean target, weighted by its row count'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='With --dedupe, also fit on every row and report time, memory and accuracy side by side'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Rebuild features, split and scaler instead of reusing them from the training cache'
+        )
+        parser.add_argument(
+            '--distill',
+            action='store_true',
+            help='Also fit fast distilled tiers to the full model and report their accuracy against latency'
+        )
+        parser.add_argument(
+            '--time-budget',
+            type=float,
+            help='Stop adding boosting stages before training has run this many seconds and save what is fitted'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue fitting from the checkpoint left by an interrupted or budgeted run'
+        )
+        parser.add_argument(
+            '--tenant',
+            help='Train on <artifact dir>/<tenant>/dataset.csv and save the model next to it'
+        )
+        parser.add_argument(
+            '--id-from',
+            type=int,
+            help='With --source db, train only on rows with at least this id'
+        )
+        parser.add_argument(
+            '--id-to',
+            type=int,
+            help='With --source db, train only on rows with at most this id'
+        )
+        parser.add_argument(
+            '--created-after',
+            type=aware_datetime,
+            help='With --source db, train only on rows created at or after this ISO date/datetime'
+        )
+        parser.add_argument(
+            '--created-before',
+            type=aware_datetime,
+            help='With --source db, train only on rows created before this ISO date/datetime'
+        )
+        parser.add_argument(
+            '--fetch-chunk',
+            type=int,
+            default=DB_FETCH_CHUNK,
+            help=f'With --source db, rows fetched from the database at a time (default: {DB_FETCH_CHUNK})'
+        )
+        parser.add_argument(
+            '--checkpoint-interval',
+            type=float,
+            default=30,
+            help='Seconds between checkpoints of the partial ensemble (default: 30)'
+        )
+
     def handle(self, *args, **options):
+        from performance import model_registry
+        from performance.dataset_cache import DATASET_PATH
+        from performance.train_model import CHECKPOINT_PATH, MODEL_PATH, CheckpointMismatch, NoTrainingRows, train
+
+        db_filters = {
+            'id_from': options['id_from'],
+            'id_to': options['id_to'],
+            'created_after': options['created_after'],
+            'created_before': options['created_before'],
+        }
+        if options['source'] != 'db' and any(value is not None for value in db_filters.values()):
+            raise CommandError('--id-from, --id-to, --created-after and --created-before need --source db')
+        db_filters['chunk_size'] = options['fetch_chunk']
+        if options['compare'] and not options['dedupe']:
+            raise CommandError('--compare compares a --dedupe fit with a row-level fit; it needs --dedupe')
+        if options['distill'] and options['dedupe']:
+            raise CommandError('--distill fits the tiers on the row-level split; it cannot be combined with --dedupe')
+
+        paths = {'dataset_path': DATASET_PATH, 'model_path': MODEL_PATH, 'checkpoint_path': CHECKPOINT_PATH}
+        if options['tenant'] is not None:
+            if options['source'] != 'csv':
+                raise CommandError('--tenant trains from the tenant dataset; it cannot be combined with --source db')
+            try:
+                directory = model_registry.tenant_dir(options['tenant'])
+            except model_registry.InvalidTenant as exc:
+                raise CommandError(f'Invalid tenant: {exc}')
+            paths = {
+                'dataset_path': os.path.join(directory, model_registry.DATASET_FILE),
+                'model_path': os.path.join(directory, model_registry.MODEL_FILE),
+                'checkpoint_path': os.path.join(directory, model_registry.CHECKPOINT_FILE),
+            }
+            if not os.path.exists(paths['dataset_path']):
+                raise CommandError(f'No dataset for tenant {options["tenant"]} at {paths["dataset_path"]}')
+
         self.stdout.write(self.style.SUCCESS('Starting model training...'))
-        train()
+        if options['resume'] and not os.path.exists(paths['checkpoint_path']):
+            raise CommandError(f'No checkpoint to resume from at {paths["checkpoint_path"]}')
+        try:
+            train(source=options['source'], dedupe=options['dedupe'], compare=options['compare'],
+                  use_cache=not options['no_cache'], time_budget=options['time_budget'],
+                  resume=options['resume'], checkpoint_interval=options['checkpoint_interval'],
+                  db_filters=db_filters, distill_tiers=options['distill'], **paths)
+        except (CheckpointMismatch, NoTrainingRows) as exc:
+            raise CommandError(str(exc))
         self.stdout.write(self.style.SUCCESS('Model training completed!'))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentperformance',
+            name='balance_score',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='burnout_risk',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='cognitive_capacity',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='practice_intensity',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='sleep_quality',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='study_efficiency',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='study_sleep_interaction',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='total_preparation',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='underprepared_risk',
+            field=models.FloatField(editable=False, null=True),
+        ),
+    ]
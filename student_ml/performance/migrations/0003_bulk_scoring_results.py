@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0002_engineered_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentperformance',
+            name='predicted_classification',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='predicted_performance_index',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='predicted_risk_level',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='studentperformance',
+            name='scored_model_version',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0003_bulk_scoring_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentperformance',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='studentperformance',
+            index=models.Index(fields=['-performance_index', '-id'], name='perf_index_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentperformance',
+            index=models.Index(fields=['extracurricular', '-performance_index', '-id'], name='extracurricular_perf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentperformance',
+            index=models.Index(fields=['previous_scores'], name='previous_scores_idx'),
+        ),
+    ]
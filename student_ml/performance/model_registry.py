@@ -0,0 +1,214 @@
+"""
+Per-tenant model bundles behind a memory-bounded LRU cache.
+
+Each tenant (school) has its own artifact directory holding the model it
+was trained on, ``<ARTIFACT_DIR>/<tenant>/model.pkl``. Bundles are loaded
+on first use and kept until the cache grows past its memory budget, when
+the least recently used ones are evicted. A bundle's size is taken from its
+file: bundles are written uncompressed, so the pickle holds the model's
+arrays byte for byte.
+
+Loads happen outside the cache lock, under a lock per artifact, so a
+tenant whose model is loading only blocks other requests for that tenant.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+
+DEFAULTS = {
+    "ARTIFACT_DIR": "performance/tenants",
+    "MEMORY_BUDGET": 512 * 1024 ** 2,
+}
+
+MODEL_FILE = "model.pkl"
+DATASET_FILE = "dataset.csv"
+CHECKPOINT_FILE = "model.checkpoint.pkl"
+
+# Tenant keys become directory names, so only allow a conservative slug
+TENANT_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+
+# Counter label for the default model; not a valid tenant key, so it never collides with one
+DEFAULT_TENANT = "_default"
+
+
+# Model tiers a request can pick. "full" is the trained model; the others are
+# distilled from it by ``train_model --distill`` and stored under the bundle's "tiers"
+MODEL_TIERS = ("full", "fast", "linear")
+DEFAULT_TIER = "full"
+
+
+class InvalidTenant(ValueError):
+    pass
+
+
+class InvalidTier(ValueError):
+    pass
+
+
+class MissingTier(LookupError):
+    pass
+
+
+def get_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "MODEL_REGISTRY", {})}
+
+
+def validate_tenant(tenant) -> str:
+    if not isinstance(tenant, str) or not TENANT_PATTERN.fullmatch(tenant):
+        raise InvalidTenant("Must be 1-63 lowercase letters, digits, '-' or '_'")
+    return tenant
+
+
+def validate_tier(tier) -> str:
+    if tier not in MODEL_TIERS:
+        raise InvalidTier(f"Must be one of: {', '.join(MODEL_TIERS)}")
+    return tier
+
+
+def tier_bundle(bundle: dict, tier: str = None) -> dict:
+    """``bundle`` answering with the model of ``tier``; the bundle itself for the full tier."""
+    if tier is None or tier == DEFAULT_TIER:
+        return bundle
+    try:
+        model = bundle.get("tiers", {})[validate_tier(tier)]
+    except KeyError:
+        raise MissingTier(tier) from None
+    return {**bundle, "model": model}
+
+
+def tenant_dir(tenant: str) -> str:
+    return os.path.join(get_config()["ARTIFACT_DIR"], validate_tenant(tenant))
+
+
+def tenant_model_path(tenant: str) -> str:
+    return os.path.join(tenant_dir(tenant), MODEL_FILE)
+
+
+class _Entry:
+    __slots__ = ("mtime", "bundle", "size", "tenant")
+
+    def __init__(self, mtime, bundle, size, tenant):
+        self.mtime = mtime
+        self.bundle = bundle
+        self.size = size
+        self.tenant = tenant
+
+
+class ModelCache:
+    """Loaded bundles keyed by path, evicted least recently used first beyond ``memory_budget`` bytes."""
+
+    def __init__(self, memory_budget: int):
+        self.memory_budget = memory_budget
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load_locks = {}
+        self.bytes_used = 0
+        self.counters = {}
+
+    def _count(self, tenant: str, counter: str, amount=1):
+        counters = self.counters.setdefault(
+            tenant, {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+        )
+        counters[counter] += amount
+
+    def _cached(self, path: str, mtime: int):
+        """The current bundle for ``path`` marked as most recently used, or None. Caller holds the lock."""
+        entry = self._entries.get(path)
+        if entry is None or entry.mtime != mtime:
+            return None
+        self._entries.move_to_end(path)
+        return entry.bundle
+
+    def load(self, path: str, tenant: str = DEFAULT_TENANT) -> dict:
+        """The bundle at ``path``, loaded once and reloaded when the file changes."""
+        stat = os.stat(path)
+        with self._lock:
+            bundle = self._cached(path, stat.st_mtime_ns)
+            if bundle is not None:
+                self._count(tenant, "hits")
+                return bundle
+            self._count(tenant, "misses")
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        with load_lock:
+            # Another request for this tenant may have loaded it while we waited
+            with self._lock:
+                bundle = self._cached(path, stat.st_mtime_ns)
+            if bundle is not None:
+                return bundle
+
+            import joblib
+
+            started = time.perf_counter()
+            bundle = joblib.load(path)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                previous = self._entries.pop(path, None)
+                if previous is not None:
+                    self.bytes_used -= previous.size
+                self._entries[path] = _Entry(stat.st_mtime_ns, bundle, stat.st_size, tenant)
+                self.bytes_used += stat.st_size
+                self._count(tenant, "loads")
+                self._count(tenant, "load_seconds", elapsed)
+                self._evict(keep=path)
+        return bundle
+
+    def _evict(self, keep: str):
+        """Drop least recently used bundles until within budget; ``keep`` stays even if it alone is over."""
+        for path in list(self._entries):
+            if self.bytes_used <= self.memory_budget:
+                break
+            if path == keep:
+                continue
+            entry = self._entries.pop(path)
+            self.bytes_used -= entry.size
+            self._count(entry.tenant, "evictions")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_budget": self.memory_budget,
+                "bytes_used": self.bytes_used,
+                "loaded": [
+                    {"tenant": entry.tenant, "bytes": entry.size}
+                    for entry in reversed(self._entries.values())
+                ],
+                "tenants": {
+                    tenant: {**counters, "load_seconds": round(counters["load_seconds"], 4)}
+                    for tenant, counters in self.counters.items()
+                },
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ModelCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ModelCache(get_config()["MEMORY_BUDGET"])
+    return _cache
+
+
+def reset_cache(**kwargs):
+    """Rebuild the cache from settings on next use."""
+    global _cache
+    if kwargs.get("setting", "MODEL_REGISTRY") == "MODEL_REGISTRY":
+        _cache = None
+
+
+setting_changed.connect(reset_cache)
@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 
 class StudentPerformance(models.Model):
@@ -9,5 +12,84 @@ class StudentPerformance(models.Model):
     sample_papers = models.IntegerField()
     performance_index = models.FloatField()
 
+    # Engineered features, stored so training can read them directly. Only save()
+    # recomputes them: QuerySet.update() and bulk_update() of the inputs leave them
+    # stale until `backfill_features --recompute` rewrites them
+    study_efficiency = models.FloatField(null=True, editable=False)
+    sleep_quality = models.FloatField(null=True, editable=False)
+    balance_score = models.FloatField(null=True, editable=False)
+    practice_intensity = models.FloatField(null=True, editable=False)
+    burnout_risk = models.FloatField(null=True, editable=False)
+    underprepared_risk = models.FloatField(null=True, editable=False)
+    cognitive_capacity = models.FloatField(null=True, editable=False)
+    total_preparation = models.FloatField(null=True, editable=False)
+    study_sleep_interaction = models.FloatField(null=True, editable=False)
+
+    # Latest bulk-scoring result (see the score management command)
+    predicted_performance_index = models.FloatField(null=True, editable=False)
+    predicted_classification = models.CharField(max_length=64, blank=True, editable=False)
+    predicted_risk_level = models.CharField(max_length=16, blank=True, editable=False)
+    scored_model_version = models.CharField(max_length=64, blank=True, editable=False)
+
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Admin changelist: default ordering, the extracurricular filter and integer search
+            models.Index(fields=["-performance_index", "-id"], name="perf_index_desc_idx"),
+            models.Index(fields=["extracurricular", "-performance_index", "-id"], name="extracurricular_perf_idx"),
+            models.Index(fields=["previous_scores"], name="previous_scores_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Performance: {self.performance_index}"
+
+    def fill_engineered_features(self):
+        # Imported here so loading the app (migrate, check, admin) doesn't import NumPy
+        from .inference import ENGINEERED_FEATURES, engineer_features_array
+
+        features = engineer_features_array(
+            self.hours_studied,
+            self.previous_scores,
+            self.extracurricular,
+            self.sleep_hours,
+            self.sample_papers,
+        )
+        for name in ENGINEERED_FEATURES:
+            setattr(self, name, float(features[name]))
+
+    def save(self, *args, **kwargs):
+        self.fill_engineered_features()
+        super().save(*args, **kwargs)
+
+
+class ScoringJob(models.Model):
+    """An uploaded CSV scored in the background by the run_jobs worker."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    tenant = models.CharField(max_length=63, blank=True)
+    input_file = models.FileField(upload_to="scoring_jobs/input/")
+    result_file = models.FileField(upload_to="scoring_jobs/results/", blank=True)
+    model_version = models.CharField(max_length=64, blank=True)
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Touched after every chunk; a running job whose heartbeat stops is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"Scoring job {self.id} ({self.status})"
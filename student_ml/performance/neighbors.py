@@ -0,0 +1,207 @@
+"""
+Similar-students lookup over the stored ``StudentPerformance`` records.
+
+The five inputs are small bounded integers, so many students share the
+same input tuple. The index keeps each distinct tuple once, scaled by its
+validation range, in a KD-tree. The students with that tuple sit in one
+contiguous slice of the id and outcome arrays. The k nearest students
+always fall within the k nearest tuples, so a query is one tree search
+for k points.
+
+The arrays are persisted next to the model (``INDEX_PATH``) by the
+``build_neighbors`` command. Rows added later are read by id watermark
+into a small delta buffer that is scanned with NumPy. Requests never
+rebuild the tree or write the file: ``build_neighbors --update`` (or one
+``--interval`` process) folds new rows into the persisted index, and
+every worker reloads the file once its mtime changes. Updated or deleted
+rows are picked up by the next full ``build_neighbors``.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from .drift import FEATURE_RANGES
+from .inference import RAW_FEATURES
+
+INDEX_PATH = "performance/model.neighbors.npz"
+
+REFRESH_INTERVAL = 5.0
+FETCH_CHUNK = 50000
+
+MAX_K = 50
+
+# Each input divided by its validation range, so every feature spans [0, 1]
+SCALE = np.array([1.0 / (FEATURE_RANGES[field][1] - FEATURE_RANGES[field][0]) for field in RAW_FEATURES])
+
+
+def fetch_rows(after_id: int = 0):
+    """``(ids, inputs, outcomes, last_id)`` for stored rows with id > ``after_id``, read in id order."""
+    from .models import StudentPerformance
+
+    ids, inputs, outcomes = [], [], []
+    last_id = after_id
+    while True:
+        rows = list(
+            StudentPerformance.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", *RAW_FEATURES, "performance_index")[:FETCH_CHUNK]
+        )
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=np.float64)
+        ids.append(chunk[:, 0].astype(np.int64))
+        inputs.append(chunk[:, 1:6].astype(np.int16))
+        outcomes.append(chunk[:, 6].astype(np.float32))
+        last_id = int(ids[-1][-1])
+    if not ids:
+        return np.empty(0, np.int64), np.empty((0, len(RAW_FEATURES)), np.int16), np.empty(0, np.float32), last_id
+    return np.concatenate(ids), np.concatenate(inputs), np.concatenate(outcomes), last_id
+
+
+class NeighborIndex:
+    """KD-tree over distinct input tuples plus a brute-force buffer of recently added rows."""
+
+    def __init__(self, tuples, offsets, ids, outcomes, watermark: int):
+        self.tuples = tuples
+        self.offsets = offsets
+        self.ids = ids
+        self.outcomes = outcomes
+        self.watermark = watermark
+        self.tree = KDTree(tuples * SCALE) if len(tuples) else None
+        # (ids, inputs, outcomes) of rows added since the tree was built, replaced as one
+        # tuple so concurrent queries never see arrays of different lengths
+        self.delta = (np.empty(0, np.int64), np.empty((0, len(RAW_FEATURES)), np.int16), np.empty(0, np.float32))
+        self.refreshed_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, ids, inputs, outcomes, watermark: int) -> "NeighborIndex":
+        tuples, inverse = np.unique(inputs, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        offsets = np.zeros(len(tuples) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(inverse.ravel(), minlength=len(tuples)), out=offsets[1:])
+        return cls(tuples.astype(np.int16), offsets, ids[order], outcomes[order], watermark)
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta[0])
+
+    def rows(self):
+        """Every indexed row as ``(ids, inputs, outcomes)``, including the delta buffer."""
+        delta_ids, delta_inputs, delta_outcomes = self.delta
+        return (
+            np.concatenate([self.ids, delta_ids]),
+            np.concatenate([np.repeat(self.tuples, np.diff(self.offsets), axis=0), delta_inputs]),
+            np.concatenate([self.outcomes, delta_outcomes]),
+        )
+
+    def merged(self) -> "NeighborIndex":
+        """A new index with the delta buffer folded into the tree."""
+        return NeighborIndex.from_rows(*self.rows(), self.watermark)
+
+    def add(self, ids, inputs, outcomes, watermark: int):
+        self.delta = tuple(np.concatenate([old, new]) for old, new in zip(self.delta, (ids, inputs, outcomes)))
+        self.watermark = watermark
+
+    def query(self, inputs, k: int):
+        """``(distances, ids, inputs, outcomes)`` of the ``k`` nearest stored students, closest first."""
+        point = np.asarray(inputs, dtype=np.float64) * SCALE
+        distances, ids, tuples, outcomes = [], [], [], []
+
+        if self.tree is not None:
+            tuple_distances, tuple_indices = self.tree.query(point[None, :], k=min(k, len(self.tuples)))
+            found = 0
+            for distance, index in zip(tuple_distances[0], tuple_indices[0]):
+                start = self.offsets[index]
+                stop = min(self.offsets[index + 1], start + k - found)
+                distances.append(np.full(stop - start, distance))
+                ids.append(self.ids[start:stop])
+                tuples.append(np.repeat(self.tuples[index][None, :], stop - start, axis=0))
+                outcomes.append(self.outcomes[start:stop])
+                found += stop - start
+                if found >= k:
+                    break
+
+        delta_ids, delta_inputs, delta_outcomes = self.delta
+        if len(delta_ids):
+            delta_distances = np.sqrt((((delta_inputs * SCALE) - point) ** 2).sum(axis=1))
+            nearest = np.argsort(delta_distances, kind="stable")[:k]
+            distances.append(delta_distances[nearest])
+            ids.append(delta_ids[nearest])
+            tuples.append(delta_inputs[nearest])
+            outcomes.append(delta_outcomes[nearest])
+
+        if not distances:
+            return np.empty(0), np.empty(0, np.int64), np.empty((0, len(RAW_FEATURES)), np.int16), np.empty(0)
+        distances = np.concatenate(distances)
+        order = np.argsort(distances, kind="stable")[:k]
+        return distances[order], np.concatenate(ids)[order], np.concatenate(tuples)[order], np.concatenate(outcomes)[order]
+
+    def save(self, path: str = INDEX_PATH):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez(fh, tuples=self.tuples, offsets=self.offsets, ids=self.ids, outcomes=self.outcomes,
+                     watermark=np.int64(self.watermark))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "NeighborIndex":
+        with np.load(path) as arrays:
+            return cls(arrays["tuples"], arrays["offsets"], arrays["ids"], arrays["outcomes"], int(arrays["watermark"]))
+
+
+def build(path: str = INDEX_PATH) -> NeighborIndex:
+    """Index every stored row from scratch and persist it."""
+    ids, inputs, outcomes, watermark = fetch_rows()
+    index = NeighborIndex.from_rows(ids, inputs, outcomes, watermark)
+    index.save(path)
+    return index
+
+
+def update(path: str = INDEX_PATH) -> NeighborIndex:
+    """Fold rows added since the persisted index was written into its tree and persist it."""
+    index = NeighborIndex.load(path)
+    ids, inputs, outcomes, watermark = fetch_rows(index.watermark)
+    if len(ids):
+        index.add(ids, inputs, outcomes, watermark)
+        index = index.merged()
+        index.save(path)
+    return index
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(path: str = INDEX_PATH) -> NeighborIndex:
+    """The persisted index with rows added since it was built, refreshed at most every ``REFRESH_INTERVAL``.
+
+    The file is reloaded only when its mtime changes; otherwise a refresh
+    just reads new rows into the delta buffer. While one thread refreshes,
+    others keep answering from the cached index. Raises FileNotFoundError
+    until the index has been built.
+    """
+    cached = _indexes.get(path)
+    if cached is not None and time.monotonic() - cached[1].refreshed_at < REFRESH_INTERVAL:
+        return cached[1]
+    if not _lock.acquire(blocking=cached is None):
+        return cached[1]
+    try:
+        cached = _indexes.get(path)
+        if cached is not None and time.monotonic() - cached[1].refreshed_at < REFRESH_INTERVAL:
+            return cached[1]
+        mtime = os.stat(path).st_mtime_ns
+        index = cached[1] if cached is not None and cached[0] == mtime else NeighborIndex.load(path)
+        ids, inputs, outcomes, watermark = fetch_rows(index.watermark)
+        if len(ids):
+            index.add(ids, inputs, outcomes, watermark)
+        index.refreshed_at = time.monotonic()
+        _indexes[path] = (mtime, index)
+    finally:
+        _lock.release()
+    return index
+
+
+def clear():
+    _indexes.clear()
@@ -0,0 +1,184 @@
+"""
+Percentile rank of a predicted score among stored outcomes.
+
+All ``StudentPerformance.performance_index`` values are kept in a sorted
+float32 array, so a lookup is two binary searches. The array is built by
+a background thread on first use and then extended by requests with rows
+whose id is past the last one seen, which is an index range scan on the
+primary key. Updated or deleted rows are picked up by a full rebuild,
+also in the background, every ``REBUILD_INTERVAL`` seconds. Until the
+first build finishes, or when the database can't be read, lookups answer
+None (or from the last array built) instead of failing the prediction.
+
+The index is per process, like the model cache.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "REFRESH_INTERVAL": 5.0,
+    "REBUILD_INTERVAL": 3600.0,
+}
+
+FETCH_CHUNK = 50000
+
+
+def get_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PREDICT_PERCENTILES", {})}
+
+
+class PercentileIndex:
+    """Sorted outcomes with an id watermark for incremental refreshes."""
+
+    def __init__(self, refresh_interval: float, rebuild_interval: float):
+        import numpy as np
+
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.values = np.empty(0, dtype=np.float32)
+        self.watermark = 0
+        self.refreshed_at = None
+        self.rebuilt_at = None
+        # Held while reading from the database, so concurrent requests don't merge the same rows twice
+        self._refresh_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._rebuilding = False
+        self._next_rebuild_attempt = 0.0
+
+    def _fetch(self, after_id: int):
+        """Sorted outcomes of rows with id > ``after_id``, and the largest id read."""
+        import numpy as np
+
+        from .models import StudentPerformance
+
+        chunks = []
+        last_id = after_id
+        while True:
+            rows = list(
+                StudentPerformance.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "performance_index")[:FETCH_CHUNK]
+            )
+            if not rows:
+                break
+            ids, values = zip(*rows)
+            chunks.append(np.array(values, dtype=np.float32))
+            last_id = ids[-1]
+        values = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32)
+        values.sort()
+        return values, last_id
+
+    def refresh(self, rebuild: bool = False):
+        """Merge rows added since the last refresh, or reread everything when the rebuild interval has passed."""
+        now = time.monotonic()
+        if rebuild or self.rebuilt_at is None or now - self.rebuilt_at >= self.rebuild_interval:
+            self.rebuild()
+        else:
+            with self._refresh_lock:
+                self._merge_new_rows()
+
+    def rebuild(self):
+        """Reread every stored outcome."""
+        values, watermark = self._fetch(0)
+        with self._refresh_lock:
+            # Rows merged while this ran are read again from the new watermark
+            self.values, self.watermark = values, watermark
+            self.rebuilt_at = self.refreshed_at = time.monotonic()
+
+    def _merge_new_rows(self):
+        import numpy as np
+
+        added, watermark = self._fetch(self.watermark)
+        if len(added):
+            # Both halves are sorted: insert the new values at their ranks.
+            # Readers keep using the old array until this assignment.
+            self.values = np.insert(self.values, np.searchsorted(self.values, added), added)
+            self.watermark = watermark
+        self.refreshed_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except DatabaseError as exc:
+            logger.warning("Percentile index rebuild failed: %s", exc)
+            self._next_rebuild_attempt = time.monotonic() + self.refresh_interval
+        finally:
+            self._rebuilding = False
+            # This thread's connections would otherwise stay open
+            connections.close_all()
+
+    def _start_rebuild(self):
+        if self._rebuilding or time.monotonic() < self._next_rebuild_attempt:
+            return
+        with self._rebuild_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, name="percentile-rebuild", daemon=True).start()
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() - self.refreshed_at >= self.refresh_interval
+
+    def _refresh_if_stale(self):
+        """Start a due build or rebuild in the background, and merge new rows once the refresh interval passes."""
+        if self.rebuilt_at is None or time.monotonic() - self.rebuilt_at >= self.rebuild_interval:
+            self._start_rebuild()
+        if self.rebuilt_at is None or not self._is_stale():
+            return
+        # Left to whichever request started a refresh
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if self._is_stale():
+                self._merge_new_rows()
+        except DatabaseError as exc:
+            # Keep answering from the current array and retry after the interval
+            logger.warning("Percentile index refresh failed: %s", exc)
+            self.refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def percentile(self, value: float):
+        """Percent of stored outcomes below ``value``, counting ties as half; None when empty or not built yet."""
+        import numpy as np
+
+        self._refresh_if_stale()
+        values = self.values
+        if not len(values):
+            return None
+        value = np.float32(value)
+        below = np.searchsorted(values, value, side="left")
+        not_above = np.searchsorted(values, value, side="right")
+        return round(float((below + not_above) / 2 / len(values) * 100), 1)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> PercentileIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                config = get_config()
+                _index = PercentileIndex(config["REFRESH_INTERVAL"], config["REBUILD_INTERVAL"])
+    return _index
+
+
+def reset_index(**kwargs):
+    """Rebuild the index from settings on next use."""
+    global _index
+    if kwargs.get("setting", "PREDICT_PERCENTILES") == "PREDICT_PERCENTILES":
+        _index = None
+
+
+setting_changed.connect(reset_index)
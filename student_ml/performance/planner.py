@@ -0,0 +1,113 @@
+"""
+Goal-seeking study plans: find the lowest-effort changes to study hours,
+sleep and sample papers that reach a target performance index.
+"""
+import numpy as np
+
+from .inference import apply_realistic_constraints_array, predict_array
+
+# Feasible domain for the adjustable inputs (same bounds as validate_input)
+MAX_HOURS = 24
+MAX_PAPERS = 20
+
+# Effort cost per unit of change: extra study is the most expensive,
+# extra practice papers cost half as much, and any change to sleep a quarter.
+EFFORT_WEIGHTS = {
+    "hours_studied": 1.0,
+    "sample_papers": 0.5,
+    "sleep_hours": 0.25,
+}
+
+CHUNK_SIZE = 512
+
+_GRID = None
+
+
+def _candidate_grid():
+    """All (hours, sleep, papers) combinations that fit in a 24h day, built once."""
+    global _GRID
+    if _GRID is None:
+        hours, sleep, papers = np.meshgrid(
+            np.arange(MAX_HOURS + 1),
+            np.arange(MAX_HOURS + 1),
+            np.arange(MAX_PAPERS + 1),
+            indexing="ij",
+        )
+        feasible = (hours + sleep) <= 24
+        _GRID = (hours[feasible], sleep[feasible], papers[feasible])
+    return _GRID
+
+
+def plan_effort(data: dict, hours, sleep, papers) -> np.ndarray:
+    """Effort of moving from the student's current habits to each candidate."""
+    return (
+        EFFORT_WEIGHTS["hours_studied"] * np.maximum(hours - data["hours_studied"], 0)
+        + EFFORT_WEIGHTS["sample_papers"] * np.maximum(papers - data["sample_papers"], 0)
+        + EFFORT_WEIGHTS["sleep_hours"] * np.abs(sleep - data["sleep_hours"])
+    )
+
+
+def _build_plan(data: dict, hours, sleep, papers, prediction, effort) -> dict:
+    plan = {
+        "hours_studied": int(hours),
+        "sleep_hours": int(sleep),
+        "sample_papers": int(papers),
+        "predicted_performance_index": round(float(prediction), 2),
+        "effort": round(float(effort), 2),
+        "changes": {},
+    }
+    for field, value in (("hours_studied", hours), ("sleep_hours", sleep), ("sample_papers", papers)):
+        delta = int(value) - data[field]
+        if delta:
+            plan["changes"][field] = delta
+    return plan
+
+
+def find_plans(bundle: dict, data: dict, target: float, max_plans: int = 3) -> dict:
+    """Search the feasible grid for the lowest-effort plans reaching ``target``.
+
+    Candidates whose best possible constrained score (the constraints applied
+    to an unbounded raw prediction) is below the target are pruned without a
+    model call. The rest are scored in chunks of increasing effort, stopping
+    as soon as no later candidate can beat the plans already found.
+    """
+    hours, sleep, papers = _candidate_grid()
+    size = len(hours)
+    previous = np.full(size, data["previous_scores"])
+    extra = np.full(size, 1 if data["extracurricular"] else 0)
+
+    upper_bound = apply_realistic_constraints_array(np.full(size, np.inf), hours, previous, sleep, papers)
+    reachable = upper_bound >= target
+
+    effort = plan_effort(data, hours, sleep, papers)
+    # Order by effort, then prefer less total workload for equal effort
+    order = np.lexsort((hours + papers, effort))
+    order = order[reachable[order]]
+
+    found_idx = []
+    found_pred = []
+    evaluated = 0
+    for start in range(0, len(order), CHUNK_SIZE):
+        chunk = order[start:start + CHUNK_SIZE]
+        if len(found_idx) >= max_plans and effort[chunk[0]] > effort[found_idx[max_plans - 1]]:
+            break
+        preds = predict_array(bundle, hours[chunk], previous[chunk], extra[chunk], sleep[chunk], papers[chunk])
+        evaluated += len(chunk)
+        hits = preds >= target
+        found_idx.extend(chunk[hits].tolist())
+        found_pred.extend(preds[hits].tolist())
+
+    found_idx = np.asarray(found_idx, dtype=np.intp)
+    found_pred = np.asarray(found_pred, dtype=np.float64)
+    best = np.lexsort((-found_pred, effort[found_idx]))[:max_plans]
+
+    return {
+        "target_performance_index": target,
+        "feasible": bool(len(found_idx)),
+        "plans": [
+            _build_plan(data, hours[i], sleep[i], papers[i], pred, effort[i])
+            for i, pred in zip(found_idx[best], found_pred[best])
+        ],
+        "candidates_considered": int(size),
+        "candidates_evaluated": evaluated,
+    }
@@ -0,0 +1,173 @@
+"""
+Sampling request profiler for the prediction endpoints.
+
+When enabled through ``settings.PREDICTION_PROFILER``, a fraction of
+requests to the configured paths is profiled, either with ``cProfile`` or
+with a wall-clock stack sampler. Results are aggregated in memory across
+requests and served by the admin-only ``profile_stats`` view.
+"""
+import cProfile
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.01,
+    "MODE": "cprofile",  # "cprofile" or "sampler"
+    "PATHS": ("/api/predict/",),
+    "SAMPLER_INTERVAL": 0.001,
+    "MAX_STACKS": 5000,
+}
+
+
+def get_config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "PREDICTION_PROFILER", {})}
+
+
+class ProfileAggregate:
+    """Profiles collected so far; memory is bounded by distinct functions/stacks."""
+
+    def __init__(self, max_stacks=DEFAULTS["MAX_STACKS"]):
+        self.lock = threading.Lock()
+        self.max_stacks = max_stacks
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.stats = None
+            self.stacks = Counter()
+
+    def add_profile(self, profile: cProfile.Profile):
+        with self.lock:
+            self.requests += 1
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+    def add_stacks(self, stacks: Counter):
+        with self.lock:
+            self.requests += 1
+            for stack, count in stacks.items():
+                if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                    stack = "[other]"
+                self.stacks[stack] += count
+
+    def top_functions(self, limit=30, sort="cumulative") -> list:
+        """Top-N function table from cProfile stats or sampled stacks."""
+        with self.lock:
+            if self.stats is not None:
+                rows = [
+                    {
+                        "function": f"{filename}:{line}({name})",
+                        "calls": calls,
+                        "total_time": round(total_time, 6),
+                        "cumulative_time": round(cumulative_time, 6),
+                    }
+                    for (filename, line, name), (_, calls, total_time, cumulative_time, _) in self.stats.stats.items()
+                ]
+                key = "cumulative_time" if sort == "cumulative" else "total_time"
+                return sorted(rows, key=lambda row: row[key], reverse=True)[:limit]
+
+            inclusive = Counter()
+            own = Counter()
+            for stack, count in self.stacks.items():
+                frames = stack.split(";")
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+            rows = [
+                {"function": frame, "samples": inclusive[frame], "own_samples": own[frame]}
+                for frame in inclusive
+            ]
+            key = "samples" if sort == "cumulative" else "own_samples"
+            return sorted(rows, key=lambda row: row[key], reverse=True)[:limit]
+
+    def collapsed(self) -> str:
+        """Collapsed stacks ("frame;frame;frame count") for flame graph tools."""
+        with self.lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+aggregate = ProfileAggregate()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self.done.set()
+        self.join()
+        return self.stacks
+
+
+class SamplingProfilerMiddleware:
+    """Profile a random fraction of requests to the prediction endpoints."""
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.mode = config["MODE"]
+        self.paths = tuple(config["PATHS"])
+        self.interval = config["SAMPLER_INTERVAL"]
+        aggregate.max_stacks = config["MAX_STACKS"]
+        # cProfile can only profile one request at a time per process
+        self.profiler_lock = threading.Lock()
+
+    def __call__(self, request):
+        if not request.path.startswith(self.paths) or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        if self.mode == "sampler":
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                return self.get_response(request)
+            finally:
+                aggregate.add_stacks(sampler.stop())
+
+        if not self.profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = cProfile.Profile(time.perf_counter)
+            profile.enable()
+            try:
+                return self.get_response(request)
+            finally:
+                profile.disable()
+                aggregate.add_profile(profile)
+        finally:
+            self.profiler_lock.release()
@@ -0,0 +1,533 @@
+"""
+Declarative rules for input validation and student classification.
+
+Every threshold, message and risk escalation lives in the tables below.
+The engine compiles them once into a scalar path for single requests
+(``validate_input`` / ``classify_student``) and a NumPy mask path for
+batches (``validate_batch`` / ``classify_batch``). NumPy is imported by
+the batch path only, so request handling can load this module cheaply.
+
+A condition is a tuple of ``(field, operator, value)`` clauses that must
+all hold. A rule group is a tuple of rules evaluated like an if/elif
+chain: the first matching rule in the group fires.
+"""
+import operator
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+RISK_LEVELS = ("Low", "Medium", "High", "Critical")
+
+# Risk escalation modes:
+#   "at_least" - raise the risk level to at least the given level
+#   "if_low"   - set the given level only while the risk is still "Low"
+
+# ============ VALIDATION ============
+
+# (field, type, minimum, maximum, error message, field-level warning rules)
+FIELD_SPECS = (
+    ("hours_studied", int, 0, 24, "Must be 0-24", (
+        {"when": (("hours_studied", ">", 16),), "warning": "16h+ study is unhealthy"},
+    )),
+    ("previous_scores", int, 0, 100, "Must be 0-100", ()),
+    ("extracurricular", bool, None, None, "Must be true or false", ()),
+    ("sleep_hours", int, 0, 24, "Must be 0-24", (
+        {"when": (("sleep_hours", "<", 3),), "warning": "<3h sleep is dangerous"},
+        {"when": (("sleep_hours", ">", 12),), "warning": ">12h sleep may indicate issues"},
+    )),
+    ("sample_papers", int, 0, 20, "Must be 0-20", ()),
+)
+
+# Cross-field warnings, only checked when every field is valid
+CROSS_FIELD_RULES = (
+    # Allow but warn about impossible time combinations
+    (
+        {"when": (("total_hours", ">", 24),), "warning": "Impossible: {total_hours}h total exceeds 24h/day"},
+    ),
+    # Minimum realistic time for other activities
+    (
+        {"when": (("total_hours", ">", 22), ("total_hours", "<=", 24)),
+         "warning": "Only {hours_left}h left for other activities"},
+    ),
+    # Zero sleep warning
+    (
+        {"when": (("sleep_hours", "==", 0),), "warning": "Zero sleep = cannot function"},
+        {"when": (("sleep_hours", "==", 1),), "warning": "1h sleep = severe impairment"},
+        {"when": (("sleep_hours", "==", 2),), "warning": "2h sleep = extreme fatigue"},
+    ),
+    # Excessive study warning
+    (
+        {"when": (("hours_studied", ">=", 20),), "warning": "20h+ study = physically impossible"},
+        {"when": (("hours_studied", ">=", 16),), "warning": "16h+ study = extreme burnout"},
+        {"when": (("hours_studied", ">=", 14),), "warning": "14h+ study = unsustainable"},
+    ),
+    # Burnout combinations
+    (
+        {"when": (("hours_studied", ">", 12), ("sleep_hours", "<", 4)),
+         "warning": "Burnout crisis: too much study, no rest"},
+        {"when": (("hours_studied", ">", 10), ("sleep_hours", "<", 5)), "warning": "Severe burnout risk"},
+        {"when": (("hours_studied", ">", 8), ("sleep_hours", "<", 6)), "warning": "Study-sleep imbalance"},
+    ),
+    # Excessive sleep
+    (
+        {"when": (("sleep_hours", ">=", 20),), "warning": "20h+ sleep = health emergency"},
+        {"when": (("sleep_hours", ">=", 16),), "warning": "16h+ sleep = possible illness"},
+        {"when": (("sleep_hours", ">", 12),), "warning": "Excessive sleep (>12h)"},
+    ),
+    # No preparation
+    (
+        {"when": (("hours_studied", "==", 0), ("sample_papers", "==", 0)), "warning": "No preparation = will fail"},
+        {"when": (("hours_studied", "==", 0),), "warning": "No study time"},
+        {"when": (("hours_studied", "<", 2), ("sample_papers", "<", 2)), "warning": "Severely underprepared"},
+    ),
+)
+
+# ============ CLASSIFICATION ============
+
+# Critical scenarios that end the analysis immediately, in priority order
+TERMINAL_RULES = (
+    # Zero sleep - medical emergency
+    {"when": (("sleep_hours", "==", 0),),
+     "warning": "Zero sleep = cannot function", "recommendation": "Get sleep immediately",
+     "risk": "Critical", "classification": "Medical Emergency", "description": "Cannot perform without sleep."},
+    # Zero study with zero practice - complete failure
+    {"when": (("hours_studied", "==", 0), ("sample_papers", "==", 0)),
+     "warning": "No preparation", "recommendation": "Start studying now",
+     "risk": "Critical", "classification": "Unprepared - Failing", "description": "Will fail without preparation."},
+    # Excessive sleep (>14 hours) - health crisis
+    {"when": (("sleep_hours", ">", 14),),
+     "warning": "Excessive sleep (>14h)", "recommendation": "Consult a doctor",
+     "risk": "Critical", "classification": "Health Crisis", "description": "May indicate health issues."},
+)
+
+# Warnings, recommendations and risk escalation, applied group by group
+ASSESSMENT_RULES = (
+    (
+        {"when": (("sleep_hours", "<", 3),), "warning": "Severe sleep deprivation",
+         "recommendation": "Get 7-8 hours sleep", "risk": ("at_least", "Critical")},
+        {"when": (("sleep_hours", "<", 4),), "warning": "Dangerous sleep levels",
+         "recommendation": "Increase sleep to 6-7h", "risk": ("at_least", "Critical")},
+        {"when": (("sleep_hours", "<", 5),), "warning": "Low sleep affects cognition",
+         "recommendation": "Increase sleep", "risk": ("at_least", "High")},
+    ),
+    (
+        {"when": (("hours_studied", ">", 12), ("sleep_hours", "<", 6)), "warning": "Burnout risk",
+         "recommendation": "Reduce study, rest more", "risk": ("at_least", "High")},
+    ),
+    (
+        {"when": (("sleep_hours", ">", 12),), "warning": "Oversleeping",
+         "recommendation": "Check health", "risk": ("if_low", "Medium")},
+    ),
+    (
+        {"when": (("hours_studied", "==", 0),), "warning": "No study time",
+         "recommendation": "Study 4-5h daily", "risk": ("at_least", "High")},
+        {"when": (("hours_studied", "<", 2),), "warning": "Insufficient study",
+         "recommendation": "Study 3-4h daily", "risk": ("if_low", "High")},
+    ),
+    (
+        {"when": (("sample_papers", "==", 0),), "recommendation": "Practice sample papers"},
+    ),
+)
+
+# Priority order: most severe first
+CLASSIFICATION_RULES = (
+    {"when": (("sleep_hours", "<", 3),),
+     "classification": "Sleep Deprived - Critical", "description": "Dangerously low sleep."},
+    {"when": (("hours_studied", ">", 10), ("sleep_hours", "<", 5)),
+     "classification": "Burnout - Critical", "description": "Overworking without rest."},
+    {"when": (("sleep_hours", "<", 5),),
+     "classification": "Sleep Deprived", "description": "Low sleep affects performance."},
+    {"when": (("hours_studied", "==", 0),),
+     "classification": "No Preparation", "description": "No study time recorded."},
+    {"when": (("hours_studied", "<", 2), ("sample_papers", "<", 2), ("previous_scores", "<", 50)),
+     "classification": "At Risk - Failing", "description": "Likely to fail."},
+    {"when": (("hours_studied", "<", 2), ("sample_papers", "<", 2)),
+     "classification": "At Risk", "description": "Needs more preparation."},
+    {"when": (("sleep_hours", ">", 12),),
+     "classification": "Oversleeping", "description": "May indicate health issues."},
+    {"when": (("hours_studied", ">=", 7), ("sample_papers", ">=", 5), ("sleep_hours", ">=", 6), ("sleep_hours", "<=", 9)),
+     "classification": "High Performer", "description": "Excellent balance."},
+    {"when": (("hours_studied", ">=", 4), ("hours_studied", "<=", 8), ("sleep_hours", ">=", 7), ("sleep_hours", "<=", 9),
+              ("extracurricular", "==", True)),
+     "classification": "Balanced Student", "description": "Good work-life balance."},
+    {"when": (("hours_studied", ">", 9), ("extracurricular", "==", False), ("sleep_hours", ">=", 6)),
+     "classification": "Dedicated Learner", "description": "Strong focus on academics."},
+    {"when": (("hours_studied", "<", 3), ("sleep_hours", ">=", 8)),
+     "classification": "Underprepared", "description": "Needs more study time."},
+    {"when": (("hours_studied", ">=", 4), ("sample_papers", ">=", 3), ("sleep_hours", ">=", 6)),
+     "classification": "Adequate Preparation", "description": "Room for improvement."},
+)
+
+DEFAULT_CLASSIFICATION = ("Average Student", "Standard preparation.")
+
+# Performance gap analysis
+GAP_RULES = (
+    {"when": (("performance_gap", ">", 10),), "recommendation": "Keep it up!"},
+    {"when": (("performance_gap", "<", -10),), "recommendation": "Review study methods", "risk": ("if_low", "High")},
+    {"when": (("performance_gap", "<", -5),), "recommendation": "Performance declining", "risk": ("if_low", "Medium")},
+)
+
+
+# ============ ENGINE ============
+
+def _compile(when):
+    """Turn a condition's clauses into (field, operator function, value) triples."""
+    return tuple((field, OPERATORS[op], value) for field, op, value in when)
+
+
+def _compile_rule(rule):
+    compiled = dict(rule)
+    compiled["when"] = _compile(rule["when"])
+    if "risk" in rule and isinstance(rule["risk"], tuple):
+        mode, level = rule["risk"]
+        compiled["risk"] = (mode, RISK_LEVELS.index(level))
+    return compiled
+
+
+def _compile_groups(groups):
+    return tuple(tuple(_compile_rule(rule) for rule in group) for group in groups)
+
+
+_FIELD_SPECS = tuple(
+    (field, kind, low, high, message, tuple(_compile_rule(rule) for rule in warnings))
+    for field, kind, low, high, message, warnings in FIELD_SPECS
+)
+_CROSS_FIELD = _compile_groups(CROSS_FIELD_RULES)
+_TERMINAL = tuple(_compile_rule(rule) for rule in TERMINAL_RULES)
+_ASSESSMENT = _compile_groups(ASSESSMENT_RULES)
+_CLASSIFICATION = tuple(_compile_rule(rule) for rule in CLASSIFICATION_RULES)
+_GAP = tuple(_compile_rule(rule) for rule in GAP_RULES)
+
+
+def _mask(clauses, arrays):
+    mask = None
+    for field, op, value in clauses:
+        clause = op(arrays[field], value)
+        mask = clause if mask is None else mask & clause
+    return mask
+
+
+def _first_match_masks(rules, arrays, active):
+    """Masks of the rows each rule fires on, with earlier rules taking precedence."""
+    remaining = active.copy()
+    masks = []
+    for rule in rules:
+        mask = remaining & _mask(rule["when"], arrays)
+        remaining &= ~mask
+        masks.append(mask)
+    return masks
+
+
+def _expression(when, name=str) -> str:
+    """Python source for a condition, with ``name`` mapping fields to expressions."""
+    return " and ".join(f"{name(field)} {op} {value!r}" for field, op, value in when)
+
+
+def _message(template: str) -> str:
+    """Python source for a message, as an f-string when it has placeholders."""
+    return f"f{template!r}" if "{" in template else repr(template)
+
+
+def _risk_source(risk, indent: str) -> list:
+    mode, level = risk
+    level = RISK_LEVELS.index(level)
+    if mode == "at_least":
+        return [f"{indent}if risk < {level}:", f"{indent}    risk = {level}"]
+    return [f"{indent}if risk == 0:", f"{indent}    risk = {level}"]
+
+
+def _chain_source(group, indent: str, body) -> list:
+    """An if/elif chain over a rule group, with ``body`` giving each branch's lines."""
+    lines = []
+    for position, rule in enumerate(group):
+        keyword = "if" if position == 0 else "elif"
+        lines.append(f"{indent}{keyword} {_expression(rule['when'])}:")
+        lines.extend(body(rule, indent + "    "))
+    return lines
+
+
+def _validate_source() -> str:
+    lines = [
+        "def validate_input(data):",
+        "    errors = {}",
+        "    warnings = []",
+    ]
+    for field, kind, low, high, message, field_warnings in FIELD_SPECS:
+        value = f"data[{field!r}]"
+        invalid = f"not isinstance({value}, {kind.__name__})"
+        if low is not None:
+            invalid += f" or not ({low!r} <= {value} <= {high!r})"
+        lines += [
+            f"    if {field!r} not in data:",
+            f"        errors[{field!r}] = 'Required'",
+            f"    elif {invalid}:",
+            f"        errors[{field!r}] = {message!r}",
+        ]
+        for rule in field_warnings:
+            lines += [
+                f"    elif {_expression(rule['when'], lambda name: f'data[{name!r}]')}:",
+                f"        warnings.append({_message(rule['warning'])})",
+            ]
+    lines.append("    if not errors:")
+    lines += [f"        {field} = data[{field!r}]" for field, *_ in FIELD_SPECS]
+    lines += [
+        "        total_hours = hours_studied + sleep_hours",
+        "        hours_left = 24 - total_hours",
+    ]
+    for group in CROSS_FIELD_RULES:
+        lines += _chain_source(group, "        ", lambda rule, indent: [
+            f"{indent}warnings.append({_message(rule['warning'])})",
+        ])
+    lines.append("    return {'errors': errors, 'warnings': warnings}")
+    return "\n".join(lines)
+
+
+def _classify_source() -> str:
+    lines = [
+        "def classify_student(data, predicted_score):",
+        "    hours_studied = data.get('hours_studied', 0)",
+        "    sleep_hours = data.get('sleep_hours', 0)",
+        "    previous_scores = data.get('previous_scores', 0)",
+        "    sample_papers = data.get('sample_papers', 0)",
+        "    extracurricular = data.get('extracurricular', False)",
+        "    performance_gap = predicted_score - previous_scores",
+    ]
+    for rule in TERMINAL_RULES:
+        lines += [
+            f"    if {_expression(rule['when'])}:",
+            f"        return {{'classification': {rule['classification']!r}, "
+            f"'description': {rule['description']!r}, 'risk_level': {rule['risk']!r}, "
+            f"'warnings': [{_message(rule['warning'])}], "
+            f"'recommendations': [{_message(rule['recommendation'])}], "
+            f"'performance_gap': round(performance_gap, 2)}}",
+        ]
+
+    def assessment(rule, indent):
+        body = []
+        if "warning" in rule:
+            body.append(f"{indent}warnings.append({_message(rule['warning'])})")
+        if "recommendation" in rule:
+            body.append(f"{indent}recommendations.append({_message(rule['recommendation'])})")
+        if "risk" in rule:
+            body += _risk_source(rule["risk"], indent)
+        return body
+
+    lines += [
+        "    warnings = []",
+        "    recommendations = []",
+        "    risk = 0",
+    ]
+    for group in ASSESSMENT_RULES:
+        lines += _chain_source(group, "    ", assessment)
+    lines += _chain_source(CLASSIFICATION_RULES, "    ", lambda rule, indent: [
+        f"{indent}classification = {rule['classification']!r}",
+        f"{indent}description = {rule['description']!r}",
+    ])
+    lines += [
+        "    else:",
+        f"        classification = {DEFAULT_CLASSIFICATION[0]!r}",
+        f"        description = {DEFAULT_CLASSIFICATION[1]!r}",
+    ]
+    lines += _chain_source(GAP_RULES, "    ", assessment)
+    lines.append(
+        "    return {'classification': classification, 'description': description, "
+        "'risk_level': RISK_LEVELS[risk], 'warnings': warnings, "
+        "'recommendations': recommendations, 'performance_gap': round(performance_gap, 2)}"
+    )
+    return "\n".join(lines)
+
+
+# The scalar path is generated Python source, so a single request runs a
+# plain if/elif chain with the thresholds inlined.
+SCALAR_SOURCE = _validate_source() + "\n\n\n" + _classify_source() + "\n"
+_namespace = {"RISK_LEVELS": RISK_LEVELS}
+exec(compile(SCALAR_SOURCE, "<performance.rules>", "exec"), _namespace)
+
+validate_input = _namespace["validate_input"]
+validate_input.__doc__ = "Enhanced validation with realistic constraint checking."
+classify_student = _namespace["classify_student"]
+classify_student.__doc__ = "Advanced student classification with detailed insights and high-level logic."
+
+
+class RuleBatch:
+    """Vectorized rule results; messages are materialized per row on demand."""
+
+    def __init__(self, size, warnings, recommendations, values):
+        self.size = size
+        self._warnings = warnings
+        self._recommendations = recommendations
+        self._values = values
+
+    def _messages(self, emitters, index):
+        messages = []
+        for message, mask in emitters:
+            if mask[index]:
+                if "{" in message:
+                    message = message.format(**{key: array[index].item() for key, array in self._values.items()})
+                messages.append(message)
+        return messages
+
+    def warnings(self, index: int) -> list:
+        return self._messages(self._warnings, index)
+
+    def recommendations(self, index: int) -> list:
+        return self._messages(self._recommendations, index)
+
+
+class ValidationBatch(RuleBatch):
+    """Result of validate_batch: per-field error masks plus warnings."""
+
+    def __init__(self, size, warnings, values, errors, valid):
+        super().__init__(size, warnings, [], values)
+        self.errors = errors
+        self.valid = valid
+
+    def row(self, index: int) -> dict:
+        """The validate_input result for one row."""
+        return {
+            "errors": {
+                field: message
+                for field, kind, low, high, message, _ in _FIELD_SPECS
+                if field in self.errors and self.errors[field][index]
+            },
+            "warnings": self.warnings(index),
+        }
+
+
+class ClassificationBatch(RuleBatch):
+    """Result of classify_batch: per-row classification arrays plus messages."""
+
+    def __init__(self, size, warnings, recommendations, classification, description, risk_level, performance_gap):
+        super().__init__(size, warnings, recommendations, {})
+        self.classification = classification
+        self.description = description
+        self.risk_level = risk_level
+        self.performance_gap = performance_gap
+
+    def row(self, index: int) -> dict:
+        """The classify_student result for one row."""
+        return {
+            "classification": self.classification[index],
+            "description": self.description[index],
+            "risk_level": self.risk_level[index],
+            "warnings": self.warnings(index),
+            "recommendations": self.recommendations(index),
+            "performance_gap": round(float(self.performance_gap[index]), 2),
+        }
+
+
+def _batch_arrays(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers):
+    import numpy as np
+
+    hours = np.asarray(hours_studied)
+    return {
+        "hours_studied": hours,
+        "previous_scores": np.broadcast_to(np.asarray(previous_scores), hours.shape),
+        "extracurricular": np.broadcast_to(np.asarray(extracurricular, dtype=bool), hours.shape),
+        "sleep_hours": np.broadcast_to(np.asarray(sleep_hours), hours.shape),
+        "sample_papers": np.broadcast_to(np.asarray(sample_papers), hours.shape),
+    }
+
+
+def validate_batch(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> ValidationBatch:
+    """Vectorized validate_input for arrays of integers (and booleans for extracurricular).
+
+    The returned batch has an ``errors`` dict of per-field masks for values
+    outside their allowed range and a ``valid`` mask of rows with no errors.
+    """
+    import numpy as np
+
+    arrays = _batch_arrays(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)
+    size = arrays["hours_studied"].shape[0]
+
+    errors = {}
+    emitters = []
+    valid = np.ones(size, dtype=bool)
+    for field, kind, low, high, message, field_warnings in _FIELD_SPECS:
+        field_valid = np.ones(size, dtype=bool)
+        if low is not None:
+            field_valid = (arrays[field] >= low) & (arrays[field] <= high)
+            errors[field] = ~field_valid
+        valid &= field_valid
+        for rule, mask in zip(field_warnings, _first_match_masks(field_warnings, arrays, field_valid)):
+            emitters.append((rule["warning"], mask))
+
+    total_hours = arrays["hours_studied"].astype(np.int64) + arrays["sleep_hours"]
+    arrays["total_hours"] = total_hours
+    arrays["hours_left"] = 24 - total_hours
+    for group in _CROSS_FIELD:
+        for rule, mask in zip(group, _first_match_masks(group, arrays, valid)):
+            emitters.append((rule["warning"], mask))
+
+    values = {"total_hours": total_hours, "hours_left": arrays["hours_left"]}
+    return ValidationBatch(size, emitters, values, errors, valid)
+
+
+def classify_batch(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers,
+                   predicted_scores) -> ClassificationBatch:
+    """Vectorized classify_student over arrays of inputs and predicted scores.
+
+    The returned batch exposes ``classification``, ``description``,
+    ``risk_level`` and unrounded ``performance_gap`` arrays; ``row(i)``
+    builds the same dict classify_student returns.
+    """
+    import numpy as np
+
+    arrays = _batch_arrays(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)
+    size = arrays["hours_studied"].shape[0]
+    performance_gap = np.asarray(predicted_scores, dtype=np.float64) - arrays["previous_scores"]
+    arrays["performance_gap"] = performance_gap
+
+    warnings = []
+    recommendations = []
+    classification = np.full(size, DEFAULT_CLASSIFICATION[0], dtype=object)
+    description = np.full(size, DEFAULT_CLASSIFICATION[1], dtype=object)
+    risk = np.zeros(size, dtype=np.int8)
+
+    everyone = np.ones(size, dtype=bool)
+    terminal_masks = _first_match_masks(_TERMINAL, arrays, everyone)
+    active = everyone.copy()
+    for rule, mask in zip(_TERMINAL, terminal_masks):
+        active &= ~mask
+
+    for group in _ASSESSMENT:
+        for rule, mask in zip(group, _first_match_masks(group, arrays, active)):
+            if "warning" in rule:
+                warnings.append((rule["warning"], mask))
+            recommendations.append((rule["recommendation"], mask))
+            if "risk" in rule:
+                risk = _escalate_batch(risk, rule, mask)
+
+    for rule, mask in zip(_CLASSIFICATION, _first_match_masks(_CLASSIFICATION, arrays, active)):
+        classification[mask] = rule["classification"]
+        description[mask] = rule["description"]
+
+    for rule, mask in zip(_GAP, _first_match_masks(_GAP, arrays, active)):
+        recommendations.append((rule["recommendation"], mask))
+        if "risk" in rule:
+            risk = _escalate_batch(risk, rule, mask)
+
+    for rule, mask in zip(_TERMINAL, terminal_masks):
+        warnings.append((rule["warning"], mask))
+        recommendations.append((rule["recommendation"], mask))
+        classification[mask] = rule["classification"]
+        description[mask] = rule["description"]
+        risk[mask] = RISK_LEVELS.index(rule["risk"])
+
+    risk_level = np.asarray(RISK_LEVELS, dtype=object)[risk]
+    return ClassificationBatch(size, warnings, recommendations, classification, description, risk_level, performance_gap)
+
+
+def _escalate_batch(risk, rule, mask):
+    import numpy as np
+
+    mode, level = rule["risk"]
+    if mode == "at_least":
+        return np.where(mask, np.maximum(risk, level), risk).astype(np.int8)
+    return np.where(mask & (risk == 0), level, risk).astype(np.int8)
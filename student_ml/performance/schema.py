@@ -0,0 +1,83 @@
+"""
+Compact column types for the student dataset.
+
+Every input is a small bounded integer or a Yes/No flag, so rows are held
+as uint8/bool with a float32 target: 9 bytes a row instead of the 48 that
+pandas infers. Engineered features are float32. The generator, the CSV
+reader, the columnar cache, data loading and training all go through
+these types. ``dataset.csv`` keeps its plain text format (``Yes``/``No``
+flags, one-decimal scores).
+"""
+import numpy as np
+import pandas as pd
+
+DATASET_DTYPES = {
+    "Hours Studied": np.uint8,
+    "Previous Scores": np.uint8,
+    "Extracurricular Activities": np.bool_,
+    "Sleep Hours": np.uint8,
+    "Sample Question Papers Practiced": np.uint8,
+    "Performance Index": np.float32,
+}
+
+TARGET_COLUMN = "Performance Index"
+YES_NO_COLUMNS = ("Extracurricular Activities",)
+
+# Engineered features are computed in float64 and stored, scaled and scored in this type
+FEATURE_DTYPE = np.float32
+
+# Bump whenever DATASET_DTYPES changes, so cached columns are parsed again
+SCHEMA_VERSION = 2
+
+# Rows parsed at a time, so the default int64 columns never exist for the whole file
+READ_CHUNK = 1_000_000
+
+
+def empty_frame(n_rows: int) -> pd.DataFrame:
+    """Preallocated dataset frame of ``n_rows`` zeroed rows."""
+    return pd.DataFrame({column: np.zeros(n_rows, dtype=dtype) for column, dtype in DATASET_DTYPES.items()})
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with its dataset columns converted to ``DATASET_DTYPES``.
+
+    Raises ValueError for values the compact type can't hold (fractions or
+    out-of-range numbers in an integer column) instead of wrapping them.
+    """
+    converted = {}
+    for column, dtype in DATASET_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        values = df[column]
+        if column in YES_NO_COLUMNS:
+            converted[column] = values.astype(bool) if pd.api.types.is_numeric_dtype(values) else values == "Yes"
+        elif np.issubdtype(dtype, np.integer):
+            if not pd.api.types.is_integer_dtype(values):
+                raise ValueError(f"{column} must hold whole numbers")
+            limits = np.iinfo(dtype)
+            if len(values) and (values.min() < limits.min or values.max() > limits.max):
+                raise ValueError(f"{column} must be between {limits.min} and {limits.max}")
+            converted[column] = values.astype(dtype)
+        else:
+            converted[column] = values.astype(dtype)
+    return df.assign(**converted) if converted else df
+
+
+def read_csv(path: str, usecols=None) -> pd.DataFrame:
+    """Parse a dataset CSV into compact columns, ``READ_CHUNK`` rows at a time."""
+    chunks = [
+        to_compact(chunk)
+        for chunk in pd.read_csv(path, usecols=usecols, true_values=["Yes"], false_values=["No"], chunksize=READ_CHUNK)
+    ]
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def write_csv(df: pd.DataFrame, path: str):
+    """Write a compact frame in the usual CSV format, flags as ``Yes``/``No``."""
+    flags = {column: np.where(df[column], "Yes", "No") for column in YES_NO_COLUMNS if column in df.columns}
+    df.assign(**flags).to_csv(path, index=False)
+
+
+def widen(values) -> np.ndarray:
+    """Float64 copy of float32 values as they read in the CSV (72.3, not 72.30000305)."""
+    return np.asarray(values).astype(str).astype(np.float64)
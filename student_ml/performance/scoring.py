@@ -0,0 +1,309 @@
+"""
+Offline bulk scoring of stored students and large CSV files.
+
+Rows are read in chunks and scored with the vectorized feature, model,
+constraint and classification code across a process pool. Progress is
+recorded as it goes, so an interrupted run picks up where it stopped.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .inference import RAW_COLUMNS, RAW_FEATURES, predict_array
+from .rules import FIELD_SPECS, classify_batch, validate_batch
+
+CHUNK_SIZE = 20000
+
+# Columns added to scored CSV output
+OUTPUT_COLUMNS = (
+    "predicted_performance_index",
+    "student_classification",
+    "risk_level",
+    "performance_gap",
+    "errors",
+)
+
+_YES = ("yes", "true", "1", "1.0")
+_NO = ("no", "false", "0", "0.0")
+
+_worker_bundle = None
+
+
+def validate_arrays(hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> tuple:
+    """``(valid, errors)`` for arrays of raw inputs, applying the same rules as validate_input.
+
+    Missing values are NaN and unparsable ones inf. ``valid`` masks the rows that can be scored and
+    ``errors`` holds each row's problems as ``field: message`` text, or ""
+    for valid rows.
+    """
+    arrays = dict(zip(RAW_FEATURES, (hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)))
+    batch = validate_batch(*(
+        np.nan_to_num(np.asarray(arrays[field], dtype=np.float64), nan=-1, posinf=-1) for field in RAW_FEATURES
+    ))
+
+    size = batch.size
+    invalid = {}
+    for field, kind, low, high, message, _ in FIELD_SPECS:
+        values = np.asarray(arrays[field], dtype=np.float64)
+        missing = np.isnan(values)
+        if kind is bool:
+            wrong = ~missing & (values != 0) & (values != 1)
+        else:
+            wrong = ~missing & (batch.errors[field] | (values != np.trunc(values)))
+        invalid[field] = (missing, "Required"), (wrong, message)
+
+    valid = np.ones(size, dtype=bool)
+    for masks in invalid.values():
+        for mask, _ in masks:
+            valid &= ~mask
+
+    errors = np.full(size, "", dtype=object)
+    for row in np.flatnonzero(~valid):
+        errors[row] = "; ".join(
+            f"{field}: {message}" for field, masks in invalid.items() for mask, message in masks if mask[row]
+        )
+    return valid, errors
+
+
+def score_arrays(bundle: dict, hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> dict:
+    """Predictions and classifications for arrays of raw inputs.
+
+    Rows that fail validation are not scored: their ``errors`` entry says
+    why, their prediction and gap are NaN and their labels are empty.
+    """
+    inputs = (hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers)
+    valid, errors = validate_arrays(*inputs)
+    size = valid.shape[0]
+    results = {
+        "predicted_performance_index": np.full(size, np.nan),
+        "student_classification": np.full(size, "", dtype=object),
+        "risk_level": np.full(size, "", dtype=object),
+        "performance_gap": np.full(size, np.nan),
+        "errors": errors,
+    }
+    if not valid.any():
+        return results
+
+    arrays = [
+        np.asarray(values)[valid].astype(bool if field == "extracurricular" else np.int64)
+        for field, values in zip(RAW_FEATURES, inputs)
+    ]
+    predictions = predict_array(bundle, *arrays)
+    analysis = classify_batch(*arrays, predictions)
+    results["predicted_performance_index"][valid] = np.round(predictions, 2)
+    results["student_classification"][valid] = analysis.classification
+    results["risk_level"][valid] = analysis.risk_level
+    results["performance_gap"][valid] = np.round(analysis.performance_gap, 2)
+    return results
+
+
+def _column_values(field: str, values: pd.Series) -> np.ndarray:
+    """Floats for a raw input column: NaN for blank cells, inf for unparsable ones."""
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    if pd.api.types.is_numeric_dtype(values):
+        # Parsed by read_csv already; blank cells are NaN
+        parsed = values.to_numpy(dtype=np.float64, copy=True)
+        if field == "extracurricular":
+            parsed[~np.isnan(parsed) & (parsed != 0) & (parsed != 1)] = np.inf
+        return parsed
+    text = values.astype(str).str.strip()
+    blank = values.isna().to_numpy() | (text == "").to_numpy()
+    if field == "extracurricular":
+        text = text.str.lower()
+        parsed = np.where(text.isin(_YES), 1.0, np.where(text.isin(_NO), 0.0, np.inf))
+    else:
+        parsed = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, copy=True)
+        parsed[np.isnan(parsed)] = np.inf
+    parsed[blank] = np.nan
+    return parsed
+
+
+def raw_arrays(frame: pd.DataFrame) -> tuple:
+    """The five raw inputs from a frame using either API or dataset column names.
+
+    Values come back as floats, with NaN for blank cells and inf for
+    unparsable ones, so that score_arrays reports them instead of failing
+    the chunk.
+    """
+    return tuple(
+        _column_values(field, frame[field if field in frame.columns else RAW_COLUMNS[field]])
+        for field in RAW_FEATURES
+    )
+
+
+def _init_worker(model_path: str):
+    global _worker_bundle
+    if _worker_bundle is None:
+        _worker_bundle = joblib.load(model_path)
+
+
+def _score_chunk(arrays: tuple) -> dict:
+    return score_arrays(_worker_bundle, *arrays)
+
+
+class ChunkScorer:
+    """Scores chunks in order, in-process or across a pool of worker processes."""
+
+    def __init__(self, model_path: str, workers: int = 1):
+        global _worker_bundle
+        # Loaded before the pool starts so forked workers inherit it
+        _worker_bundle = joblib.load(model_path)
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,))
+        self.window = max(workers, 1) * 2
+
+    def map(self, chunks):
+        """Yield ``(context, arrays, results)`` in input order for ``(context, arrays)`` pairs."""
+        if self.pool is None:
+            for context, arrays in chunks:
+                yield context, arrays, _score_chunk(arrays)
+            return
+
+        pending = []
+        for context, arrays in chunks:
+            pending.append((context, arrays, self.pool.submit(_score_chunk, arrays)))
+            if len(pending) >= self.window:
+                context, arrays, future = pending.pop(0)
+                yield context, arrays, future.result()
+        for context, arrays, future in pending:
+            yield context, arrays, future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+class Progress:
+    """Rows/sec reporting for a scoring run."""
+
+    def __init__(self, report=print):
+        self.report = report
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows: int):
+        self.rows += rows
+        self.report(f"Scored {self.rows} rows ({self.rate:.0f} rows/sec)")
+
+    @property
+    def rate(self) -> float:
+        return self.rows / max(time.perf_counter() - self.started, 1e-9)
+
+
+def score_table(model_path: str, version: str, workers=1, chunk_size=CHUNK_SIZE, report=print) -> Progress:
+    """Score every StudentPerformance row not yet scored by model ``version``.
+
+    Each chunk is written back with bulk_update as soon as it is scored, so
+    a restarted run only sees the rows that are still pending.
+    """
+    from .models import StudentPerformance
+
+    pending = StudentPerformance.objects.exclude(scored_model_version=version).order_by("id")
+    progress = Progress(report)
+
+    def chunks():
+        last_id = 0
+        while True:
+            rows = list(pending.filter(id__gt=last_id).values_list("id", *RAW_FEATURES)[:chunk_size])
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            last_id = columns[0][-1]
+            yield np.asarray(columns[0]), tuple(np.asarray(column) for column in columns[1:])
+
+    scorer = ChunkScorer(model_path, workers)
+    try:
+        for ids, arrays, results in scorer.map(chunks()):
+            StudentPerformance.objects.bulk_update(
+                [
+                    StudentPerformance(
+                        id=int(row_id),
+                        # Rows that fail validation are marked scored with no prediction
+                        predicted_performance_index=(
+                            None if results["errors"][i] else float(results["predicted_performance_index"][i])
+                        ),
+                        predicted_classification=results["student_classification"][i],
+                        predicted_risk_level=results["risk_level"][i],
+                        scored_model_version=version,
+                    )
+                    for i, row_id in enumerate(ids)
+                ],
+                [
+                    "predicted_performance_index",
+                    "predicted_classification",
+                    "predicted_risk_level",
+                    "scored_model_version",
+                ],
+                batch_size=500,
+            )
+            progress.add(len(ids))
+    finally:
+        scorer.close()
+    return progress
+
+
+def _read_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp_path, path)
+
+
+def score_csv(model_path: str, version: str, input_path: str, output_path: str,
+              workers=1, chunk_size=CHUNK_SIZE, report=print, on_chunk=None) -> Progress:
+    """Score a CSV into ``output_path``, resuming from its checkpoint file if present.
+
+    The checkpoint (``<output>.progress``) records how many input rows and
+    output bytes are complete. On resume, the output is truncated to that
+    size and those input rows are skipped. ``on_chunk`` is called with the
+    number of completed input rows after each chunk is durably written.
+    """
+    checkpoint_path = f"{output_path}.progress"
+    checkpoint = _read_checkpoint(checkpoint_path)
+    if checkpoint.get("input") != os.path.abspath(input_path) or checkpoint.get("model_version") != version:
+        checkpoint = {"input": os.path.abspath(input_path), "model_version": version, "rows": 0, "bytes": 0}
+
+    done_rows = checkpoint["rows"]
+    if done_rows:
+        report(f"Resuming after {done_rows} rows")
+    progress = Progress(report)
+
+    reader = pd.read_csv(input_path, chunksize=chunk_size, skiprows=range(1, done_rows + 1))
+    scorer = ChunkScorer(model_path, workers)
+    try:
+        with open(output_path, "r+b" if done_rows else "wb") as output:
+            output.truncate(checkpoint["bytes"])
+            output.seek(checkpoint["bytes"])
+            chunks = ((frame, raw_arrays(frame)) for frame in reader)
+            for frame, arrays, results in scorer.map(chunks):
+                for column in OUTPUT_COLUMNS:
+                    frame[column] = results[column]
+                frame.to_csv(output, header=not checkpoint["rows"], index=False)
+                output.flush()
+                os.fsync(output.fileno())
+                checkpoint["rows"] += len(frame)
+                checkpoint["bytes"] = output.tell()
+                _write_checkpoint(checkpoint_path, checkpoint)
+                progress.add(len(frame))
+                if on_chunk is not None:
+                    on_chunk(checkpoint["rows"])
+    finally:
+        scorer.close()
+
+    os.remove(checkpoint_path)
+    return progress
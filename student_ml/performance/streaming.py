@@ -0,0 +1,150 @@
+"""
+NDJSON streaming predictions.
+
+Records are read from the request body one line at a time as they arrive,
+validated, and scored ``CHUNK_SIZE`` at a time with the vectorized
+pipeline used by bulk scoring. Each chunk's results are written back as
+NDJSON lines as soon as it is scored. Memory is bounded by one chunk,
+and the first results reach the client while the rest of the upload is
+still being sent.
+
+A stream holds an admission slot until it ends, so it is ended with an
+``error`` line after ``MAX_RECORDS`` records, or when a read from the
+client fails or times out. The read timeout itself belongs to the server
+(``serve --read-timeout``); without one, a client that stops sending
+keeps its slot until the connection drops.
+"""
+from . import codec
+from .rules import validate_input
+
+CHUNK_SIZE = 256
+
+# Longest accepted record; longer lines are reported and skipped
+MAX_LINE_BYTES = 4096
+
+# Records accepted per stream; longer feeds must be split
+MAX_RECORDS = 1_000_000
+
+
+def read_lines(stream, max_line_bytes: int = MAX_LINE_BYTES):
+    """Yield ``(line_number, line)`` for each line of ``stream``; ``line`` is None when it is too long."""
+    number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # Discard the rest of the line without holding it
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes + 1)
+            yield number, None
+        else:
+            yield number, line
+
+
+def _encode(results) -> bytes:
+    return b"".join(codec.dumps_json(result) + b"\n" for result in results)
+
+
+def _score_chunk(bundle: dict, pending: list) -> list:
+    """Results for ``(result, data)`` pairs in input order, scoring every valid record in one batch."""
+    import numpy as np
+
+    from .scoring import score_arrays
+
+    valid = [(result, data) for result, data in pending if data is not None]
+    if valid:
+        columns = [np.array([data[field] for _, data in valid]) for field in codec.REQUEST_FIELDS]
+        scored = {
+            name: values.tolist() for name, values in score_arrays(bundle, *columns).items() if name != "errors"
+        }
+        for position, (result, _) in enumerate(valid):
+            warnings = result.pop("input_warnings")
+            result.update({name: values[position] for name, values in scored.items()})
+            if warnings:
+                result["input_warnings"] = warnings
+    return [result for result, _ in pending]
+
+
+def _flush(bundle: dict, pending: list):
+    """``(body, ok)`` for a chunk; a failed chunk becomes a final ``error`` line."""
+    try:
+        return _encode(_score_chunk(bundle, pending)), True
+    except Exception as exc:
+        return _encode([{"error": f"Prediction failed: {exc}"}]), False
+
+
+def _end(bundle: dict, pending: list, error: str) -> bytes:
+    """The results still pending followed by a final ``error`` line."""
+    body, ok = _flush(bundle, pending)
+    return body + _encode([{"error": error}]) if ok else body
+
+
+def score_stream(stream, bundle: dict, tenant: str = None, chunk_size: int = None, max_records: int = None):
+    """Yield encoded NDJSON result lines for the records in ``stream``, one chunk at a time.
+
+    Every non-blank input line gets one result line, in input order, with
+    its 1-based ``line`` number and the record's ``id`` when it has one.
+    Invalid records get ``errors`` instead of a prediction. A last line
+    with ``error`` ends the stream if scoring fails, if reading the body
+    fails or times out, or after ``max_records`` records. Valid records
+    count towards the drift histograms of ``tenant`` (the default model
+    when None).
+    """
+    from . import drift
+    from .model_registry import DEFAULT_TENANT
+
+    chunk_size = chunk_size or CHUNK_SIZE
+    max_records = max_records or MAX_RECORDS
+    histograms = drift.live_histograms(tenant or DEFAULT_TENANT)
+    pending = []
+    records = 0
+    lines = read_lines(stream)
+    while True:
+        try:
+            number, line = next(lines)
+        except StopIteration:
+            break
+        except OSError as exc:
+            # Includes socket timeouts from a client that stopped sending
+            yield _end(bundle, pending, f"Reading the request failed: {exc}")
+            return
+
+        if line is not None and not line.strip():
+            continue
+        records += 1
+        if records > max_records:
+            yield _end(bundle, pending, f"More than {max_records} records; split the feed")
+            return
+
+        if line is None:
+            pending.append(({"line": number, "errors": {"line": f"Longer than {MAX_LINE_BYTES} bytes"}}, None))
+        else:
+            result = {"line": number}
+            try:
+                data = codec.decode_line(line)
+            except codec.MalformedRequest:
+                result["errors"] = {"line": "Malformed JSON object"}
+                pending.append((result, None))
+            else:
+                if codec.RECORD_ID_FIELD in data:
+                    result[codec.RECORD_ID_FIELD] = data[codec.RECORD_ID_FIELD]
+                validation_result = validate_input(data)
+                if validation_result["errors"]:
+                    result["errors"] = validation_result["errors"]
+                    pending.append((result, None))
+                else:
+                    histograms.update(data)
+                    result["input_warnings"] = validation_result["warnings"]
+                    pending.append((result, data))
+
+        if len(pending) >= chunk_size:
+            body, ok = _flush(bundle, pending)
+            yield body
+            if not ok:
+                return
+            pending = []
+
+    if pending:
+        yield _flush(bundle, pending)[0]
@@ -1,11 +1,27 @@
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest import skipUnless
 from unittest.mock import MagicMock, patch
 
+import joblib
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
 
+from performance import views
+
 
 class PredictPerformanceTests(TestCase):
-    @patch("performance.views.joblib.load")
+    @patch("joblib.load")
     def test_predict_performance(self, mock_load):
         mock_model = MagicMock()
         mock_model.predict.return_value = [72.45]
@@ -25,3 +41,1907 @@ class PredictPerformanceTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"predicted_performance_index": 72.45})
+
+
+FEATURE_COLUMNS = [
+    "Hours Studied", "Previous Scores", "Extracurricular Activities",
+    "Sleep Hours", "Sample Question Papers Practiced",
+    "study_efficiency", "sleep_quality", "balance_score",
+    "practice_intensity", "burnout_risk", "underprepared_risk",
+    "cognitive_capacity", "total_preparation", "study_sleep_interaction",
+]
+
+
+class IdentityScaler:
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64)
+
+
+class LinearModel:
+    """Deterministic stand-in for the trained regressor."""
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return 0.6 * X[:, 1] + 3.0 * X[:, 0] + 1.5 * X[:, 4] + 5.0 * X[:, 6]
+
+
+def make_bundle():
+    return {"model": LinearModel(), "scaler": IdentityScaler(), "feature_columns": FEATURE_COLUMNS}
+
+
+class VectorizedInferenceTests(TestCase):
+    def test_batch_matches_single_row_path(self):
+        from performance.inference import predict_array
+        from performance.views import apply_realistic_constraints_single, engineer_features_for_prediction
+
+        bundle = make_bundle()
+        rng = np.random.default_rng(0)
+        rows = [
+            {
+                "hours_studied": int(rng.integers(0, 25)),
+                "previous_scores": int(rng.integers(0, 101)),
+                "extracurricular": bool(rng.integers(0, 2)),
+                "sleep_hours": int(rng.integers(0, 25)),
+                "sample_papers": int(rng.integers(0, 21)),
+            }
+            for _ in range(500)
+        ]
+        batch = predict_array(bundle, *(np.array([row[f] for row in rows]) for f in (
+            "hours_studied", "previous_scores", "extracurricular", "sleep_hours", "sample_papers"
+        )))
+        for row, value in zip(rows, batch):
+            features = engineer_features_for_prediction(row)[FEATURE_COLUMNS].values
+            raw = bundle["model"].predict(features)[0]
+            self.assertAlmostEqual(value, apply_realistic_constraints_single(raw, row), places=9)
+
+    def test_training_and_serving_scale_identical_features(self):
+        from sklearn.preprocessing import StandardScaler
+
+        from performance.inference import RAW_COLUMNS, engineer_features_array, feature_matrix
+        from performance.train_model import engineer_features
+        from performance.views import engineer_features_for_prediction
+
+        df = pd.read_csv("dataset.csv").head(300)
+        training = engineer_features(df)[FEATURE_COLUMNS]
+        scaler = StandardScaler().fit(training)
+        expected = scaler.transform(training)
+
+        raw = df[list(RAW_COLUMNS.values())].rename(columns={v: k for k, v in RAW_COLUMNS.items()})
+        raw["extracurricular"] = raw["extracurricular"].eq("Yes")
+        batch = feature_matrix(engineer_features_array(*(raw[f].to_numpy() for f in RAW_COLUMNS)), FEATURE_COLUMNS)
+        np.testing.assert_array_equal(scaler.transform(batch), expected)
+        for position, row in enumerate(raw.to_dict("records")):
+            single = engineer_features_for_prediction(row)[FEATURE_COLUMNS]
+            np.testing.assert_array_equal(scaler.transform(single)[0], expected[position])
+
+
+class PlanPerformanceTests(TestCase):
+    def setUp(self):
+        views.clear_model_cache()
+
+    def post(self, payload):
+        with patch("joblib.load", return_value=make_bundle()):
+            return self.client.post(reverse("plan-performance"), data=payload, content_type="application/json")
+
+    def test_returns_lowest_effort_plans_reaching_target(self):
+        student = {
+            "hours_studied": 3,
+            "previous_scores": 60,
+            "extracurricular": False,
+            "sleep_hours": 7,
+            "sample_papers": 2,
+        }
+        response = self.post({**student, "target_performance_index": 70, "max_plans": 3})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["feasible"])
+        self.assertEqual(len(body["plans"]), 3)
+        self.assertLess(body["candidates_evaluated"], body["candidates_considered"])
+
+        # Brute force over the whole feasible grid for the true minimum effort
+        from performance.inference import predict_array
+        from performance.planner import _candidate_grid, plan_effort
+
+        hours, sleep, papers = _candidate_grid()
+        preds = predict_array(
+            make_bundle(), hours, np.full(len(hours), 60), np.zeros(len(hours)), sleep, papers
+        )
+        best_effort = plan_effort(student, hours, sleep, papers)[preds >= 70].min()
+        self.assertAlmostEqual(body["plans"][0]["effort"], round(best_effort, 2))
+        for plan in body["plans"]:
+            self.assertGreaterEqual(plan["predicted_performance_index"], 70)
+            self.assertLessEqual(plan["hours_studied"] + plan["sleep_hours"], 24)
+
+    def test_unreachable_target_is_not_feasible(self):
+        response = self.post({
+            "hours_studied": 3,
+            "previous_scores": 20,
+            "extracurricular": False,
+            "sleep_hours": 7,
+            "sample_papers": 2,
+            "target_performance_index": 90,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["feasible"])
+        self.assertEqual(response.json()["candidates_evaluated"], 0)
+
+    def test_target_is_validated(self):
+        response = self.post({
+            "hours_studied": 3,
+            "previous_scores": 60,
+            "extracurricular": False,
+            "sleep_hours": 7,
+            "sample_papers": 2,
+            "target_performance_index": 150,
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"errors": {"target_performance_index": "Must be 0-100"}})
+
+
+# ============ RULE ENGINE PARITY ============
+
+def legacy_classify_student(data: dict, predicted_score: float) -> dict:
+    """The hand-written classify_student chain the rule tables replaced."""
+    hours_studied = data.get("hours_studied", 0)
+    sleep_hours = data.get("sleep_hours", 0)
+    previous_scores = data.get("previous_scores", 0)
+    sample_papers = data.get("sample_papers", 0)
+    extracurricular = data.get("extracurricular", False)
+
+    warnings = []
+    recommendations = []
+    risk_level = "Low"
+
+    # ============ CRITICAL/IMPOSSIBLE SCENARIOS ============
+
+    # Zero sleep - medical emergency
+    if sleep_hours == 0:
+        warnings.append("Zero sleep = cannot function")
+        recommendations.append("Get sleep immediately")
+        risk_level = "Critical"
+        classification = "Medical Emergency"
+        description = "Cannot perform without sleep."
+        return {
+            "classification": classification,
+            "description": description,
+            "risk_level": risk_level,
+            "warnings": warnings,
+            "recommendations": recommendations,
+            "performance_gap": round(predicted_score - previous_scores, 2)
+        }
+
+    # Zero study with zero practice - complete failure
+    if hours_studied == 0 and sample_papers == 0:
+        warnings.append("No preparation")
+        recommendations.append("Start studying now")
+        risk_level = "Critical"
+        classification = "Unprepared - Failing"
+        description = "Will fail without preparation."
+        return {
+            "classification": classification,
+            "description": description,
+            "risk_level": risk_level,
+            "warnings": warnings,
+            "recommendations": recommendations,
+            "performance_gap": round(predicted_score - previous_scores, 2)
+        }
+
+    # Excessive sleep (>14 hours) - health crisis
+    if sleep_hours > 14:
+        warnings.append("Excessive sleep (>14h)")
+        recommendations.append("Consult a doctor")
+        risk_level = "Critical"
+        classification = "Health Crisis"
+        description = "May indicate health issues."
+        return {
+            "classification": classification,
+            "description": description,
+            "risk_level": risk_level,
+            "warnings": warnings,
+            "recommendations": recommendations,
+            "performance_gap": round(predicted_score - previous_scores, 2)
+        }
+
+    # ============ SEVERE SCENARIOS ============
+
+    if sleep_hours < 3:
+        warnings.append("Severe sleep deprivation")
+        recommendations.append("Get 7-8 hours sleep")
+        risk_level = "Critical"
+    elif sleep_hours < 4:
+        warnings.append("Dangerous sleep levels")
+        recommendations.append("Increase sleep to 6-7h")
+        risk_level = "Critical"
+    elif sleep_hours < 5:
+        warnings.append("Low sleep affects cognition")
+        recommendations.append("Increase sleep")
+        risk_level = "High"
+
+    if hours_studied > 12 and sleep_hours < 6:
+        warnings.append("Burnout risk")
+        recommendations.append("Reduce study, rest more")
+        risk_level = "High" if risk_level != "Critical" else risk_level
+
+    if sleep_hours > 12:
+        warnings.append("Oversleeping")
+        recommendations.append("Check health")
+        risk_level = "Medium" if risk_level == "Low" else risk_level
+
+    if hours_studied == 0:
+        warnings.append("No study time")
+        recommendations.append("Study 4-5h daily")
+        risk_level = "High" if risk_level not in ["Critical"] else risk_level
+    elif hours_studied < 2:
+        warnings.append("Insufficient study")
+        recommendations.append("Study 3-4h daily")
+        risk_level = "High" if risk_level == "Low" else risk_level
+
+    if sample_papers == 0:
+        recommendations.append("Practice sample papers")
+
+    # ============ CLASSIFICATION LOGIC ============
+
+    # Priority order: most severe first
+    if sleep_hours < 3:
+        classification = "Sleep Deprived - Critical"
+        description = "Dangerously low sleep."
+    elif hours_studied > 10 and sleep_hours < 5:
+        classification = "Burnout - Critical"
+        description = "Overworking without rest."
+    elif sleep_hours < 5:
+        classification = "Sleep Deprived"
+        description = "Low sleep affects performance."
+    elif hours_studied == 0:
+        classification = "No Preparation"
+        description = "No study time recorded."
+    elif hours_studied < 2 and sample_papers < 2 and previous_scores < 50:
+        classification = "At Risk - Failing"
+        description = "Likely to fail."
+    elif hours_studied < 2 and sample_papers < 2:
+        classification = "At Risk"
+        description = "Needs more preparation."
+    elif sleep_hours > 12:
+        classification = "Oversleeping"
+        description = "May indicate health issues."
+    elif hours_studied >= 7 and sample_papers >= 5 and 6 <= sleep_hours <= 9:
+        classification = "High Performer"
+        description = "Excellent balance."
+    elif 4 <= hours_studied <= 8 and 7 <= sleep_hours <= 9 and extracurricular:
+        classification = "Balanced Student"
+        description = "Good work-life balance."
+    elif hours_studied > 9 and not extracurricular and sleep_hours >= 6:
+        classification = "Dedicated Learner"
+        description = "Strong focus on academics."
+    elif hours_studied < 3 and sleep_hours >= 8:
+        classification = "Underprepared"
+        description = "Needs more study time."
+    elif hours_studied >= 4 and sample_papers >= 3 and sleep_hours >= 6:
+        classification = "Adequate Preparation"
+        description = "Room for improvement."
+    else:
+        classification = "Average Student"
+        description = "Standard preparation."
+
+    # Performance gap analysis
+    performance_gap = predicted_score - previous_scores
+    if performance_gap > 10:
+        recommendations.append("Keep it up!")
+    elif performance_gap < -10:
+        recommendations.append("Review study methods")
+        risk_level = "High" if risk_level == "Low" else risk_level
+    elif performance_gap < -5:
+        recommendations.append("Performance declining")
+        risk_level = "Medium" if risk_level == "Low" else risk_level
+
+    return {
+        "classification": classification,
+        "description": description,
+        "risk_level": risk_level,
+        "warnings": warnings,
+        "recommendations": recommendations,
+        "performance_gap": round(performance_gap, 2)
+    }
+
+
+def legacy_validate_input(data: dict) -> dict:
+    """The hand-written validate_input chain the rule tables replaced."""
+    errors = {}
+    warnings = []
+
+    if "hours_studied" not in data:
+        errors["hours_studied"] = "Required"
+    elif not isinstance(data["hours_studied"], int) or not (0 <= data["hours_studied"] <= 24):
+        errors["hours_studied"] = "Must be 0-24"
+    elif data["hours_studied"] > 16:
+        warnings.append("16h+ study is unhealthy")
+
+    if "previous_scores" not in data:
+        errors["previous_scores"] = "Required"
+    elif not isinstance(data["previous_scores"], int) or not (0 <= data["previous_scores"] <= 100):
+        errors["previous_scores"] = "Must be 0-100"
+
+    if "extracurricular" not in data:
+        errors["extracurricular"] = "Required"
+    elif not isinstance(data["extracurricular"], bool):
+        errors["extracurricular"] = "Must be true or false"
+
+    if "sleep_hours" not in data:
+        errors["sleep_hours"] = "Required"
+    elif not isinstance(data["sleep_hours"], int) or not (0 <= data["sleep_hours"] <= 24):
+        errors["sleep_hours"] = "Must be 0-24"
+    elif data["sleep_hours"] < 3:
+        warnings.append("<3h sleep is dangerous")
+    elif data["sleep_hours"] > 12:
+        warnings.append(">12h sleep may indicate issues")
+
+    if "sample_papers" not in data:
+        errors["sample_papers"] = "Required"
+    elif not isinstance(data["sample_papers"], int) or not (0 <= data["sample_papers"] <= 20):
+        errors["sample_papers"] = "Must be 0-20"
+
+    # Cross-field validation - provide warnings for extreme scenarios instead of blocking
+    if not errors:
+        hours_studied = data.get("hours_studied", 0)
+        sleep_hours = data.get("sleep_hours", 0)
+        sample_papers = data.get("sample_papers", 0)
+        total_hours = hours_studied + sleep_hours
+
+        # Allow but warn about impossible time combinations
+        if total_hours > 24:
+            warnings.append(f"Impossible: {total_hours}h total exceeds 24h/day")
+
+        # Minimum realistic time for other activities
+        if total_hours > 22 and total_hours <= 24:
+            warnings.append(f"Only {24 - total_hours}h left for other activities")
+
+        # Zero sleep warning
+        if sleep_hours == 0:
+            warnings.append("Zero sleep = cannot function")
+        elif sleep_hours == 1:
+            warnings.append("1h sleep = severe impairment")
+        elif sleep_hours == 2:
+            warnings.append("2h sleep = extreme fatigue")
+
+        # Excessive study warning
+        if hours_studied >= 20:
+            warnings.append("20h+ study = physically impossible")
+        elif hours_studied >= 16:
+            warnings.append("16h+ study = extreme burnout")
+        elif hours_studied >= 14:
+            warnings.append("14h+ study = unsustainable")
+
+        # Burnout combinations
+        if hours_studied > 12 and sleep_hours < 4:
+            warnings.append("Burnout crisis: too much study, no rest")
+        elif hours_studied > 10 and sleep_hours < 5:
+            warnings.append("Severe burnout risk")
+        elif hours_studied > 8 and sleep_hours < 6:
+            warnings.append("Study-sleep imbalance")
+
+        # Excessive sleep
+        if sleep_hours >= 20:
+            warnings.append("20h+ sleep = health emergency")
+        elif sleep_hours >= 16:
+            warnings.append("16h+ sleep = possible illness")
+        elif sleep_hours > 12:
+            warnings.append("Excessive sleep (>12h)")
+
+        # No preparation
+        if hours_studied == 0 and sample_papers == 0:
+            warnings.append("No preparation = will fail")
+        elif hours_studied == 0:
+            warnings.append("No study time")
+        elif hours_studied < 2 and sample_papers < 2:
+            warnings.append("Severely underprepared")
+
+    return {"errors": errors, "warnings": warnings}
+
+
+class RuleEngineParityTests(TestCase):
+    """The rule tables must reproduce the original if/elif chains exactly."""
+
+    hours, sleep, papers = (
+        grid.ravel() for grid in np.meshgrid(np.arange(25), np.arange(25), np.arange(21), indexing="ij")
+    )
+
+    def test_validate_input_matches_over_full_domain(self):
+        from performance.rules import validate_batch, validate_input
+
+        batch = validate_batch(self.hours, 70, True, self.sleep, self.papers)
+        for i, (hours, sleep, papers) in enumerate(zip(self.hours.tolist(), self.sleep.tolist(), self.papers.tolist())):
+            data = {
+                "hours_studied": hours,
+                "previous_scores": 70,
+                "extracurricular": True,
+                "sleep_hours": sleep,
+                "sample_papers": papers,
+            }
+            expected = legacy_validate_input(data)
+            self.assertEqual(validate_input(data), expected)
+            self.assertEqual(batch.row(i), expected)
+
+    def test_validate_input_matches_on_invalid_fields(self):
+        from performance.rules import validate_input
+
+        valid = {"hours_studied": 5, "previous_scores": 70, "extracurricular": True, "sleep_hours": 8, "sample_papers": 3}
+        bad_values = [None, "5", 5.0, -1, 25, 101, 21, True, 1, 0, 3, 13, 17]
+        for field in valid:
+            missing = {key: value for key, value in valid.items() if key != field}
+            self.assertEqual(validate_input(missing), legacy_validate_input(missing))
+            for value in bad_values:
+                data = dict(valid, **{field: value})
+                self.assertEqual(validate_input(data), legacy_validate_input(data))
+
+    def test_classify_student_matches_over_full_domain(self):
+        from performance.rules import classify_batch, classify_student
+
+        # previous_scores only matters through the <50 threshold and the performance gap
+        for previous, extracurricular, gap in itertools.product(
+            (49, 50), (False, True), (-10.5, -10, -7.25, -5, 0, 10, 10.004)
+        ):
+            batch = classify_batch(self.hours, previous, extracurricular, self.sleep, self.papers, previous + gap)
+            for i, (hours, sleep, papers) in enumerate(zip(self.hours.tolist(), self.sleep.tolist(), self.papers.tolist())):
+                data = {
+                    "hours_studied": hours,
+                    "previous_scores": previous,
+                    "extracurricular": extracurricular,
+                    "sleep_hours": sleep,
+                    "sample_papers": papers,
+                }
+                expected = legacy_classify_student(data, previous + gap)
+                self.assertEqual(classify_student(data, previous + gap), expected)
+                self.assertEqual(batch.row(i), expected)
+
+    def test_classify_student_matches_over_every_score_and_gap(self):
+        from performance.rules import classify_batch
+
+        # One hours/sleep/papers triple for every (classification, risk level) the chain reaches;
+        # within each, every previous score 0-100 against every predicted score 0-100 in
+        # quarter points, which lands exactly on the -10, -5 and +10 gap thresholds
+        triples = {}
+        for previous, extracurricular in itertools.product((49, 50), (False, True)):
+            for hours, sleep, papers in zip(self.hours.tolist(), self.sleep.tolist(), self.papers.tolist()):
+                data = {"hours_studied": hours, "previous_scores": previous, "extracurricular": extracurricular,
+                        "sleep_hours": sleep, "sample_papers": papers}
+                result = legacy_classify_student(data, previous)
+                triples.setdefault((result["classification"], result["risk_level"]), (hours, sleep, papers))
+
+        previous_scores, predicted = (
+            grid.ravel() for grid in np.meshgrid(np.arange(101), np.arange(0, 100.25, 0.25), indexing="ij")
+        )
+        for (hours, sleep, papers), extracurricular in itertools.product(set(triples.values()), (False, True)):
+            batch = classify_batch(np.full(previous_scores.shape, hours), previous_scores, extracurricular,
+                                   sleep, papers, predicted)
+            for i, (previous, score) in enumerate(zip(previous_scores.tolist(), predicted.tolist())):
+                data = {"hours_studied": hours, "previous_scores": previous, "extracurricular": extracurricular,
+                        "sleep_hours": sleep, "sample_papers": papers}
+                self.assertEqual(batch.row(i), legacy_classify_student(data, score))
+
+
+class FastPredictTests(TestCase):
+    student = {
+        "hours_studied": 6,
+        "previous_scores": 78,
+        "extracurricular": True,
+        "sleep_hours": 7,
+        "sample_papers": 3,
+    }
+
+    def setUp(self):
+        views.clear_model_cache()
+
+    def post(self, name, payload, content_type="application/json"):
+        with patch("joblib.load", return_value=make_bundle()):
+            return self.client.post(reverse(name), data=payload, content_type=content_type)
+
+    def test_matches_drf_endpoint(self):
+        fast = self.post("predict-performance-fast", self.student)
+        drf = self.post("predict-performance", self.student)
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast["Content-Type"], "application/json")
+        self.assertEqual(fast.json(), drf.json())
+
+    def test_validation_errors_match_drf_endpoint(self):
+        payload = dict(self.student, sleep_hours=30)
+        del payload["sample_papers"]
+        fast = self.post("predict-performance-fast", payload)
+
+        self.assertEqual(fast.status_code, 400)
+        self.assertEqual(fast.json(), self.post("predict-performance", payload).json())
+
+    def test_rejects_unknown_media_type_and_bad_json(self):
+        self.assertEqual(self.post("predict-performance-fast", "a=1", content_type="text/plain").status_code, 415)
+        self.assertEqual(self.post("predict-performance-fast", "{not json").status_code, 400)
+
+    def test_msgpack_round_trip(self):
+        import msgpack
+
+        with patch("joblib.load", return_value=make_bundle()):
+            response = self.client.post(reverse("predict-performance-fast"), data=msgpack.packb(self.student),
+                                        content_type="application/msgpack", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), self.post("predict-performance-fast", self.student).json())
+
+        # Constant error bodies are pre-encoded for msgpack clients too
+        malformed = self.client.post(reverse("predict-performance-fast"), data=b"\xc1",
+                                     content_type="application/x-msgpack", HTTP_ACCEPT="application/x-msgpack")
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(malformed["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(malformed.content), {"detail": "Malformed request."})
+
+        # JSON stays the default when the client does not ask for msgpack
+        plain = self.client.post(reverse("predict-performance-fast"), data=b"\xc1", content_type="application/msgpack")
+        self.assertEqual(plain["Content-Type"], "application/json")
+        self.assertEqual(plain.json(), {"detail": "Malformed request."})
+
+
+class StreamingPredictTests(TestCase):
+    def setUp(self):
+        views.clear_model_cache()
+
+    def stream(self, body, content_type="application/x-ndjson"):
+        with patch("joblib.load", return_value=make_bundle()), \
+                patch("performance.streaming.CHUNK_SIZE", 2):
+            response = self.client.post(reverse("predict-stream"), data=body, content_type=content_type)
+            lines = b"".join(response.streaming_content).splitlines() if response.streaming else []
+        return response, [json.loads(line) for line in lines]
+
+    def test_scores_records_in_order_with_errors_inline(self):
+        from performance.admission import get_limiter
+
+        student = FastPredictTests.student
+        records = [
+            json.dumps(dict(student, id="a")),
+            "",
+            json.dumps(dict(student, sleep_hours=30)),
+            "{not json",
+            json.dumps(dict(student, hours_studied=2, id=7)),
+            "x" * 5000,
+            json.dumps(student),
+        ]
+        response, results = self.stream("\n".join(records).encode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([result["line"] for result in results], [1, 3, 4, 5, 6, 7])
+        self.assertEqual(results[0]["id"], "a")
+        self.assertEqual(results[1]["errors"], {"sleep_hours": "Must be 0-24"})
+        self.assertEqual(results[2]["errors"], {"line": "Malformed JSON object"})
+        self.assertEqual(results[4]["errors"], {"line": "Longer than 4096 bytes"})
+        self.assertEqual(results[3]["id"], 7)
+
+        with patch("joblib.load", return_value=make_bundle()):
+            single = self.client.post(reverse("predict-performance"), data=student, content_type="application/json").json()
+        for result in (results[0], results[5]):
+            for field in ("predicted_performance_index", "student_classification", "risk_level", "performance_gap"):
+                self.assertEqual(result[field], single[field])
+        self.assertEqual(get_limiter().in_flight, 0)
+
+    def test_ends_after_too_many_records_or_a_stalled_read(self):
+        from performance.admission import get_limiter
+
+        record = json.dumps(FastPredictTests.student).encode() + b"\n"
+        with patch("performance.streaming.MAX_RECORDS", 3):
+            response, results = self.stream(record * 5)
+        self.assertEqual([result.get("line") for result in results], [1, 2, 3, None])
+        self.assertEqual(results[-1], {"error": "More than 3 records; split the feed"})
+        self.assertEqual(get_limiter().in_flight, 0)
+
+        class StalledUpload(io.BytesIO):
+            def readline(self, size=-1):
+                line = super().readline(size)
+                if not line:
+                    raise TimeoutError("timed out")
+                return line
+
+        from performance.streaming import score_stream
+
+        lines = b"".join(score_stream(StalledUpload(record * 2), make_bundle())).splitlines()
+        results = [json.loads(line) for line in lines]
+        self.assertEqual([result.get("line") for result in results], [1, 2, None])
+        self.assertEqual(results[-1], {"error": "Reading the request failed: timed out"})
+
+    def test_rejects_other_media_types_and_methods(self):
+        self.assertEqual(self.stream(b"{}", content_type="application/json")[0].status_code, 415)
+        self.assertEqual(self.client.get(reverse("predict-stream")).status_code, 405)
+
+
+class CacheablePredictTests(TestCase):
+    query = "hours_studied=6&previous_scores=78&extracurricular=true&sleep_hours=7&sample_papers=3"
+
+    def setUp(self):
+        views.clear_model_cache()
+
+    def get(self, query, **headers):
+        with patch("joblib.load", return_value=make_bundle()):
+            return self.client.get(f"{reverse('predict-performance')}?{query}", **headers)
+
+    def test_get_matches_post_and_sets_validators(self):
+        response = self.get(self.query)
+
+        self.assertEqual(response.status_code, 200)
+        with patch("joblib.load", return_value=make_bundle()):
+            post = self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                    content_type="application/json")
+        expected = post.json()
+        # The stored-outcome percentile changes with the table, so GET leaves it out
+        expected.pop("percentile")
+        self.assertEqual(response.json(), expected)
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]{32}"$')
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.get(self.query)["ETag"]
+
+        response = self.get(self.query, HTTP_IF_NONE_MATCH=f'"stale", {etag}')
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_responses_vary_on_accept(self):
+        response = self.get(self.query)
+        self.assertEqual(response["Vary"], "Accept")
+        html = self.get(self.query, HTTP_ACCEPT="text/html")
+        self.assertNotEqual(html["ETag"], response["ETag"])
+        self.assertEqual(self.get(self.query, HTTP_IF_NONE_MATCH=response["ETag"])["Vary"], "Accept")
+
+    def test_etag_follows_model_version(self):
+        etag = self.get(self.query)["ETag"]
+        with patch("performance.views.model_version", return_value="0" * 16):
+            self.assertNotEqual(self.get(self.query)["ETag"], etag)
+
+    def test_non_canonical_query_redirects(self):
+        response = self.get(
+            "sample_papers=03&sleep_hours=7&extracurricular=True&previous_scores=78&hours_studied=6&utm=x"
+        )
+
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], f"{reverse('predict-performance')}?{self.query}")
+
+    def test_invalid_query_is_rejected_without_caching(self):
+        response = self.get("hours_studied=abc&previous_scores=78&extracurricular=true&sleep_hours=7")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"]["hours_studied"], "Must be 0-24")
+        self.assertIn("sample_papers", response.json()["errors"])
+        self.assertFalse(response.has_header("ETag"))
+
+
+class EngineeredFeatureColumnTests(TestCase):
+    def test_load_and_backfill_store_engineered_features(self):
+        from performance.inference import ENGINEERED_FEATURES
+        from performance.load_data import backfill, run
+        from performance.models import StudentPerformance
+        from performance.train_model import engineer_features, load_features_from_db
+
+        run("dataset.csv", chunk_size=50)
+        StudentPerformance.objects.filter(id__in=StudentPerformance.objects.values("id")[:20]).update(
+            study_efficiency=None
+        )
+        self.assertEqual(backfill(chunk_size=7), 20)
+
+        with redirect_stdout(io.StringIO()):
+            stored = load_features_from_db()
+        expected = engineer_features(pd.read_csv("dataset.csv"))
+        self.assertEqual(len(stored), len(expected))
+        for column in ENGINEERED_FEATURES:
+            np.testing.assert_allclose(stored[column].to_numpy(), expected[column].to_numpy())
+
+    def test_backfill_recompute_rewrites_stale_features(self):
+        from django.db.models import F
+
+        from performance.load_data import backfill, run
+        from performance.models import StudentPerformance
+
+        run("dataset.csv", chunk_size=50)
+        ids = list(StudentPerformance.objects.order_by("id").values_list("id", flat=True))
+        # update() changes the inputs without save(), so the stored features go stale
+        StudentPerformance.objects.filter(id__in=ids[:15]).update(previous_scores=F("previous_scores") + 1)
+        StudentPerformance.objects.filter(id__in=ids[15:20]).update(sleep_quality=None)
+
+        self.assertEqual(backfill(chunk_size=7), 0)
+        self.assertEqual(backfill(chunk_size=7, recompute=True), 20)
+        self.assertEqual(backfill(chunk_size=7, recompute=True), 0)
+        for row in StudentPerformance.objects.filter(id__in=ids[:20]):
+            stored = {name: getattr(row, name) for name in ("study_efficiency", "sleep_quality", "total_preparation")}
+            row.fill_engineered_features()
+            self.assertEqual(stored, {name: getattr(row, name) for name in stored})
+
+    def test_db_source_streams_filtered_rows_into_compact_arrays(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from performance.load_data import run
+        from performance.models import StudentPerformance
+        from performance.train_model import FEATURE_COLUMNS, NoTrainingRows, load_features_from_db
+
+        run("dataset.csv", chunk_size=50)
+        ids = list(StudentPerformance.objects.order_by("id").values_list("id", flat=True))
+        old = ids[:30]
+        StudentPerformance.objects.filter(id__in=old).update(created_at=timezone.now() - timedelta(days=30))
+
+        with redirect_stdout(io.StringIO()):
+            stored = load_features_from_db(id_from=ids[10], id_to=ids[49], chunk_size=7)
+            recent = load_features_from_db(created_after=timezone.now() - timedelta(days=1))
+        self.assertEqual(list(stored.columns), FEATURE_COLUMNS + ["Performance Index"])
+        self.assertEqual(set(stored.dtypes), {np.dtype(np.float32)})
+        expected = StudentPerformance.objects.filter(id__in=ids[10:50]).order_by("id")
+        np.testing.assert_allclose(stored["Previous Scores"], expected.values_list("previous_scores", flat=True))
+        np.testing.assert_allclose(stored["Performance Index"], expected.values_list("performance_index", flat=True),
+                                   rtol=1e-6)
+
+        self.assertEqual(len(recent), len(ids) - len(old))
+        with self.assertRaises(NoTrainingRows):
+            load_features_from_db(created_before=timezone.now() - timedelta(days=60))
+
+    def test_save_fills_engineered_features(self):
+        from performance.models import StudentPerformance
+
+        row = StudentPerformance.objects.create(
+            hours_studied=12, previous_scores=70, extracurricular=True,
+            sleep_hours=5, sample_papers=1, performance_index=60.0,
+        )
+        row.refresh_from_db()
+        self.assertEqual(row.burnout_risk, 1.0)
+        self.assertEqual(row.sleep_quality, 0.5)
+        self.assertAlmostEqual(row.study_efficiency, 70 / 13)
+
+
+class DatasetCacheTests(TestCase):
+    def test_columns_are_memory_mapped_and_keyed_by_content(self):
+        from performance.dataset_cache import content_hash, entry_path, load_columns, load_frame
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "dataset.csv")
+            cache_dir = os.path.join(tmp, "cache")
+            shutil.copy("dataset.csv", csv_path)
+            expected = pd.read_csv(csv_path)
+
+            columns = load_columns(csv_path, ["Previous Scores", "Extracurricular Activities"], cache_dir)
+            self.assertEqual(list(columns), ["Previous Scores", "Extracurricular Activities"])
+            self.assertIsInstance(columns["Previous Scores"], np.memmap)
+            np.testing.assert_array_equal(columns["Previous Scores"], expected["Previous Scores"])
+            np.testing.assert_array_equal(
+                columns["Extracurricular Activities"], expected["Extracurricular Activities"] == "Yes"
+            )
+            first_hash = content_hash(csv_path, cache_dir)
+
+            expected.head(10).to_csv(csv_path, index=False)
+            self.assertEqual(len(load_frame(csv_path, cache_dir=cache_dir)), 10)
+            self.assertNotEqual(content_hash(csv_path, cache_dir), first_hash)
+            self.assertFalse(os.path.exists(entry_path(first_hash, cache_dir)))
+
+    def test_entries_from_other_schema_versions_are_dropped(self):
+        from performance import schema
+        from performance.dataset_cache import content_hash, entry_path, load_frame
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "dataset.csv")
+            cache_dir = os.path.join(tmp, "cache")
+            shutil.copy("dataset.csv", csv_path)
+            load_frame(csv_path, cache_dir=cache_dir)
+            digest = content_hash(csv_path, cache_dir)
+            # An entry from before version suffixes and one from an older version
+            unversioned = os.path.join(cache_dir, digest)
+            older = os.path.join(cache_dir, f"{digest}-v{schema.SCHEMA_VERSION - 1}")
+            shutil.copytree(entry_path(digest, cache_dir), unversioned)
+            shutil.copytree(entry_path(digest, cache_dir), older)
+
+            with patch.object(schema, "SCHEMA_VERSION", schema.SCHEMA_VERSION + 1):
+                load_frame(csv_path, cache_dir=cache_dir)
+                self.assertEqual(sorted(os.listdir(cache_dir)), sorted([os.path.basename(entry_path(digest, cache_dir)),
+                                                                        "index.json"]))
+
+
+class CompactSchemaTests(TestCase):
+    def test_generated_and_cached_columns_use_compact_dtypes(self):
+        from performance.dataset_cache import load_frame
+        from performance.generate_dataset import generate_dataset
+        from performance.schema import DATASET_DTYPES, read_csv, write_csv
+
+        df = generate_dataset(80)
+        self.assertEqual(df.dtypes.to_dict(), {column: np.dtype(dtype) for column, dtype in DATASET_DTYPES.items()})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "dataset.csv")
+            write_csv(df, csv_path)
+            self.assertEqual(set(pd.read_csv(csv_path)["Extracurricular Activities"]), {"Yes", "No"})
+            pd.testing.assert_frame_equal(read_csv(csv_path), df)
+            cached = load_frame(csv_path, cache_dir=os.path.join(tmp, "cache"))
+            self.assertEqual(cached.dtypes.to_dict(), df.dtypes.to_dict())
+            for column in df.columns:
+                np.testing.assert_array_equal(cached[column], df[column])
+
+    def test_values_that_do_not_fit_are_rejected(self):
+        from performance.schema import to_compact
+
+        with self.assertRaisesMessage(ValueError, "Sleep Hours must be between 0 and 255"):
+            to_compact(pd.DataFrame({"Sleep Hours": [7, 300]}))
+        with self.assertRaisesMessage(ValueError, "Hours Studied must hold whole numbers"):
+            to_compact(pd.DataFrame({"Hours Studied": [7.5]}))
+
+    def test_engineered_features_are_float32_roundings_of_serving_features(self):
+        from performance.inference import engineer_features_array
+        from performance.train_model import FEATURE_COLUMNS, engineer_features
+
+        raw = pd.read_csv("dataset.csv")
+        engineered = engineer_features(raw)
+        serving = engineer_features_array(
+            raw["Hours Studied"], raw["Previous Scores"], raw["Extracurricular Activities"] == "Yes",
+            raw["Sleep Hours"], raw["Sample Question Papers Practiced"],
+        )
+
+        self.assertEqual(set(engineered[FEATURE_COLUMNS].dtypes), {np.dtype(np.float32)})
+        for column in FEATURE_COLUMNS:
+            np.testing.assert_array_equal(engineered[column].to_numpy(), serving[column].astype(np.float32))
+        np.testing.assert_array_equal(engineered["Performance Index"], raw["Performance Index"])
+
+
+class ProfilerMiddlewareTests(TestCase):
+    student = FastPredictTests.student
+
+    def setUp(self):
+        from performance.profiling import aggregate
+
+        views.clear_model_cache()
+        aggregate.reset()
+        self.staff = User.objects.create_user("ops", password="pw", is_staff=True)
+
+    def profile_requests(self, mode):
+        profiler = {"ENABLED": True, "SAMPLE_RATE": 1.0, "MODE": mode, "SAMPLER_INTERVAL": 0.0001}
+        with self.settings(PREDICTION_PROFILER=profiler), \
+                patch("joblib.load", return_value=make_bundle()):
+            for _ in range(3):
+                self.client.post(reverse("predict-performance"), data=self.student, content_type="application/json")
+
+    def test_cprofile_table_is_staff_only(self):
+        self.profile_requests("cprofile")
+
+        self.assertEqual(self.client.get(reverse("profile-stats")).status_code, 403)
+        self.client.force_login(self.staff)
+        body = self.client.get(reverse("profile-stats"), {"top": 500}).json()
+        self.assertEqual(body["profiled_requests"], 3)
+        self.assertTrue(any("(run_prediction)" in row["function"] for row in body["functions"]))
+        self.assertEqual(len(self.client.get(reverse("profile-stats"), {"top": 5}).json()["functions"]), 5)
+
+    def test_sampler_collapsed_stacks(self):
+        self.profile_requests("sampler")
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("profile-stats"), {"format": "collapsed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(reverse("profile-stats")).status_code, 204)
+        self.assertEqual(self.client.get(reverse("profile-stats")).json()["profiled_requests"], 0)
+
+    def test_disabled_middleware_is_not_loaded(self):
+        from django.core.exceptions import MiddlewareNotUsed
+        from performance.profiling import SamplingProfilerMiddleware
+
+        with self.assertRaises(MiddlewareNotUsed):
+            SamplingProfilerMiddleware(lambda request: None)
+
+
+class ServeCommandTests(TestCase):
+    @skipUnless(os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"), "needs /proc smaps_rollup")
+    def test_process_memory_reports_unique_and_shared_pages(self):
+        from performance.management.commands.serve import process_memory
+
+        memory = process_memory(os.getpid())
+        self.assertGreater(memory["rss"], 0)
+        self.assertLessEqual(memory["uss"], memory["pss"])
+        self.assertLessEqual(memory["pss"], memory["rss"])
+
+    def test_memory_reports_are_skipped_without_proc(self):
+        from performance.management.commands.serve import memory_reports_supported
+
+        with patch("os.path.exists", return_value=False):
+            self.assertFalse(memory_reports_supported())
+
+
+class BulkScoringTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.model_path = os.path.join(self.tmp.name, "model.pkl")
+        joblib.dump(make_bundle(), self.model_path)
+
+    def test_score_table_writes_back_and_skips_scored_rows(self):
+        from performance.load_data import run
+        from performance.models import StudentPerformance
+        from performance.scoring import score_table
+
+        run("dataset.csv")
+        progress = score_table(self.model_path, "v1", chunk_size=64, report=lambda message: None)
+
+        self.assertEqual(progress.rows, StudentPerformance.objects.count())
+        row = StudentPerformance.objects.order_by("id").first()
+        expected = views.apply_realistic_constraints_single(
+            LinearModel().predict(
+                views.engineer_features_for_prediction({
+                    "hours_studied": row.hours_studied,
+                    "previous_scores": row.previous_scores,
+                    "extracurricular": row.extracurricular,
+                    "sleep_hours": row.sleep_hours,
+                    "sample_papers": row.sample_papers,
+                })[FEATURE_COLUMNS].values
+            )[0],
+            {"hours_studied": row.hours_studied, "previous_scores": row.previous_scores,
+             "sleep_hours": row.sleep_hours, "sample_papers": row.sample_papers},
+        )
+        self.assertAlmostEqual(row.predicted_performance_index, round(expected, 2))
+        self.assertEqual(row.scored_model_version, "v1")
+        self.assertTrue(row.predicted_classification)
+        self.assertEqual(score_table(self.model_path, "v1", report=lambda message: None).rows, 0)
+
+    def test_score_csv_resumes_after_interruption(self):
+        from performance.scoring import score_csv
+
+        complete = os.path.join(self.tmp.name, "complete.csv")
+        resumed = os.path.join(self.tmp.name, "resumed.csv")
+        score_csv(self.model_path, "v1", "dataset.csv", complete, chunk_size=50, report=lambda message: None)
+
+        # Simulate a run killed after two chunks, with a partly written third chunk
+        with open(complete, "rb") as fh:
+            lines = fh.readlines()
+        done = b"".join(lines[:101])
+        with open(resumed, "wb") as fh:
+            fh.write(done + lines[101][:10])
+        with open(f"{resumed}.progress", "w") as fh:
+            json.dump({"input": os.path.abspath("dataset.csv"), "model_version": "v1",
+                       "rows": 100, "bytes": len(done)}, fh)
+
+        progress = score_csv(self.model_path, "v1", "dataset.csv", resumed, chunk_size=50, report=lambda message: None)
+
+        self.assertEqual(progress.rows, len(lines) - 101)
+        with open(complete, "rb") as a, open(resumed, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertFalse(os.path.exists(f"{resumed}.progress"))
+
+
+    def test_score_csv_reports_invalid_rows_instead_of_failing(self):
+        import pandas as pd
+
+        from performance.scoring import score_csv
+
+        source = os.path.join(self.tmp.name, "mixed.csv")
+        output = os.path.join(self.tmp.name, "mixed-scored.csv")
+        with open(source, "w") as fh:
+            fh.write(
+                "hours_studied,previous_scores,extracurricular,sleep_hours,sample_papers\n"
+                "6,78,yes,7,3\n"
+                ",78,yes,7,3\n"
+                "6,abc,no,30,3\n"
+                "6.5,78,maybe,7,3\n"
+                "6,78,no,7,3\n"
+            )
+
+        score_csv(self.model_path, "v1", source, output, chunk_size=2, report=lambda message: None)
+
+        scored = pd.read_csv(output, keep_default_na=False)
+        self.assertEqual(len(scored), 5)
+        self.assertEqual(scored["errors"].tolist(), [
+            "",
+            "hours_studied: Required",
+            "previous_scores: Must be 0-100; sleep_hours: Must be 0-24",
+            "hours_studied: Must be 0-24; extracurricular: Must be true or false",
+            "",
+        ])
+        self.assertEqual(scored["predicted_performance_index"].tolist()[1:4], ["", "", ""])
+        self.assertEqual(scored["student_classification"].tolist()[1:4], ["", "", ""])
+        with patch("joblib.load", return_value=make_bundle()):
+            body = self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                    content_type="application/json").json()
+        self.assertEqual(float(scored["predicted_performance_index"][0]), body["predicted_performance_index"])
+        self.assertEqual(scored["student_classification"][0], body["student_classification"])
+
+class AdmissionControlTests(TestCase):
+    def test_limiter_queues_then_sheds(self):
+        from performance.admission import ConcurrencyLimiter
+
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        self.assertTrue(limiter.acquire())
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while not limiter.waiting:
+            time.sleep(0.001)
+        self.assertFalse(limiter.acquire())  # queue is full
+        waiter.join()
+        self.assertEqual(results, [False])  # timed out waiting
+
+        limiter.release()
+        self.assertTrue(limiter.acquire())
+        stats = limiter.stats()
+        self.assertEqual(stats["admitted"], 2)
+        self.assertEqual(stats["shed_queue_full"], 1)
+        self.assertEqual(stats["shed_timeout"], 1)
+
+    def test_waiter_is_admitted_when_slot_frees(self):
+        from performance.admission import ConcurrencyLimiter
+
+        limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=5)
+        limiter.acquire()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+        waiter.start()
+        while not limiter.waiting:
+            time.sleep(0.001)
+        limiter.release()
+        waiter.join()
+
+        self.assertEqual(results, [True])
+        self.assertGreater(limiter.stats()["queue_wait_ms"]["max"], 0)
+
+    def test_saturated_endpoint_returns_503_with_retry_after(self):
+        from performance.admission import get_limiter
+
+        config = {"MAX_IN_FLIGHT": 1, "MAX_QUEUE": 0, "QUEUE_TIMEOUT": 0, "RETRY_AFTER": 3}
+        with self.settings(PREDICT_ADMISSION=config):
+            limiter = get_limiter()
+            limiter.acquire()
+            response = self.client.post(
+                reverse("predict-performance"), data=FastPredictTests.student, content_type="application/json"
+            )
+            limiter.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(limiter.stats()["shed"], 1)
+
+
+class DriftMonitorTests(TestCase):
+    def setUp(self):
+        from performance import drift
+
+        views.clear_model_cache()
+        drift.live_histograms().reset()
+        self.staff = User.objects.create_user("ops", password="pw", is_staff=True)
+        rng = np.random.default_rng(0)
+        self.training = {
+            "hours_studied": rng.integers(1, 10, 5000),
+            "previous_scores": rng.integers(40, 100, 5000),
+            "extracurricular": rng.integers(0, 2, 5000),
+            "sleep_hours": rng.integers(4, 10, 5000),
+            "sample_papers": rng.integers(0, 10, 5000),
+        }
+
+    def test_scores_identical_and_shifted_distributions(self):
+        from performance import drift
+
+        reference = drift.reference_histograms(self.training)
+        same = drift.drift_report(reference, {field: np.array(counts) for field, counts in reference.items()})
+        self.assertEqual(same["drifted"], [])
+        self.assertEqual(same["features"]["sleep_hours"]["psi"], 0)
+
+        shifted = dict(self.training, sleep_hours=self.training["sleep_hours"] - 3)
+        report = drift.drift_report(reference, drift.reference_histograms(shifted))
+        self.assertEqual(report["drifted"], ["sleep_hours"])
+        self.assertEqual(report["features"]["sleep_hours"]["status"], "significant")
+        self.assertGreater(report["features"]["sleep_hours"]["ks"], report["features"]["sleep_hours"]["ks_critical"])
+
+    def test_live_histograms_have_fixed_size(self):
+        from performance import drift
+
+        live = drift.live_histograms()
+        sizes = {field: len(counts) for field, counts in live.counts.items()}
+        for _ in range(1000):
+            live.update(FastPredictTests.student)
+
+        self.assertEqual({field: len(counts) for field, counts in live.counts.items()}, sizes)
+        self.assertEqual(live.total, 1000)
+        self.assertEqual(live.snapshot()["sleep_hours"][7], 1000)
+
+    def test_endpoint_compares_predictions_with_reference(self):
+        from performance import drift
+
+        bundle = dict(make_bundle(), drift_reference=drift.reference_histograms(self.training))
+        with patch("joblib.load", return_value=bundle):
+            for _ in range(3):
+                self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                 content_type="application/json")
+            self.assertEqual(self.client.get(reverse("drift-stats")).status_code, 403)
+
+            self.client.force_login(self.staff)
+            report = self.client.get(reverse("drift-stats"), {"min_samples": 3}).json()
+
+        self.assertEqual(report["live_samples"], 3)
+        self.assertEqual(report["reference_samples"], 5000)
+        self.assertIn("sleep_hours", report["drifted"])
+
+        self.assertEqual(self.client.delete(reverse("drift-stats")).status_code, 204)
+        self.assertEqual(drift.live_histograms().total, 0)
+
+    def test_tenant_traffic_is_compared_with_the_tenant_model(self):
+        from performance import drift, model_registry
+
+        with tempfile.TemporaryDirectory() as tmp, self.settings(MODEL_REGISTRY={"ARTIFACT_DIR": tmp}):
+            path = model_registry.tenant_model_path("north")
+            os.makedirs(os.path.dirname(path))
+            shifted = dict(self.training, sleep_hours=np.full(5000, 7))
+            joblib.dump(dict(make_bundle(), drift_reference=drift.reference_histograms(shifted)), path)
+            drift.live_histograms("north").reset()
+
+            for _ in range(3):
+                self.client.post(reverse("predict-performance"), data=dict(FastPredictTests.student, tenant="north"),
+                                 content_type="application/json")
+            self.client.force_login(self.staff)
+            report = self.client.get(reverse("drift-stats"), {"tenant": "north", "min_samples": 3}).json()
+
+        self.assertEqual(drift.live_histograms().total, 0)
+        self.assertEqual(report["live_samples"], 3)
+        self.assertNotIn("sleep_hours", report["drifted"])
+
+    def test_endpoint_reports_missing_reference(self):
+        self.client.force_login(self.staff)
+        with patch("joblib.load", return_value=make_bundle()):
+            self.assertEqual(self.client.get(reverse("drift-stats")).status_code, 409)
+
+
+class StudentAdminTests(TestCase):
+    def setUp(self):
+        from performance.models import StudentPerformance
+
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.admin)
+        StudentPerformance.objects.bulk_create([
+            StudentPerformance(hours_studied=5, previous_scores=score, extracurricular=score % 2 == 0,
+                               sleep_hours=7, sample_papers=3, performance_index=score * 0.9)
+            for score in range(40, 100)
+        ])
+        self.url = reverse("admin:performance_studentperformance_changelist")
+
+    def test_search_is_exact_integer_match(self):
+        response = self.client.get(self.url, {"q": "75"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row.previous_scores for row in response.context["cl"].result_list], [75])
+
+        response = self.client.get(self.url, {"q": "7a"})
+        self.assertEqual(len(response.context["cl"].result_list), 0)
+
+    def test_band_filter_and_bounded_count(self):
+        from performance.admin import EstimatedCountPaginator
+
+        response = self.client.get(self.url, {"performance_band": "80-100"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(row.performance_index >= 80 for row in response.context["cl"].result_list))
+
+        with patch.object(EstimatedCountPaginator, "count_limit", 25):
+            response = self.client.get(self.url, {"extracurricular__exact": "1"})
+            self.assertEqual(response.context["cl"].result_count, 25)
+            # Without a planner estimate an unfiltered list is counted exactly
+            self.assertEqual(self.client.get(self.url).context["cl"].result_count, 60)
+
+    def test_pages_past_a_capped_or_stale_count_stay_reachable(self):
+        from django.core.paginator import EmptyPage
+
+        from performance.admin import EstimatedCountPaginator
+        from performance.models import StudentPerformance
+
+        rows = StudentPerformance.objects.order_by("id")
+        with patch.object(EstimatedCountPaginator, "count_limit", 25):
+            capped = EstimatedCountPaginator(rows.filter(performance_index__gte=0), 10)
+            self.assertEqual(capped.num_pages, 3)
+            self.assertEqual([row.previous_scores for row in capped.page(6).object_list], list(range(90, 100)))
+            with self.assertRaises(EmptyPage):
+                capped.page(7)
+
+            # A stale estimate above the real size is capped by the primary-key span
+            with patch("performance.admin.estimated_row_count", return_value=5000):
+                self.assertEqual(EstimatedCountPaginator(rows, 10).count, 60)
+
+    def test_changelist_queries_use_indexes(self):
+        from django.db import connection
+
+        from performance.models import StudentPerformance
+
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN is SQLite-specific")
+        def plan(queryset):
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return " ".join(str(row) for row in cursor.fetchall())
+
+        # Ordered changelist pages are read in index order, without sorting the table
+        for queryset in (
+            StudentPerformance.objects.order_by("-performance_index", "-id"),
+            StudentPerformance.objects.filter(extracurricular=True).order_by("-performance_index", "-id"),
+        ):
+            self.assertIn("USING INDEX", plan(queryset))
+            self.assertNotIn("TEMP B-TREE", plan(queryset))
+        self.assertIn("previous_scores_idx", plan(StudentPerformance.objects.filter(previous_scores=75)))
+
+
+class DeduplicatedTrainingTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = pd.DataFrame({
+            "Hours Studied": rng.integers(0, 3, 500),
+            "Previous Scores": rng.integers(60, 63, 500),
+            "Extracurricular Activities": rng.integers(0, 2, 500).astype(bool),
+            "Sleep Hours": rng.integers(6, 9, 500),
+            "Sample Question Papers Practiced": rng.integers(1, 3, 500),
+            "Performance Index": rng.normal(60, 5, 500),
+        })
+
+    def test_group_inputs_maps_rows_to_distinct_inputs(self):
+        from performance.train_model import group_inputs
+
+        unique, inverse = group_inputs(self.frame)
+
+        raw = self.frame[list(unique.columns)]
+        self.assertEqual(len(unique), len(raw.drop_duplicates()))
+        pd.testing.assert_frame_equal(unique.iloc[inverse].reset_index(drop=True), raw.reset_index(drop=True))
+
+    def test_weighted_fit_matches_row_level_statistics(self):
+        from performance.train_model import FEATURE_COLUMNS, engineer_features, fit_deduplicated, group_inputs
+
+        unique, inverse = group_inputs(self.frame)
+        train_idx = np.arange(400)
+        with patch("performance.train_model.make_model", return_value=MagicMock()) as make_model:
+            scaler, _ = fit_deduplicated(unique, inverse, self.frame["Performance Index"].to_numpy(), train_idx)
+
+        rows = engineer_features(self.frame.iloc[train_idx].copy())[FEATURE_COLUMNS]
+        np.testing.assert_allclose(scaler.mean_, rows.mean().to_numpy())
+        np.testing.assert_allclose(scaler.scale_, rows.std(ddof=0).replace(0, 1).to_numpy())
+
+        X, y = make_model.return_value.fit.call_args.args
+        weights = make_model.return_value.fit.call_args.kwargs["sample_weight"]
+        self.assertEqual(weights.sum(), len(train_idx))
+        self.assertAlmostEqual(np.average(y, weights=weights), self.frame["Performance Index"][:400].mean())
+
+    def test_compare_requires_dedupe(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaisesMessage(CommandError, "needs --dedupe"):
+            call_command("train_model", "--compare", stdout=io.StringIO())
+
+
+class TrainCacheTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def test_round_trip_is_memory_mapped(self):
+        from performance import train_cache
+
+        key = train_cache.cache_key("dataset-hash", 1, 42)
+        self.assertIsNone(train_cache.get(key, self.cache_dir))
+        train_cache.put(key, {"X": np.arange(6.0).reshape(2, 3)}, {"scaler": {"mean": 1.5}}, self.cache_dir)
+
+        entry = train_cache.get(key, self.cache_dir)
+        self.assertIsInstance(entry["X"], np.memmap)
+        np.testing.assert_array_equal(entry["X"], np.arange(6.0).reshape(2, 3))
+        self.assertEqual(entry["scaler"], {"mean": 1.5})
+        self.assertNotEqual(train_cache.cache_key("dataset-hash", 2, 42), key)
+
+    def test_evicts_least_recently_used_entries(self):
+        from performance import train_cache
+
+        array = {"X": np.zeros(1000)}
+        limit = 2 * 8000 + 2000
+        for key in ("a", "b"):
+            train_cache.put(key, array, cache_dir=self.cache_dir, max_bytes=limit)
+        os.utime(os.path.join(self.cache_dir, "a", train_cache.MANIFEST_FILE), (0, 0))
+        os.utime(os.path.join(self.cache_dir, "b", train_cache.MANIFEST_FILE), (1, 1))
+        train_cache.get("a", self.cache_dir)  # "a" becomes the most recently used
+
+        train_cache.put("c", array, cache_dir=self.cache_dir, max_bytes=limit)
+
+        self.assertIsNone(train_cache.get("b", self.cache_dir))
+        self.assertIsNotNone(train_cache.get("a", self.cache_dir))
+        self.assertIsNotNone(train_cache.get("c", self.cache_dir))
+
+    def test_cached_split_matches_prepared_split(self):
+        from performance import train_model
+
+        rng = np.random.default_rng(0)
+        frame = train_model.engineer_features(pd.DataFrame({
+            "Hours Studied": rng.integers(0, 10, 50),
+            "Previous Scores": rng.integers(40, 100, 50),
+            "Extracurricular Activities": rng.integers(0, 2, 50).astype(bool),
+            "Sleep Hours": rng.integers(4, 10, 50),
+            "Sample Question Papers Practiced": rng.integers(0, 10, 50),
+            "Performance Index": rng.normal(60, 5, 50),
+        }))
+        with redirect_stdout(io.StringIO()):
+            split = train_model.prepare_split(frame)
+        train_model.store_split("key", split, self.cache_dir)
+        cached = train_model.load_split("key", self.cache_dir)
+
+        pd.testing.assert_frame_equal(cached["X_train"], split["X_train"], check_dtype=False)
+        np.testing.assert_array_equal(cached["X_test_scaled"], split["X_test_scaled"])
+        np.testing.assert_array_equal(cached["scaler"].mean_, split["scaler"].mean_)
+
+
+class BudgetedTrainingTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(300, 4))
+        self.y = self.X @ np.array([3.0, -2.0, 1.0, 0.5]) + rng.normal(0, 0.1, 300)
+
+    def model(self):
+        from performance.train_model import make_model
+
+        return make_model().set_params(n_estimators=30, n_iter_no_change=None)
+
+    def test_budget_stops_with_checkpoint_and_resume_matches_full_fit(self):
+        from performance.train_model import TrainingMonitor
+
+        checkpoints = []
+        clock = itertools.count()  # every perf_counter() call advances one second
+        with patch("performance.train_model.time.perf_counter", side_effect=lambda: next(clock)), \
+                redirect_stdout(io.StringIO()):
+            monitor = TrainingMonitor(time_budget=20, checkpoint=checkpoints.append, checkpoint_interval=5)
+            partial = self.model().fit(self.X, self.y, monitor=monitor)
+
+        self.assertTrue(monitor.budget_exhausted)
+        self.assertLess(partial.n_estimators_, 30)
+        self.assertEqual(checkpoints[-1].n_estimators_, partial.n_estimators_)
+        np.testing.assert_allclose(checkpoints[-1].predict(self.X), partial.predict(self.X))
+        earlier = checkpoints[0]
+        staged = list(partial.staged_predict(self.X))[earlier.n_estimators_ - 1]
+        np.testing.assert_allclose(earlier.predict(self.X), staged)
+
+        resumed = checkpoints[-1]
+        resumed.set_params(warm_start=True, n_estimators=30)
+        resumed.fit(self.X, self.y)
+        np.testing.assert_allclose(resumed.predict(self.X), self.model().fit(self.X, self.y).predict(self.X))
+
+    def test_reports_validation_rmse(self):
+        from performance.train_model import TrainingMonitor
+
+        monitor = TrainingMonitor()
+        model = self.model().set_params(n_iter_no_change=5)
+        with redirect_stdout(io.StringIO()):
+            model.fit(self.X, self.y, monitor=monitor)
+
+        self.assertEqual(monitor.stages, model.n_estimators_)
+        self.assertLess(monitor.validation_rmse, self.y.std())
+
+
+class ExplainPredictionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        from performance.inference import engineer_features_array, feature_matrix
+
+        rng = np.random.default_rng(0)
+        raw = [rng.integers(0, 13, 400), rng.integers(30, 101, 400), rng.integers(0, 2, 400),
+               rng.integers(3, 12, 400), rng.integers(0, 11, 400)]
+        X = feature_matrix(engineer_features_array(*raw), FEATURE_COLUMNS)
+        y = LinearModel().predict(X) + rng.normal(0, 1, 400)
+        model = GradientBoostingRegressor(n_estimators=25, max_depth=3, subsample=0.8, random_state=0).fit(X, y)
+        cls.bundle = {"model": model, "scaler": IdentityScaler(), "feature_columns": FEATURE_COLUMNS}
+        cls.X = X
+
+    def setUp(self):
+        views.clear_model_cache()
+
+    def test_matches_brute_force_shapley_values(self):
+        from math import factorial
+
+        from performance.explain import TreeExplainer
+
+        model = self.bundle["model"]
+        x = self.X[7]
+        n = len(x)
+
+        def expected(tree, coalition, node=0):
+            if tree.children_left[node] == -1:
+                return tree.value[node, 0, 0]
+            left, right = tree.children_left[node], tree.children_right[node]
+            if tree.feature[node] in coalition:
+                return expected(tree, coalition, left if np.float32(x[tree.feature[node]]) <= tree.threshold[node] else right)
+            cover = tree.weighted_n_node_samples
+            return (cover[left] * expected(tree, coalition, left)
+                    + cover[right] * expected(tree, coalition, right)) / cover[node]
+
+        used = sorted({f for tree in model.estimators_[:, 0] for f in tree.tree_.feature if f >= 0})
+        brute = np.zeros(n)
+        for tree in (estimator.tree_ for estimator in model.estimators_[:, 0]):
+            for j in used:
+                others = [k for k in used if k != j]
+                for size in range(len(others) + 1):
+                    weight = factorial(size) * factorial(len(used) - size - 1) / factorial(len(used))
+                    for coalition in itertools.combinations(others, size):
+                        gain = expected(tree, {*coalition, j}) - expected(tree, set(coalition))
+                        brute[j] += model.learning_rate * weight * gain
+
+        explainer = TreeExplainer(model)
+        np.testing.assert_allclose(explainer.shap_values(x), brute, atol=1e-9)
+        self.assertAlmostEqual(explainer.expected_value + brute.sum(), model.predict(x[None])[0])
+
+    def test_endpoint_attributions_add_up_and_are_cached(self):
+        from performance.codec import REQUEST_FIELDS
+
+        with patch("joblib.load", return_value=self.bundle):
+            response = self.client.post(reverse("explain-prediction"), data=FastPredictTests.student,
+                                        content_type="application/json")
+            again = self.client.post(reverse("explain-prediction"), data=FastPredictTests.student,
+                                     content_type="application/json")
+            predicted = self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                         content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["predicted_performance_index"], predicted.json()["predicted_performance_index"])
+        explained = body["model_output"] - body["base_value"]
+        self.assertAlmostEqual(sum(body["feature_attributions"].values()), explained, places=2)
+        self.assertAlmostEqual(sum(body["input_attributions"].values()), explained, places=2)
+        self.assertEqual(set(body["input_attributions"]), set(REQUEST_FIELDS))
+        self.assertEqual(again.json(), body)
+        self.assertEqual(views.explain_input.cache_info().hits, 1)
+
+    def test_validation_errors(self):
+        response = self.client.post(reverse("explain-prediction"), data={"hours_studied": 30},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTimeTests(TestCase):
+    HEAVY_MODULES = {"numpy", "pandas", "sklearn", "joblib", "scipy"}
+    # performance.views measured ~20 ms cumulative once the heavy imports were deferred (~205 ms before)
+    VIEWS_BUDGET_US = 100_000
+
+    def test_manage_py_check_skips_heavy_imports(self):
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "manage.py", "check"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, total, name = line.split("|")
+                if total.strip().isdigit():
+                    cumulative[name.strip()] = int(total)
+
+        top_level = {name.split(".")[0] for name in cumulative}
+        self.assertFalse(top_level & self.HEAVY_MODULES)
+        self.assertLess(cumulative["performance.views"], self.VIEWS_BUDGET_US)
+
+
+class ModelRegistryTests(TestCase):
+    def setUp(self):
+        from performance import model_registry
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = self.settings(MODEL_REGISTRY={"ARTIFACT_DIR": self.tmp.name})
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.staff = User.objects.create_user("ops", password="pw", is_staff=True)
+        self.registry = model_registry
+
+    def write_bundle(self, tenant, bundle=None):
+        path = self.registry.tenant_model_path(tenant)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(bundle if bundle is not None else make_bundle(), path)
+        return path
+
+    def test_evicts_least_recently_used_over_budget(self):
+        paths = {tenant: self.write_bundle(tenant, {"weights": np.zeros(10_000)}) for tenant in "abc"}
+        size = os.path.getsize(paths["a"])
+        cache = self.registry.ModelCache(memory_budget=2 * size + size // 2)
+
+        first = cache.load(paths["a"], "a")
+        cache.load(paths["b"], "b")
+        self.assertIs(cache.load(paths["a"], "a"), first)
+        cache.load(paths["c"], "c")
+
+        stats = cache.stats()
+        self.assertEqual([entry["tenant"] for entry in stats["loaded"]], ["c", "a"])
+        self.assertLessEqual(stats["bytes_used"], cache.memory_budget)
+        self.assertEqual(stats["tenants"]["a"]["hits"], 1)
+        self.assertEqual(stats["tenants"]["b"]["evictions"], 1)
+
+        cache.load(paths["b"], "b")
+        self.assertEqual(cache.stats()["tenants"]["b"]["loads"], 2)
+
+    def test_slow_load_does_not_block_other_tenants(self):
+        slow, fast = self.write_bundle("slow"), self.write_bundle("fast")
+        cache = self.registry.ModelCache(memory_budget=1 << 30)
+        started, release = threading.Event(), threading.Event()
+        real_load = joblib.load
+
+        def load(path, *args, **kwargs):
+            if path == slow:
+                started.set()
+                release.wait(5)
+            return real_load(path, *args, **kwargs)
+
+        with patch("joblib.load", side_effect=load):
+            worker = threading.Thread(target=cache.load, args=(slow, "slow"))
+            worker.start()
+            self.assertTrue(started.wait(5))
+            cache.load(fast, "fast")
+            self.assertEqual(cache.stats()["tenants"]["fast"]["loads"], 1)
+            self.assertTrue(worker.is_alive())
+            release.set()
+            worker.join(5)
+        self.assertEqual(cache.stats()["tenants"]["slow"]["loads"], 1)
+
+    def test_predict_routes_by_tenant(self):
+        self.write_bundle("north")
+        student = dict(FastPredictTests.student, tenant="north")
+
+        response = self.client.post(reverse("predict-performance"), data=student, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        fast = self.client.post(reverse("predict-performance-fast"), data=student, content_type="application/json")
+        self.assertEqual(fast.json(), response.json())
+        query = f"{CacheablePredictTests.query}&tenant=north"
+        self.assertEqual(self.client.get(f"{reverse('predict-performance')}?{query}").status_code, 200)
+
+        missing = self.client.post(reverse("predict-performance"), data=dict(student, tenant="south"),
+                                   content_type="application/json")
+        self.assertEqual(missing.status_code, 404)
+        invalid = self.client.post(reverse("predict-performance"), data=dict(student, tenant="../etc"),
+                                   content_type="application/json")
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn("tenant", invalid.json()["errors"])
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.write_bundle("north")
+        self.client.post(reverse("predict-performance"), data=dict(FastPredictTests.student, tenant="north"),
+                         content_type="application/json")
+        self.assertEqual(self.client.get(reverse("model-cache-stats")).status_code, 403)
+
+        self.client.login(username="ops", password="pw")
+        stats = self.client.get(reverse("model-cache-stats")).json()
+        self.assertEqual(stats["loaded"][0]["tenant"], "north")
+        self.assertEqual(self.client.delete(reverse("model-cache-stats")).status_code, 204)
+        self.assertEqual(self.client.get(reverse("model-cache-stats")).json()["loaded"], [])
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X):
+        return np.full(len(X), self.value)
+
+
+class ModelTierTests(TestCase):
+    def setUp(self):
+        views.clear_model_cache()
+
+    def post(self, payload, name="predict-performance"):
+        bundle = dict(make_bundle(), tiers={"fast": ConstantModel(50.0)})
+        with patch("joblib.load", return_value=bundle):
+            return self.client.post(reverse(name), data=payload, content_type="application/json")
+
+    def test_requests_pick_a_tier(self):
+        student = FastPredictTests.student
+        full = self.post(student).json()
+        fast = self.post(dict(student, tier="fast")).json()
+
+        self.assertEqual(self.post(dict(student, tier="full")).json(), full)
+        self.assertEqual(fast["predicted_performance_index"], 50.0)
+        self.assertNotEqual(fast["predicted_performance_index"], full["predicted_performance_index"])
+        self.assertEqual(self.post(dict(student, tier="fast"), "predict-performance-fast").json(), fast)
+
+        self.assertEqual(self.post(dict(student, tier="linear")).status_code, 404)
+        invalid = self.post(dict(student, tier="turbo"))
+        self.assertEqual(invalid.status_code, 400)
+        self.assertIn("tier", invalid.json()["errors"])
+
+    def test_distilled_tiers_follow_the_full_model(self):
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        from performance import model_registry
+        from performance.train_model import distill
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(400, 4))
+        teacher = GradientBoostingRegressor(n_estimators=100, max_depth=4, random_state=0)
+        teacher.fit(X, X @ np.array([3.0, -2.0, 1.0, 0.5]) + np.sin(3 * X[:, 0]))
+
+        tiers = distill(teacher, X)
+        self.assertEqual(tuple(tiers), model_registry.MODEL_TIERS[1:])
+        target = teacher.predict(X)
+        for tier_model in tiers.values():
+            self.assertLess(np.sqrt(np.mean((tier_model.predict(X) - target) ** 2)), 0.5 * target.std())
+
+
+class ScoringJobTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = self.settings(
+            MEDIA_ROOT=os.path.join(self.tmp.name, "media"),
+            MODEL_REGISTRY={"ARTIFACT_DIR": os.path.join(self.tmp.name, "tenants")},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        from performance import model_registry
+
+        path = model_registry.tenant_model_path("north")
+        os.makedirs(os.path.dirname(path))
+        joblib.dump(make_bundle(), path)
+
+    def upload(self, path="dataset.csv", tenant="north"):
+        with open(path, "rb") as fh:
+            return self.client.post(reverse("scoring-jobs"), {"file": fh, "tenant": tenant})
+
+    def test_job_is_scored_in_chunks_by_worker(self):
+        from django.core.management import call_command
+        from performance.scoring import score_csv
+
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job["status"], "queued")
+        self.assertEqual(job["rows_total"], len(pd.read_csv("dataset.csv")))
+        self.assertEqual(self.client.get(reverse("scoring-job-result", args=[job["id"]])).status_code, 409)
+
+        call_command("run_jobs", "--once", "--chunk-size", "50", stdout=io.StringIO())
+
+        status = self.client.get(response["Location"]).json()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["rows_done"], job["rows_total"])
+        self.assertEqual(status["progress"], 1.0)
+
+        result = self.client.get(status["result_url"])
+        self.assertEqual(result.status_code, 200)
+        expected = os.path.join(self.tmp.name, "expected.csv")
+        score_csv(os.path.join(self.tmp.name, "tenants", "north", "model.pkl"), "v", "dataset.csv", expected,
+                  chunk_size=50, report=lambda message: None)
+        with open(expected, "rb") as fh:
+            self.assertEqual(b"".join(result.streaming_content), fh.read())
+
+    def test_rejects_bad_uploads(self):
+        bad = os.path.join(self.tmp.name, "bad.csv")
+        with open(bad, "w") as fh:
+            fh.write("hours_studied,previous_scores\n1,2\n")
+        self.assertIn("file", self.upload(bad).json()["errors"])
+        self.assertEqual(self.upload(tenant="../x").status_code, 400)
+        self.assertEqual(self.upload(tenant="south").status_code, 404)
+
+    def test_stalled_job_is_requeued(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from performance.jobs import claim_next_job, requeue_stale
+        from performance.models import ScoringJob
+
+        job_id = self.upload().json()["id"]
+        self.assertEqual(str(claim_next_job().id), job_id)
+        self.assertIsNone(claim_next_job())
+
+        ScoringJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(str(claim_next_job().id), job_id)
+
+
+    def test_invalid_rows_are_reported_and_files_are_purged(self):
+        from datetime import timedelta
+
+        from django.core.management import call_command
+        from django.utils import timezone
+        from performance.jobs import purge_finished
+        from performance.models import ScoringJob
+
+        source = os.path.join(self.tmp.name, "blanks.csv")
+        with open(source, "w") as fh:
+            fh.write("Hours Studied,Previous Scores,Extracurricular Activities,Sleep Hours,"
+                     "Sample Question Papers Practiced\n6,78,Yes,7,3\n,78,Yes,7,3\n6,78,No,nan?,3\n")
+        job_id = self.upload(source).json()["id"]
+
+        call_command("run_jobs", "--once", stdout=io.StringIO())
+
+        job = ScoringJob.objects.get(id=job_id)
+        self.assertEqual(job.status, job.DONE)
+        self.assertEqual(job.rows_done, 3)
+        self.assertFalse(job.input_file)
+        scored = pd.read_csv(job.result_file.path, keep_default_na=False)
+        self.assertEqual(scored["errors"].tolist(), ["", "hours_studied: Required", "sleep_hours: Must be 0-24"])
+        self.assertNotEqual(scored["predicted_performance_index"][0], "")
+
+        self.assertEqual(purge_finished(), 0)
+        ScoringJob.objects.filter(id=job_id).update(finished_at=timezone.now() - timedelta(days=8))
+        result_path = job.result_file.path
+        self.assertEqual(purge_finished(), 1)
+        self.assertFalse(os.path.exists(result_path))
+        self.assertEqual(self.client.get(reverse("scoring-job", args=[job_id])).status_code, 404)
+
+class PercentileIndexTests(TestCase):
+    def setUp(self):
+        from performance import percentiles
+
+        percentiles.reset_index()
+        self.addCleanup(percentiles.reset_index)
+
+    def add(self, *scores):
+        from performance.models import StudentPerformance
+
+        for score in scores:
+            StudentPerformance.objects.create(hours_studied=5, previous_scores=70, extracurricular=False,
+                                              sleep_hours=7, sample_papers=3, performance_index=score)
+
+    def test_percentile_matches_mid_rank(self):
+        from performance.percentiles import PercentileIndex
+
+        self.add(10, 20, 30, 40, 50, 50, 60, 70, 80, 90)
+        index = PercentileIndex(refresh_interval=0, rebuild_interval=3600)
+        index.refresh()
+
+        self.assertEqual(index.percentile(5), 0.0)
+        self.assertEqual(index.percentile(50), 50.0)
+        self.assertEqual(index.percentile(55), 60.0)
+        self.assertEqual(index.percentile(95), 100.0)
+
+    def test_refresh_merges_new_rows_incrementally(self):
+        from performance.percentiles import PercentileIndex
+
+        self.add(10, 30, 50)
+        index = PercentileIndex(refresh_interval=0, rebuild_interval=3600)
+        index.refresh()
+        self.assertEqual(index.percentile(40), 66.7)
+
+        self.add(20, 40, 60)
+        with self.assertNumQueries(2):
+            self.assertEqual(index.percentile(45), 66.7)
+        self.assertEqual(index.values.tolist(), [10, 20, 30, 40, 50, 60])
+
+    def test_builds_off_the_request_path_and_survives_database_errors(self):
+        from django.db import DatabaseError
+
+        from performance.percentiles import PercentileIndex
+
+        self.add(10, 30, 50)
+        index = PercentileIndex(refresh_interval=0, rebuild_interval=3600)
+        with patch.object(PercentileIndex, "_start_rebuild") as start_rebuild, self.assertNumQueries(0):
+            self.assertIsNone(index.percentile(40))
+        start_rebuild.assert_called_once()
+
+        index.refresh()
+        with patch.object(PercentileIndex, "_fetch", side_effect=DatabaseError("no such table")), \
+                self.assertLogs("performance.percentiles", "WARNING") as logs:
+            self.assertEqual(index.percentile(40), 66.7)
+        self.assertIn("no such table", logs.output[0])
+
+        index.rebuilt_at -= 3600
+        with patch.object(PercentileIndex, "_start_rebuild") as start_rebuild, self.assertNumQueries(1):
+            self.assertEqual(index.percentile(40), 66.7)
+        start_rebuild.assert_called_once()
+
+    def test_prediction_reports_percentile(self):
+        from performance import percentiles
+
+        self.add(*range(0, 100, 5))
+        percentiles.get_index().refresh()
+        views.clear_model_cache()
+        with patch("joblib.load", return_value=make_bundle()):
+            body = self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                    content_type="application/json").json()
+        below = sum(score < body["predicted_performance_index"] for score in range(0, 100, 5))
+        self.assertAlmostEqual(body["percentile"], below / 20 * 100, delta=2.5)
+
+        with self.settings(PREDICT_PERCENTILES={"ENABLED": False}):
+            with patch("joblib.load", return_value=make_bundle()):
+                body = self.client.post(reverse("predict-performance"), data=FastPredictTests.student,
+                                        content_type="application/json").json()
+        self.assertIsNone(body["percentile"])
+
+    def test_cacheable_get_leaves_out_percentile(self):
+        self.add(*range(0, 100, 5))
+        views.clear_model_cache()
+        with patch("joblib.load", return_value=make_bundle()):
+            response = self.client.get(f"{reverse('predict-performance')}?{CacheablePredictTests.query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("percentile", response.json())
+
+
+class SimilarStudentsTests(TestCase):
+    def setUp(self):
+        from performance import neighbors
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "neighbors.npz")
+        for patcher in (patch.object(neighbors, "INDEX_PATH", self.path),
+                        patch.object(neighbors, "REFRESH_INTERVAL", 0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        neighbors.clear()
+        self.addCleanup(neighbors.clear)
+        self.rng = np.random.default_rng(0)
+
+    def add(self, count):
+        from performance.models import StudentPerformance
+
+        StudentPerformance.objects.bulk_create([
+            StudentPerformance(
+                hours_studied=int(self.rng.integers(0, 12)), previous_scores=int(self.rng.integers(40, 100)),
+                extracurricular=bool(self.rng.integers(0, 2)), sleep_hours=int(self.rng.integers(4, 10)),
+                sample_papers=int(self.rng.integers(0, 10)), performance_index=float(self.rng.uniform(0, 100)),
+            )
+            for _ in range(count)
+        ])
+
+    def brute_force(self, inputs, k):
+        from performance.models import StudentPerformance
+        from performance.neighbors import SCALE
+
+        rows = np.array(StudentPerformance.objects.order_by("id").values_list(
+            "id", "hours_studied", "previous_scores", "extracurricular", "sleep_hours", "sample_papers"))
+        distances = np.sqrt((((rows[:, 1:] - inputs) * SCALE) ** 2).sum(axis=1))
+        return np.sort(distances)[:k]
+
+    def test_query_matches_brute_force_including_delta_rows(self):
+        from performance import neighbors
+
+        self.add(400)
+        neighbors.build(self.path)
+        self.add(50)
+        index = neighbors.get_index(self.path)
+        self.assertEqual(len(index.delta[0]), 50)
+
+        for _ in range(25):
+            inputs = [int(self.rng.integers(0, 12)), int(self.rng.integers(40, 100)), int(self.rng.integers(0, 2)),
+                      int(self.rng.integers(4, 10)), int(self.rng.integers(0, 10))]
+            distances, ids, rows, _ = index.query(inputs, 7)
+            np.testing.assert_allclose(distances, self.brute_force(inputs, 7))
+            self.assertEqual(len(set(ids.tolist())), 7)
+
+    def test_requests_never_rewrite_the_index_and_reload_after_an_update(self):
+        from django.core.management import call_command
+        from performance import neighbors
+
+        self.add(100)
+        neighbors.build(self.path)
+        self.add(30)
+        with patch.object(neighbors.NeighborIndex, "save") as save, \
+                patch.object(neighbors.NeighborIndex, "merged") as merged:
+            index = neighbors.get_index(self.path)
+        save.assert_not_called()
+        merged.assert_not_called()
+        self.assertEqual(len(index.delta[0]), 30)
+        self.assertEqual(len(neighbors.NeighborIndex.load(self.path)), 100)
+
+        with patch.object(neighbors.NeighborIndex, "load", wraps=neighbors.NeighborIndex.load) as load:
+            neighbors.get_index(self.path)
+            load.assert_not_called()
+            call_command("build_neighbors", "--update", stdout=io.StringIO())
+            load.reset_mock()
+            os.utime(self.path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            index = neighbors.get_index(self.path)
+            load.assert_called_once()
+        self.assertEqual(len(index.delta[0]), 0)
+        self.assertEqual(len(index), 130)
+
+    def test_endpoint_returns_closest_students(self):
+        from django.core.management import call_command
+        from performance.models import StudentPerformance
+
+        url = reverse("similar-students")
+        student = dict(FastPredictTests.student, k=3)
+        self.assertEqual(self.client.post(url, data=student, content_type="application/json").status_code, 409)
+
+        self.add(200)
+        call_command("build_neighbors", stdout=io.StringIO())
+        target = StudentPerformance.objects.order_by("id").first()
+        student = {field: getattr(target, field) for field in FastPredictTests.student}
+        body = self.client.post(url, data=dict(student, k=3), content_type="application/json").json()
+
+        self.assertEqual(body["indexed_students"], 200)
+        self.assertEqual(len(body["neighbors"]), 3)
+        self.assertEqual(body["neighbors"][0]["distance"], 0)
+        self.assertEqual({k: body["neighbors"][0][k] for k in student}, student)
+        self.assertEqual(
+            self.client.post(url, data=dict(student, k=0), content_type="application/json").status_code, 400
+        )
@@ -0,0 +1,89 @@
+"""
+Content-addressed disk cache for training intermediates.
+
+Entries are keyed by a hash of everything that determines them (dataset
+content, feature code version, split seed), so a key never goes stale:
+changing any input simply produces a different key. Arrays are stored as
+``.npy`` files and memory-mapped on read. Least-recently-used entries
+are evicted once the cache grows past its size limit.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+CACHE_DIR = ".train_cache"
+MAX_BYTES = 2 * 1024 ** 3
+
+MANIFEST_FILE = "manifest.json"
+
+
+def cache_key(*parts) -> str:
+    """Stable key for the given inputs (anything with a deterministic ``repr``)."""
+    return hashlib.sha256(json.dumps([repr(part) for part in parts]).encode()).hexdigest()
+
+
+def _entry_size(entry_dir: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+
+
+def get(key: str, cache_dir: str = CACHE_DIR):
+    """The cached arrays and objects for ``key`` as one dict, or None on a miss."""
+    entry_dir = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(entry_dir, MANIFEST_FILE)) as fh:
+            manifest = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    # The manifest's mtime records the last use for LRU eviction
+    os.utime(os.path.join(entry_dir, MANIFEST_FILE))
+    entry = {name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r") for name in manifest["arrays"]}
+    if manifest["objects"]:
+        entry.update(joblib.load(os.path.join(entry_dir, "objects.joblib")))
+    return entry
+
+
+def put(key: str, arrays: dict, objects: dict = None, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+    """Store NumPy ``arrays`` (and small picklable ``objects``) under ``key``, then evict."""
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix=".staging-")
+    for name, values in arrays.items():
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(values))
+    if objects:
+        joblib.dump(objects, os.path.join(staging, "objects.joblib"))
+    with open(os.path.join(staging, MANIFEST_FILE), "w") as fh:
+        json.dump({"arrays": list(arrays), "objects": bool(objects), "created": time.time()}, fh)
+
+    try:
+        os.replace(staging, os.path.join(cache_dir, key))
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(staging, ignore_errors=True)
+    evict(cache_dir, max_bytes, keep=key)
+
+
+def evict(cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES, keep: str = None) -> list:
+    """Remove least-recently-used entries until the cache fits in ``max_bytes``."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        manifest = os.path.join(entry.path, MANIFEST_FILE)
+        if entry.is_dir() and os.path.exists(manifest):
+            entries.append((os.stat(manifest).st_mtime, entry.name, _entry_size(entry.path)))
+
+    total = sum(size for _, _, size in entries)
+    removed = []
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+        removed.append(name)
+    return removed
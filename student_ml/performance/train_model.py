@@ -1,165 +1,189 @@
+import copy
+import itertools
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import Ridge
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 
+from performance import train_cache
+from performance.dataset_cache import DATASET_PATH, content_hash, load_frame
+from performance.drift import reference_histograms
+from performance.inference import ENGINEERED_FEATURES, RAW_COLUMNS, engineer_features_array
+from performance.schema import DATASET_DTYPES, FEATURE_DTYPE
+
+FEATURE_COLUMNS = [
+    "Hours Studied", "Previous Scores", "Extracurricular Activities",
+    "Sleep Hours", "Sample Question Papers Practiced",
+    "study_efficiency", "sleep_quality", "balance_score",
+    "practice_intensity", "burnout_risk", "underprepared_risk",
+    "cognitive_capacity", "total_preparation", "study_sleep_interaction"
+]
+
+# Bump whenever engineer_features changes, so cached training intermediates are rebuilt
+FEATURE_VERSION = 2
+
+# Rows engineered at a time; the float64 intermediates only exist for one chunk
+FEATURE_CHUNK = 500000
+
+# Rows fetched from the database at a time by --source db
+DB_FETCH_CHUNK = 20000
+
+# Single-row predictions timed per tier in the --distill report
+LATENCY_REPEATS = 200
+
+SPLIT_SEED = 42
+TEST_SIZE = 0.2
+
+MODEL_PATH = "performance/model.pkl"
+
+# Partial ensemble written during budgeted training (train_model --time-budget)
+CHECKPOINT_PATH = "performance/model.checkpoint.pkl"
+CHECKPOINT_INTERVAL = 30.0
+
+# Arrays of a prepared split stored in the training cache
+SPLIT_ARRAYS = ("X_train", "X_test", "y_train", "y_test", "X_train_scaled", "X_test_scaled")
+
 
 def engineer_features(df):
-    """Create advanced features that capture realistic student behavior patterns."""
+    """Create advanced features that capture realistic student behavior patterns.
+    
+    Returns a frame with every column of ``FEATURE_COLUMNS`` as
+    ``FEATURE_DTYPE`` in one block, followed by the other columns of ``df``
+    (e.g. the target) unchanged.
+    """
     
     # Convert extracurricular to numeric if it's not already
-    if df["Extracurricular Activities"].dtype in ['object', 'str'] or not pd.api.types.is_numeric_dtype(df["Extracurricular Activities"]):
-        df["Extracurricular Activities"] = df["Extracurricular Activities"].map({"Yes": 1, "No": 0})
-    
-    # Study efficiency: balance between hours and previous performance
-    df["study_efficiency"] = df["Previous Scores"] / (df["Hours Studied"] + 1)
-    
-    # Sleep quality score: optimal sleep is 7-9 hours
-    df["sleep_quality"] = df["Sleep Hours"].apply(
-        lambda x: 1.0 if 7 <= x <= 9 else (
-            0.8 if 6 <= x < 7 or 9 < x <= 10 else (
-                0.5 if 5 <= x < 6 or 10 < x <= 11 else (
-                    0.2 if 4 <= x < 5 or 11 < x <= 12 else 0.0
-                )
-            )
-        )
-    )
+    extracurricular = df["Extracurricular Activities"]
+    if not pd.api.types.is_numeric_dtype(extracurricular) and not pd.api.types.is_bool_dtype(extracurricular):
+        extracurricular = extracurricular.map({"Yes": 1, "No": 0})
+    raw = [
+        extracurricular.to_numpy() if column == "Extracurricular Activities" else df[column].to_numpy()
+        for column in RAW_COLUMNS.values()
+    ]
     
-    # Balance score: combination of study, sleep, and activities
-    df["balance_score"] = (
-        (df["Hours Studied"] / 10) * 0.4 +
-        df["sleep_quality"] * 0.3 +
-        df["Extracurricular Activities"] * 0.3
-    )
+    # Computed in float64 like at serving time, then stored as float32 column by column
+    matrix = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=FEATURE_DTYPE, order="F")
+    for start in range(0, len(df), FEATURE_CHUNK):
+        chunk = slice(start, start + FEATURE_CHUNK)
+        features = engineer_features_array(*(values[chunk] for values in raw))
+        for position, column in enumerate(FEATURE_COLUMNS):
+            matrix[chunk, position] = features[column]
     
-    # Practice intensity: papers per study hour
-    df["practice_intensity"] = df["Sample Question Papers Practiced"] / (df["Hours Studied"] + 1)
+    engineered = pd.DataFrame(matrix, columns=FEATURE_COLUMNS, index=df.index, copy=False)
+    for column in df.columns:
+        if column not in engineered.columns:
+            engineered[column] = df[column]
+    return engineered
+
+
+def apply_realistic_constraints(predictions, features_df):
+    """Apply realistic constraints to ensure predictions make sense."""
+    pred = np.array(predictions, dtype=np.float64)
     
-    # Burnout risk: high study + low sleep
-    df["burnout_risk"] = ((df["Hours Studied"] > 10) & (df["Sleep Hours"] < 6)).astype(int)
+    # Get student features
+    hours_studied = features_df["Hours Studied"].to_numpy()
+    sleep_hours = features_df["Sleep Hours"].to_numpy()
+    previous_scores = features_df["Previous Scores"].to_numpy(dtype=np.float64)
+    sample_papers = features_df["Sample Question Papers Practiced"].to_numpy()
     
-    # Underpreparation risk: low study + low practice
-    df["underprepared_risk"] = ((df["Hours Studied"] < 3) & (df["Sample Question Papers Practiced"] < 2)).astype(int)
+    # Constraint 1: Extreme sleep deprivation (< 3 hours) - severe penalty
+    pred *= np.select([sleep_hours < 3, sleep_hours < 4, sleep_hours < 5], [0.3, 0.5, 0.7], default=1.0)
     
-    # Cognitive capacity: sleep hours affect learning capacity
-    df["cognitive_capacity"] = df["Sleep Hours"].apply(
-        lambda x: min(1.0, max(0.0, (x - 3) / 6))  # Linear scale from 3-9 hours
-    )
+    # Constraint 2: Excessive sleep (> 12 hours) - indicates issues
+    pred *= np.select([sleep_hours > 12, sleep_hours > 10], [0.6, 0.85], default=1.0)
     
-    # Total preparation score
-    df["total_preparation"] = (
-        df["Hours Studied"] * 0.3 +
-        df["Sample Question Papers Practiced"] * 2 +
-        df["Previous Scores"] * 0.2
-    )
+    # Constraint 3: No study at all - cannot perform well (max 50% of previous score)
+    pred = np.where(hours_studied == 0, np.minimum(pred, previous_scores * 0.5), pred)
     
-    # Interaction: study hours * sleep quality
-    df["study_sleep_interaction"] = df["Hours Studied"] * df["sleep_quality"]
+    # Constraint 4: Excessive study without sleep (burnout)
+    pred = np.where((hours_studied > 12) & (sleep_hours < 5), pred * 0.5, pred)
     
-    return df
-
-
-def apply_realistic_constraints(predictions, features_df):
-    """Apply realistic constraints to ensure predictions make sense."""
-    adjusted_predictions = predictions.copy()
+    # Constraint 5: No practice papers - limits performance
+    pred = np.where(sample_papers == 0, pred * 0.8, pred)
     
-    for i in range(len(predictions)):
-        pred = predictions[i]
-        
-        # Get student features
-        hours_studied = features_df.iloc[i]["Hours Studied"]
-        sleep_hours = features_df.iloc[i]["Sleep Hours"]
-        previous_scores = features_df.iloc[i]["Previous Scores"]
-        sample_papers = features_df.iloc[i]["Sample Question Papers Practiced"]
-        
-        # Constraint 1: Extreme sleep deprivation (< 3 hours) - severe penalty
-        if sleep_hours < 3:
-            pred *= 0.3  # 70% reduction
-        elif sleep_hours < 4:
-            pred *= 0.5  # 50% reduction
-        elif sleep_hours < 5:
-            pred *= 0.7  # 30% reduction
-        
-        # Constraint 2: Excessive sleep (> 12 hours) - indicates issues
-        if sleep_hours > 12:
-            pred *= 0.6  # 40% reduction
-        elif sleep_hours > 10:
-            pred *= 0.85  # 15% reduction
-        
-        # Constraint 3: No study at all - cannot perform well
-        if hours_studied == 0:
-            pred = min(pred, previous_scores * 0.5)  # Max 50% of previous score
-        
-        # Constraint 4: Excessive study without sleep (burnout)
-        if hours_studied > 12 and sleep_hours < 5:
-            pred *= 0.5  # Burnout penalty
-        
-        # Constraint 5: No practice papers - limits performance
-        if sample_papers == 0:
-            pred *= 0.8
-        
-        # Constraint 6: Low previous scores + low effort = low performance
-        if previous_scores < 40 and hours_studied < 3 and sample_papers < 2:
-            pred = min(pred, 35)
-        
-        # Constraint 7: Cannot exceed 100 or go below 0
-        pred = max(0, min(100, pred))
-        
-        # Constraint 8: Realistic improvement cap based on previous scores
-        max_improvement = previous_scores + 30
-        if pred > max_improvement:
-            pred = max_improvement
-        
-        adjusted_predictions[i] = pred
+    # Constraint 6: Low previous scores + low effort = low performance
+    pred = np.where((previous_scores < 40) & (hours_studied < 3) & (sample_papers < 2), np.minimum(pred, 35), pred)
+    
+    # Constraint 7: Cannot exceed 100 or go below 0
+    pred = np.clip(pred, 0, 100)
     
-    return adjusted_predictions
+    # Constraint 8: Realistic improvement cap based on previous scores
+    return np.minimum(pred, previous_scores + 30)
 
 
-def train():
-    """Train an advanced ML model with feature engineering and realistic constraints."""
-    
-    print("Loading dataset...")
-    df = pd.read_csv("dataset.csv")
+class NoTrainingRows(Exception):
+    pass
+
+
+def load_features_from_db(id_from=None, id_to=None, created_after=None, created_before=None,
+                          chunk_size=DB_FETCH_CHUNK):
+    """Read the stored feature matrix from StudentPerformance without re-engineering it.
     
-    print(f"Original dataset size: {len(df)} samples")
+    Rows can be limited to an inclusive id range and a ``created_at`` range.
+    They are streamed with ``values_list().iterator()`` straight into
+    preallocated ``FEATURE_DTYPE`` columns, ``chunk_size`` rows at a time, so
+    no model instances or per-row Python records outlive a chunk.
+    """
+    from performance.models import StudentPerformance
     
-    # Engineer advanced features
-    print("Engineering features...")
-    df = engineer_features(df)
+    fields = list(RAW_COLUMNS) + list(ENGINEERED_FEATURES) + ["performance_index"]
+    columns = [RAW_COLUMNS.get(field, field) for field in fields[:-1]]
     
-    # Prepare features and target
-    feature_columns = [
-        "Hours Studied", "Previous Scores", "Extracurricular Activities",
-        "Sleep Hours", "Sample Question Papers Practiced",
-        "study_efficiency", "sleep_quality", "balance_score",
-        "practice_intensity", "burnout_risk", "underprepared_risk",
-        "cognitive_capacity", "total_preparation", "study_sleep_interaction"
-    ]
+    rows = StudentPerformance.objects.all()
+    if id_from is not None:
+        rows = rows.filter(id__gte=id_from)
+    if id_to is not None:
+        rows = rows.filter(id__lte=id_to)
+    if created_after is not None:
+        rows = rows.filter(created_at__gte=created_after)
+    if created_before is not None:
+        rows = rows.filter(created_at__lt=created_before)
     
-    X = df[feature_columns]
-    y = df["Performance Index"]
+    missing = rows.filter(study_efficiency__isnull=True).count()
+    if missing:
+        print(f"Skipping {missing} rows without engineered features (run backfill_features)")
+    rows = rows.filter(study_efficiency__isnull=False)
     
-    # Split data
-    if len(df) < 10:
-        print("Dataset too small for proper validation. Using full dataset for training.")
-        X_train, X_test, y_train, y_test = X, X, y, y
-    else:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+    n_rows = rows.count()
+    if not n_rows:
+        raise NoTrainingRows("No stored rows with engineered features match the filters")
+    matrix = np.empty((n_rows, len(columns)), dtype=FEATURE_DTYPE, order="F")
+    target = np.empty(n_rows, dtype=DATASET_DTYPES["Performance Index"])
     
-    # Scale features for better performance
-    print("Scaling features...")
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    started = time.perf_counter()
+    position = 0
+    cursor = rows.order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+    while position < n_rows:
+        # Rows inserted after the count are left out
+        chunk = list(itertools.islice(cursor, min(chunk_size, n_rows - position)))
+        if not chunk:
+            break
+        values = np.array(chunk, dtype=np.float64)
+        matrix[position:position + len(chunk)] = values[:, :-1]
+        target[position:position + len(chunk)] = values[:, -1]
+        position += len(chunk)
+    seconds = time.perf_counter() - started
+    print(f"Fetched {position} rows in {seconds:.2f}s ({position / max(seconds, 1e-9):,.0f} rows/s)")
     
-    # Train Gradient Boosting model (better than Random Forest for this task)
-    print("Training Gradient Boosting model...")
-    model = GradientBoostingRegressor(
+    # Rows deleted after the count leave the tail unfilled
+    df = pd.DataFrame(matrix[:position], columns=columns, copy=False)
+    df["Performance Index"] = target[:position]
+    return df
+
+
+def make_model():
+    """Gradient Boosting model (better than Random Forest for this task)."""
+    return GradientBoostingRegressor(
         n_estimators=300,
         learning_rate=0.05,
         max_depth=5,
@@ -171,26 +195,430 @@ def train():
         n_iter_no_change=20,
         tol=0.0001
     )
+
+
+def make_distilled_models():
+    """Models for the distilled tiers (see model_registry.MODEL_TIERS), fitted to the full model's outputs."""
+    return {
+        # 40 depth-3 trees instead of up to 300 depth-5 trees
+        "fast": GradientBoostingRegressor(n_estimators=40, learning_rate=0.2, max_depth=3, random_state=42),
+        # One dot product; the engineered features already carry the piecewise sleep/effort terms
+        "linear": Ridge(alpha=1.0),
+    }
+
+
+def distill(model, X_train_scaled):
+    """Fit every distilled tier to the full model's raw predictions on the training rows."""
+    teacher = model.predict(X_train_scaled)
+    tiers = make_distilled_models()
+    for tier_model in tiers.values():
+        tier_model.fit(X_train_scaled, teacher)
+    return tiers
+
+
+def request_seconds(model, scaler, feature_columns, data: dict, repeats=LATENCY_REPEATS):
+    """Mean wall time of the single-request scoring path for ``data``.
+
+    Times what a prediction request runs after validation: feature
+    engineering, scaling, ``model.predict`` and the realistic constraints.
+    """
+    from performance.views import apply_realistic_constraints_single, engineer_features_for_prediction
+
+    def score():
+        features = engineer_features_for_prediction(data)[feature_columns].values
+        return apply_realistic_constraints_single(model.predict(scaler.transform(features))[0], data)
+
+    score()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        score()
+    return (time.perf_counter() - started) / repeats
+
+
+def report_tiers(model, tiers, split):
+    """Print each tier's test accuracy, its distance from the full model and its per-request latency."""
+    X_test_scaled, X_test, y_test = split["X_test_scaled"], split["X_test"], split["y_test"]
+    first = X_test.iloc[0]
+    data = {field: int(first[column]) for field, column in RAW_COLUMNS.items()}
+    data["extracurricular"] = bool(data["extracurricular"])
+    timed = {
+        name: request_seconds(tier_model, split["scaler"], FEATURE_COLUMNS, data)
+        for name, tier_model in [("full", model), *tiers.items()]
+    }
+    full_pred = apply_realistic_constraints(model.predict(X_test_scaled), X_test)
     
-    model.fit(X_train_scaled, y_train)
+    print("\n=== Model Tiers (test rows) ===")
+    print(f"{'tier':<8}{'test RMSE':>11}{'test R²':>9}{'RMSE vs full':>14}{'us/request':>12}{'speedup':>9}")
+    for name, tier_model in [("full", model), *tiers.items()]:
+        pred = apply_realistic_constraints(tier_model.predict(X_test_scaled), X_test)
+        rmse = np.sqrt(mean_squared_error(y_test, pred))
+        fidelity = np.sqrt(mean_squared_error(full_pred, pred))
+        print(f"{name:<8}{rmse:>11.4f}{r2_score(y_test, pred):>9.4f}{fidelity:>14.4f}"
+              f"{timed[name] * 1e6:>12.1f}{timed['full'] / timed[name]:>8.1f}x")
+
+
+def split_indices(n_rows):
+    """Row positions of the train/test split (the same rows train_test_split picks for X, y)."""
+    if n_rows < 10:
+        print("Dataset too small for proper validation. Using full dataset for training.")
+        return np.arange(n_rows), np.arange(n_rows)
+    return train_test_split(np.arange(n_rows), test_size=TEST_SIZE, random_state=SPLIT_SEED)
+
+
+def group_inputs(df):
+    """Group rows with identical raw inputs.
+
+    Returns the unique input rows (raw columns only) and, for every row of
+    ``df``, the position of its group.
+    """
+    keys = np.zeros(len(df), dtype=np.int64)
+    for column in RAW_COLUMNS.values():
+        values = df[column].to_numpy().astype(np.int64)
+        low = values.min() if len(values) else 0
+        # Mixed-radix key; the inputs are small bounded integers, so it fits in int64
+        keys = keys * (values.max() - low + 1 if len(values) else 1) + (values - low)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    unique = df[list(RAW_COLUMNS.values())].iloc[first].reset_index(drop=True)
+    return unique, inverse
+
+
+def fit_rows(df, train_idx):
+    """Fit the scaler and model on every training row. Returns (scaler, model)."""
+    df = engineer_features(df.copy())
+    X_train = df[FEATURE_COLUMNS].iloc[train_idx]
+    y_train = df["Performance Index"].iloc[train_idx]
     
-    # Evaluate model
-    print("\n=== Model Evaluation ===")
-    train_pred = model.predict(X_train_scaled)
-    test_pred = model.predict(X_test_scaled)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    model = make_model()
+    model.fit(X_train_scaled, y_train)
+    return scaler, model
+
+
+def fit_deduplicated(unique, inverse, target, train_idx, model=None, monitor=None):
+    """Fit on one row per distinct input with its mean target, weighted by its count.
+
+    Weighted squared error over (mean, count) equals the squared error over
+    the original rows up to a constant, so split gains are the same. The
+    result only approximates a row-level fit, though: ``min_samples_leaf``,
+    ``min_samples_split``, ``subsample`` and the early-stopping
+    ``validation_fraction`` count distinct rows, not weights. ``--compare``
+    reports how far the two fits end up apart.
+    """
+    counts = np.bincount(inverse[train_idx], minlength=len(unique))
+    sums = np.bincount(inverse[train_idx], weights=target[train_idx], minlength=len(unique))
+    present = counts > 0
     
-    # Apply realistic constraints
-    train_pred = apply_realistic_constraints(train_pred, X_train.reset_index(drop=True))
-    test_pred = apply_realistic_constraints(test_pred, X_test.reset_index(drop=True))
+    X_train = engineer_features(unique[present].reset_index(drop=True))[FEATURE_COLUMNS]
+    y_train = sums[present] / counts[present]
+    weights = counts[present]
     
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train, sample_weight=weights)
+    model = model if model is not None else make_model()
+    model.fit(X_train_scaled, y_train, sample_weight=weights, monitor=monitor)
+    return scaler, model
+
+
+def predict_rows(scaler, model, unique, inverse):
+    """Constrained predictions for every original row, computed once per distinct input."""
+    X_unique = engineer_features(unique.copy())[FEATURE_COLUMNS]
+    predictions = model.predict(scaler.transform(X_unique))
+    predictions = apply_realistic_constraints(predictions, X_unique)
+    return predictions[inverse]
+
+
+def measure(fit, *args):
+    """Run ``fit`` and return its result with wall time and peak traced memory."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fit(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, time.perf_counter() - started, peak
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def print_metrics(y_train, train_pred, y_test, test_pred, validated=True):
     print(f"Training R² Score: {r2_score(y_train, train_pred):.4f}")
     print(f"Training RMSE: {np.sqrt(mean_squared_error(y_train, train_pred)):.4f}")
     print(f"Training MAE: {mean_absolute_error(y_train, train_pred):.4f}")
     
-    if len(df) >= 10:
+    if validated:
         print(f"\nTest R² Score: {r2_score(y_test, test_pred):.4f}")
         print(f"Test RMSE: {np.sqrt(mean_squared_error(y_test, test_pred)):.4f}")
         print(f"Test MAE: {mean_absolute_error(y_test, test_pred):.4f}")
+
+
+def train_deduplicated(df, compare=False, model=None, monitor=None):
+    """Fit on grouped inputs; metrics are still computed over every original row."""
+    
+    train_idx, test_idx = split_indices(len(df))
+    target = df["Performance Index"].to_numpy(dtype=np.float64)
+    
+    print("Grouping identical inputs...")
+    unique, inverse = group_inputs(df)
+    distinct = len(np.unique(inverse[train_idx]))
+    print(f"Training rows: {len(train_idx)} -> {distinct} distinct inputs")
+    
+    print("Training Gradient Boosting model on weighted distinct inputs...")
+    (scaler, model), fit_seconds, fit_peak = measure(
+        fit_deduplicated, unique, inverse, target, train_idx, model, monitor
+    )
+    predictions = predict_rows(scaler, model, unique, inverse)
+    
+    print("\n=== Model Evaluation (original rows) ===")
+    print_metrics(target[train_idx], predictions[train_idx], target[test_idx], predictions[test_idx],
+                  validated=len(df) >= 10)
+    
+    runs = [("deduplicated", distinct, fit_seconds, fit_peak, predictions)]
+    if compare:
+        print("\nTraining row-level model for comparison...")
+        (row_scaler, row_model), row_seconds, row_peak = measure(fit_rows, df, train_idx)
+        runs.append(("every row", len(train_idx), row_seconds, row_peak,
+                     predict_rows(row_scaler, row_model, unique, inverse)))
+    
+    print("\n=== Deduplicated vs Row-level Fit ===")
+    print(f"{'fit':<14}{'rows':>12}{'seconds':>10}{'peak MB':>10}{'test RMSE':>11}{'test R²':>9}")
+    for label, rows, seconds, peak, run_predictions in runs:
+        rmse = np.sqrt(mean_squared_error(target[test_idx], run_predictions[test_idx]))
+        r2 = r2_score(target[test_idx], run_predictions[test_idx])
+        print(f"{label:<14}{rows:>12}{seconds:>10.2f}{peak / 1e6:>10.1f}{rmse:>11.4f}{r2:>9.4f}")
+    
+    if compare:
+        dedup_predictions, row_predictions = runs[0][4], runs[1][4]
+        gap = np.sqrt(mean_squared_error(row_predictions[test_idx], dedup_predictions[test_idx]))
+        print(f"Prediction gap on test rows (RMSE between the fits): {gap:.4f}; "
+              f"max {np.abs(row_predictions[test_idx] - dedup_predictions[test_idx]).max():.4f}")
+    
+    return scaler, model, train_idx
+
+
+class TrainingMonitor:
+    """``GradientBoostingRegressor.fit(monitor=...)`` callback for budgeted training.
+    
+    Reports progress and validation RMSE per stage, checkpoints the fitted
+    stages every ``checkpoint_interval`` seconds, and stops fitting before
+    another stage would take training past ``time_budget`` seconds.
+    """
+    
+    def __init__(self, time_budget=None, checkpoint=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                 report_interval=1.0):
+        self.time_budget = time_budget
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.report_interval = report_interval
+        self.started = time.perf_counter()
+        self.last_checkpoint = self.started
+        self.last_report = None
+        self.last_stage = None
+        self.stages = 0
+        self.budget_exhausted = False
+        self.validation_rmse = None
+        self._val_raw = None
+    
+    def _validation_rmse(self, stage, model, fit_locals):
+        X_val, y_val = fit_locals.get("X_val"), fit_locals.get("y_val")
+        if X_val is None:
+            return None
+        if self._val_raw is None:
+            # Resumed fits start with stages already in the ensemble
+            self._val_raw = model.init_.predict(X_val).astype(np.float64)
+            for fitted in range(stage):
+                self._val_raw += model.learning_rate * model.estimators_[fitted, 0].predict(X_val)
+        self._val_raw += model.learning_rate * model.estimators_[stage, 0].predict(X_val)
+        squared_error = (y_val - self._val_raw) ** 2
+        return float(np.sqrt(np.average(squared_error, weights=fit_locals.get("sample_weight_val"))))
+    
+    def __call__(self, stage, model, fit_locals):
+        now = time.perf_counter()
+        # The first stage's time also covers data preparation, which overestimates it
+        per_stage = now - (self.last_stage or self.started)
+        self.last_stage = now
+        self.stages = stage + 1
+        self.validation_rmse = self._validation_rmse(stage, model, fit_locals)
+        elapsed = now - self.started
+        
+        if self.last_report is None or now - self.last_report >= self.report_interval:
+            self.last_report = now
+            validation = "" if self.validation_rmse is None else f"  val RMSE {self.validation_rmse:.4f}"
+            print(f"Stage {stage + 1}/{model.n_estimators}{validation}  {elapsed:.1f}s ({per_stage:.3f}s last stage)")
+        
+        self.budget_exhausted = self.time_budget is not None and elapsed + per_stage > self.time_budget
+        if self.checkpoint is not None and (self.budget_exhausted or now - self.last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint(truncated_model(model, stage + 1))
+            self.last_checkpoint = time.perf_counter()
+        if self.budget_exhausted:
+            print(f"Time budget of {self.time_budget:.0f}s reached after {stage + 1} stages; stopping")
+        return self.budget_exhausted
+
+
+def truncated_model(model, stages):
+    """A copy of ``model`` holding only its first ``stages`` fitted stages."""
+    truncated = copy.copy(model)
+    truncated.estimators_ = model.estimators_[:stages]
+    truncated.train_score_ = model.train_score_[:stages]
+    if hasattr(model, "oob_improvement_"):
+        truncated.oob_improvement_ = model.oob_improvement_[:stages]
+        truncated.oob_scores_ = model.oob_scores_[:stages]
+        truncated.oob_score_ = truncated.oob_scores_[-1]
+    truncated.n_estimators_ = stages
+    return truncated
+
+
+def checkpoint_context(source, dedupe, dataset_path=DATASET_PATH, db_filters=None):
+    """What a checkpoint was trained on; resuming requires the same context."""
+    context = {
+        "source": source,
+        "dedupe": dedupe,
+        "dataset": content_hash(dataset_path) if source == "csv" else None,
+        "feature_version": FEATURE_VERSION,
+    }
+    filters = {name: str(value) for name, value in (db_filters or {}).items()
+               if value is not None and name != "chunk_size"}
+    if source == "db" and filters:
+        context["db_filters"] = filters
+    return context
+
+
+def write_checkpoint(model, context, path=CHECKPOINT_PATH):
+    tmp_path = f"{path}.tmp"
+    joblib.dump({"model": model, "context": context, "stages": model.n_estimators_}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class CheckpointMismatch(Exception):
+    pass
+
+
+def load_checkpoint(context, path=CHECKPOINT_PATH):
+    """The checkpointed model, set up to keep adding stages with ``warm_start``."""
+    checkpoint = joblib.load(path)
+    if checkpoint["context"] != context:
+        raise CheckpointMismatch(
+            f"Checkpoint {path} was trained on {checkpoint['context']}, not {context}; "
+            "retrain without --resume"
+        )
+    model = checkpoint["model"]
+    model.set_params(warm_start=True, n_estimators=make_model().n_estimators)
+    print(f"Resuming from {checkpoint['stages']} checkpointed stages")
+    return model
+
+
+def split_cache_key(dataset_path=DATASET_PATH):
+    """Training-cache key for the engineered, split and scaled CSV dataset."""
+    return train_cache.cache_key(
+        content_hash(dataset_path), FEATURE_VERSION, FEATURE_COLUMNS, SPLIT_SEED, TEST_SIZE
+    )
+
+
+def store_split(key, split, cache_dir=train_cache.CACHE_DIR):
+    train_cache.put(
+        key,
+        {name: np.asarray(split[name]) for name in SPLIT_ARRAYS},
+        {"scaler": split["scaler"], "validated": split["validated"]},
+        cache_dir=cache_dir,
+    )
+
+
+def load_split(key, cache_dir=train_cache.CACHE_DIR):
+    """A cached split with the feature frames rebuilt over memory-mapped arrays, or None."""
+    entry = train_cache.get(key, cache_dir)
+    if entry is None:
+        return None
+    for name in ("X_train", "X_test"):
+        entry[name] = pd.DataFrame(entry[name], columns=FEATURE_COLUMNS, copy=False)
+    return entry
+
+
+def train(source="csv", dedupe=False, compare=False, use_cache=True, time_budget=None, resume=False,
+          checkpoint_interval=CHECKPOINT_INTERVAL, dataset_path=DATASET_PATH, model_path=MODEL_PATH,
+          checkpoint_path=CHECKPOINT_PATH, db_filters=None, distill_tiers=False):
+    """Train an advanced ML model with feature engineering and realistic constraints.
+    
+    With ``dedupe``, rows with identical inputs are collapsed into one
+    weighted row before fitting; ``compare`` also fits on every row and
+    reports time, memory and accuracy side by side. Row-level training from
+    the CSV reuses the engineered, split and scaled arrays from the training
+    cache unless ``use_cache`` is False.
+    
+    With ``time_budget`` (seconds since training started) or ``resume``,
+    stages are reported as they are fitted and checkpointed to
+    ``CHECKPOINT_PATH``; fitting stops before the budget runs out and the
+    stages fitted so far are saved as a normal bundle. ``resume`` continues
+    from the checkpoint.
+    
+    The path arguments let a tenant train on its own dataset into its own
+    artifact directory. ``db_filters`` holds the ``load_features_from_db``
+    keyword arguments for ``source="db"``.
+    
+    ``distill_tiers`` also fits the small models of ``make_distilled_models``
+    to the full model's outputs, stores them in the bundle under ``tiers``
+    and reports the accuracy each gives up for its latency.
+    """
+    
+    if distill_tiers and dedupe:
+        raise ValueError("Distilled tiers are fitted on the row-level split; train without dedupe")
+    
+    context = checkpoint_context(source, dedupe, dataset_path, db_filters)
+    model = load_checkpoint(context, checkpoint_path) if resume else None
+    monitor = None
+    if time_budget is not None or resume:
+        monitor = TrainingMonitor(
+            time_budget,
+            checkpoint=lambda partial: write_checkpoint(partial, context, checkpoint_path),
+            checkpoint_interval=checkpoint_interval,
+        )
+    
+    split = None
+    cache_key = None
+    if source == "csv" and not dedupe and use_cache:
+        cache_key = split_cache_key(dataset_path)
+        split = load_split(cache_key)
+        if split is not None:
+            print("Loaded engineered features, split and scaler from the training cache")
+    
+    if split is None and source == "db":
+        print("Loading feature matrix from database...")
+        df = load_features_from_db(**(db_filters or {}))
+        print(f"Original dataset size: {len(df)} samples")
+    elif split is None:
+        print("Loading dataset...")
+        df = load_frame(dataset_path, columns=list(RAW_COLUMNS.values()) + ["Performance Index"])
+        
+        print(f"Original dataset size: {len(df)} samples")
+        
+        if not dedupe:
+            # Engineer advanced features
+            print("Engineering features...")
+            df = engineer_features(df)
+    
+    # Prepare features and target
+    feature_columns = FEATURE_COLUMNS
+    
+    if dedupe:
+        scaler, model, train_idx = train_deduplicated(df, compare=compare, model=model, monitor=monitor)
+        X_train = df.iloc[train_idx]
+    else:
+        if split is None:
+            split = prepare_split(df)
+            if cache_key is not None:
+                store_split(cache_key, split)
+        scaler, model, X_train = train_rows(split, model=model, monitor=monitor)
+    
+    tiers = {}
+    if distill_tiers:
+        print("\nDistilling fast tiers from the full model...")
+        tiers = distill(model, split["X_train_scaled"])
+        report_tiers(model, tiers, split)
     
     # Feature importance
     print("\n=== Top 10 Feature Importance ===")
@@ -200,13 +628,83 @@ def train():
     }).sort_values('importance', ascending=False)
     print(feature_importance.head(10).to_string(index=False))
     
+    # Reference input distributions for the drift monitor
+    drift_reference = reference_histograms({field: X_train[column].to_numpy() for field, column in RAW_COLUMNS.items()})
+    
     # Save model and scaler
     print("\nSaving model and scaler...")
     joblib.dump({
         'model': model,
         'scaler': scaler,
-        'feature_columns': feature_columns
-    }, "performance/model.pkl")
+        'feature_columns': feature_columns,
+        'drift_reference': drift_reference,
+        'tiers': tiers
+    }, model_path)
+    
+    if monitor is not None:
+        if monitor.budget_exhausted:
+            print(f"Saved {model.n_estimators_} stages; run with --resume to keep fitting from {checkpoint_path}")
+        elif os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
     
+    print(f"Peak memory: {peak_rss_mb():.0f} MB")
     print("\n✓ Advanced model trained and saved successfully!")
     print("Model includes: Feature engineering, realistic constraints, and bias mitigation")
+
+
+def prepare_split(df):
+    """Split the engineered frame and fit the scaler: everything ``model.fit`` needs."""
+    
+    feature_columns = FEATURE_COLUMNS
+    
+    X = df[feature_columns]
+    y = df["Performance Index"]
+    
+    # Split data
+    if len(df) < 10:
+        print("Dataset too small for proper validation. Using full dataset for training.")
+        X_train, X_test, y_train, y_test = X, X, y, y
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=TEST_SIZE, random_state=SPLIT_SEED
+        )
+    
+    # Scale features for better performance
+    print("Scaling features...")
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    return {
+        "X_train": X_train.reset_index(drop=True),
+        "X_test": X_test.reset_index(drop=True),
+        "y_train": y_train.to_numpy(),
+        "y_test": y_test.to_numpy(),
+        "X_train_scaled": X_train_scaled,
+        "X_test_scaled": X_test_scaled,
+        "scaler": scaler,
+        "validated": len(df) >= 10,
+    }
+
+
+def train_rows(split, model=None, monitor=None):
+    """Fit and evaluate on every row of a prepared split."""
+    
+    # Train Gradient Boosting model (better than Random Forest for this task)
+    print("Training Gradient Boosting model...")
+    model = model if model is not None else make_model()
+    
+    model.fit(split["X_train_scaled"], split["y_train"], monitor=monitor)
+    
+    # Evaluate model
+    print("\n=== Model Evaluation ===")
+    train_pred = model.predict(split["X_train_scaled"])
+    test_pred = model.predict(split["X_test_scaled"])
+    
+    # Apply realistic constraints
+    train_pred = apply_realistic_constraints(train_pred, split["X_train"])
+    test_pred = apply_realistic_constraints(test_pred, split["X_test"])
+    
+    print_metrics(split["y_train"], train_pred, split["y_test"], test_pred, validated=split["validated"])
+    
+    return split["scaler"], model, split["X_train"]
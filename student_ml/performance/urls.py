@@ -1,7 +1,33 @@
 from django.urls import path
 
-from .views import predict_performance
+from .views import (
+    admission_stats,
+    create_scoring_job,
+    drift_stats,
+    explain_prediction,
+    model_cache_stats,
+    plan_performance,
+    predict_performance,
+    predict_performance_fast,
+    predict_stream,
+    profile_stats,
+    scoring_job,
+    scoring_job_result,
+    similar_students,
+)
 
 urlpatterns = [
     path("predict/", predict_performance, name="predict-performance"),
+    path("predict/plan/", plan_performance, name="plan-performance"),
+    path("predict/fast/", predict_performance_fast, name="predict-performance-fast"),
+    path("predict/stream/", predict_stream, name="predict-stream"),
+    path("predict/explain/", explain_prediction, name="explain-prediction"),
+    path("predict/similar/", similar_students, name="similar-students"),
+    path("jobs/", create_scoring_job, name="scoring-jobs"),
+    path("jobs/<uuid:job_id>/", scoring_job, name="scoring-job"),
+    path("jobs/<uuid:job_id>/result/", scoring_job_result, name="scoring-job-result"),
+    path("ops/profile/", profile_stats, name="profile-stats"),
+    path("ops/admission/", admission_stats, name="admission-stats"),
+    path("ops/drift/", drift_stats, name="drift-stats"),
+    path("ops/models/", model_cache_stats, name="model-cache-stats"),
 ]
@@ -1,15 +1,130 @@
-import joblib
-import numpy as np
-import pandas as pd
+import hashlib
+import os
+import re
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponsePermanentRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
+from . import codec, jobs, model_registry
+from .admission import admission_control, get_limiter
+from .models import ScoringJob
+from .profiling import aggregate as profile_aggregate
+from .profiling import get_config as get_profiler_config
+from .rules import classify_student, validate_input
+
 MODEL_PATH = "performance/model.pkl"
 
+MODEL_NOT_FOUND = {"error": "Model not found. Train the model first."}
+
+# NumPy, pandas, joblib and scikit-learn are imported by the functions that use
+# them, so loading URLs for migrate/check or booting a worker stays cheap.
+
+
+def preload_modules():
+    """Import everything the views load lazily, e.g. once before forking workers."""
+    import joblib  # noqa: F401
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import sklearn  # noqa: F401
+
+    from . import drift, explain, neighbors, percentiles, planner  # noqa: F401
+
+
+def model_path(tenant: str = None) -> str:
+    """Artifact path of ``tenant``'s model, or of the default model when no tenant is given."""
+    if tenant is None:
+        return MODEL_PATH
+    return model_registry.tenant_model_path(tenant)
+
+
+def model_not_found(tenant: str = None):
+    """``(payload, status)`` for a missing model: a server error by default, 404 for an unknown tenant."""
+    if tenant is None:
+        return MODEL_NOT_FOUND, 500
+    return {"error": f"No model for tenant '{tenant}'."}, 404
+
+
+def tenant_errors(data: dict) -> dict:
+    """Validation errors for the optional ``tenant`` routing field."""
+    tenant = data.get("tenant")
+    if tenant is None:
+        return {}
+    try:
+        model_registry.validate_tenant(tenant)
+    except model_registry.InvalidTenant as exc:
+        return {"tenant": str(exc)}
+    return {}
+
+
+def tier_errors(data: dict) -> dict:
+    """Validation errors for the optional ``tier`` routing field."""
+    tier = data.get("tier")
+    if tier is None:
+        return {}
+    try:
+        model_registry.validate_tier(tier)
+    except model_registry.InvalidTier as exc:
+        return {"tier": str(exc)}
+    return {}
+
+
+def tier_not_found(tier: str):
+    """``(payload, status)`` for a tier the model was trained without."""
+    return {"error": f"Model has no '{tier}' tier. Train it with `train_model --distill`."}, 404
+
+
+def load_model_bundle(path: str = MODEL_PATH, tenant: str = model_registry.DEFAULT_TENANT) -> dict:
+    """Load a trained model bundle through the shared LRU cache, reloading when the file changes."""
+    return model_registry.get_cache().load(path, tenant)
+
+
+def clear_model_cache():
+    """Drop cached model bundles so the next request reloads from disk."""
+    model_registry.get_cache().clear()
+    _version_cache.clear()
+    _explainers.clear()
+    explain_input.cache_clear()
+
+
+_version_cache = {}
+
+
+def model_version(path: str = MODEL_PATH) -> str:
+    """Short content hash of the model file, recomputed only when the file changes."""
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _version_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    version = digest.hexdigest()[:16]
+    _version_cache[path] = (signature, version)
+    return version
+
 
-def engineer_features_for_prediction(data: dict) -> pd.DataFrame:
+def engineer_features_for_prediction(data: dict) -> "pandas.DataFrame":
     """Engineer features for a single prediction matching training features."""
+    import pandas as pd
+
+    from .schema import FEATURE_DTYPE
     
     # Base features
     hours_studied = data["hours_studied"]
@@ -57,7 +172,7 @@ def engineer_features_for_prediction(data: dict) -> pd.DataFrame:
         "cognitive_capacity": cognitive_capacity,
         "total_preparation": total_preparation,
         "study_sleep_interaction": study_sleep_interaction
-    }])
+    }], dtype=FEATURE_DTYPE)
     
     return features_df
 
@@ -158,283 +273,41 @@ def apply_realistic_constraints_single(prediction: float, data: dict) -> float:
     return pred
 
 
-def classify_student(data: dict, predicted_score: float) -> dict:
-    """Advanced student classification with detailed insights and high-level logic."""
-    hours_studied = data.get("hours_studied", 0)
-    sleep_hours = data.get("sleep_hours", 0)
-    previous_scores = data.get("previous_scores", 0)
-    sample_papers = data.get("sample_papers", 0)
-    extracurricular = data.get("extracurricular", False)
-    
-    warnings = []
-    recommendations = []
-    risk_level = "Low"
-    
-    # ============ CRITICAL/IMPOSSIBLE SCENARIOS ============
-    
-    # Zero sleep - medical emergency
-    if sleep_hours == 0:
-        warnings.append("Zero sleep = cannot function")
-        recommendations.append("Get sleep immediately")
-        risk_level = "Critical"
-        classification = "Medical Emergency"
-        description = "Cannot perform without sleep."
-        return {
-            "classification": classification,
-            "description": description,
-            "risk_level": risk_level,
-            "warnings": warnings,
-            "recommendations": recommendations,
-            "performance_gap": round(predicted_score - previous_scores, 2)
-        }
-    
-    # Zero study with zero practice - complete failure
-    if hours_studied == 0 and sample_papers == 0:
-        warnings.append("No preparation")
-        recommendations.append("Start studying now")
-        risk_level = "Critical"
-        classification = "Unprepared - Failing"
-        description = "Will fail without preparation."
-        return {
-            "classification": classification,
-            "description": description,
-            "risk_level": risk_level,
-            "warnings": warnings,
-            "recommendations": recommendations,
-            "performance_gap": round(predicted_score - previous_scores, 2)
-        }
-    
-    # Excessive sleep (>14 hours) - health crisis
-    if sleep_hours > 14:
-        warnings.append("Excessive sleep (>14h)")
-        recommendations.append("Consult a doctor")
-        risk_level = "Critical"
-        classification = "Health Crisis"
-        description = "May indicate health issues."
-        return {
-            "classification": classification,
-            "description": description,
-            "risk_level": risk_level,
-            "warnings": warnings,
-            "recommendations": recommendations,
-            "performance_gap": round(predicted_score - previous_scores, 2)
-        }
-    
-    # ============ SEVERE SCENARIOS ============
-    
-    if sleep_hours < 3:
-        warnings.append("Severe sleep deprivation")
-        recommendations.append("Get 7-8 hours sleep")
-        risk_level = "Critical"
-    elif sleep_hours < 4:
-        warnings.append("Dangerous sleep levels")
-        recommendations.append("Increase sleep to 6-7h")
-        risk_level = "Critical"
-    elif sleep_hours < 5:
-        warnings.append("Low sleep affects cognition")
-        recommendations.append("Increase sleep")
-        risk_level = "High"
-    
-    if hours_studied > 12 and sleep_hours < 6:
-        warnings.append("Burnout risk")
-        recommendations.append("Reduce study, rest more")
-        risk_level = "High" if risk_level != "Critical" else risk_level
-    
-    if sleep_hours > 12:
-        warnings.append("Oversleeping")
-        recommendations.append("Check health")
-        risk_level = "Medium" if risk_level == "Low" else risk_level
-    
-    if hours_studied == 0:
-        warnings.append("No study time")
-        recommendations.append("Study 4-5h daily")
-        risk_level = "High" if risk_level not in ["Critical"] else risk_level
-    elif hours_studied < 2:
-        warnings.append("Insufficient study")
-        recommendations.append("Study 3-4h daily")
-        risk_level = "High" if risk_level == "Low" else risk_level
-    
-    if sample_papers == 0:
-        recommendations.append("Practice sample papers")
-    
-    # ============ CLASSIFICATION LOGIC ============
-    
-    # Priority order: most severe first
-    if sleep_hours < 3:
-        classification = "Sleep Deprived - Critical"
-        description = "Dangerously low sleep."
-    elif hours_studied > 10 and sleep_hours < 5:
-        classification = "Burnout - Critical"
-        description = "Overworking without rest."
-    elif sleep_hours < 5:
-        classification = "Sleep Deprived"
-        description = "Low sleep affects performance."
-    elif hours_studied == 0:
-        classification = "No Preparation"
-        description = "No study time recorded."
-    elif hours_studied < 2 and sample_papers < 2 and previous_scores < 50:
-        classification = "At Risk - Failing"
-        description = "Likely to fail."
-    elif hours_studied < 2 and sample_papers < 2:
-        classification = "At Risk"
-        description = "Needs more preparation."
-    elif sleep_hours > 12:
-        classification = "Oversleeping"
-        description = "May indicate health issues."
-    elif hours_studied >= 7 and sample_papers >= 5 and 6 <= sleep_hours <= 9:
-        classification = "High Performer"
-        description = "Excellent balance."
-    elif 4 <= hours_studied <= 8 and 7 <= sleep_hours <= 9 and extracurricular:
-        classification = "Balanced Student"
-        description = "Good work-life balance."
-    elif hours_studied > 9 and not extracurricular and sleep_hours >= 6:
-        classification = "Dedicated Learner"
-        description = "Strong focus on academics."
-    elif hours_studied < 3 and sleep_hours >= 8:
-        classification = "Underprepared"
-        description = "Needs more study time."
-    elif hours_studied >= 4 and sample_papers >= 3 and sleep_hours >= 6:
-        classification = "Adequate Preparation"
-        description = "Room for improvement."
-    else:
-        classification = "Average Student"
-        description = "Standard preparation."
-    
-    # Performance gap analysis
-    performance_gap = predicted_score - previous_scores
-    if performance_gap > 10:
-        recommendations.append("Keep it up!")
-    elif performance_gap < -10:
-        recommendations.append("Review study methods")
-        risk_level = "High" if risk_level == "Low" else risk_level
-    elif performance_gap < -5:
-        recommendations.append("Performance declining")
-        risk_level = "Medium" if risk_level == "Low" else risk_level
+def percentile_rank(prediction: float):
+    """Percentile of ``prediction`` among stored outcomes, or None when disabled or there are none."""
+    from . import percentiles
     
-    return {
-        "classification": classification,
-        "description": description,
-        "risk_level": risk_level,
-        "warnings": warnings,
-        "recommendations": recommendations,
-        "performance_gap": round(performance_gap, 2)
-    }
+    if not percentiles.get_config()["ENABLED"]:
+        return None
+    return percentiles.get_index().percentile(prediction)
 
 
-def validate_input(data: dict) -> dict:
-    """Enhanced validation with realistic constraint checking."""
-    errors = {}
-    warnings = []
-    
-    if "hours_studied" not in data:
-        errors["hours_studied"] = "Required"
-    elif not isinstance(data["hours_studied"], int) or not (0 <= data["hours_studied"] <= 24):
-        errors["hours_studied"] = "Must be 0-24"
-    elif data["hours_studied"] > 16:
-        warnings.append("16h+ study is unhealthy")
-    
-    if "previous_scores" not in data:
-        errors["previous_scores"] = "Required"
-    elif not isinstance(data["previous_scores"], int) or not (0 <= data["previous_scores"] <= 100):
-        errors["previous_scores"] = "Must be 0-100"
-    
-    if "extracurricular" not in data:
-        errors["extracurricular"] = "Required"
-    elif not isinstance(data["extracurricular"], bool):
-        errors["extracurricular"] = "Must be true or false"
-    
-    if "sleep_hours" not in data:
-        errors["sleep_hours"] = "Required"
-    elif not isinstance(data["sleep_hours"], int) or not (0 <= data["sleep_hours"] <= 24):
-        errors["sleep_hours"] = "Must be 0-24"
-    elif data["sleep_hours"] < 3:
-        warnings.append("<3h sleep is dangerous")
-    elif data["sleep_hours"] > 12:
-        warnings.append(">12h sleep may indicate issues")
-    
-    if "sample_papers" not in data:
-        errors["sample_papers"] = "Required"
-    elif not isinstance(data["sample_papers"], int) or not (0 <= data["sample_papers"] <= 20):
-        errors["sample_papers"] = "Must be 0-20"
-    
-    # Cross-field validation - provide warnings for extreme scenarios instead of blocking
-    if not errors:
-        hours_studied = data.get("hours_studied", 0)
-        sleep_hours = data.get("sleep_hours", 0)
-        sample_papers = data.get("sample_papers", 0)
-        total_hours = hours_studied + sleep_hours
-        
-        # Allow but warn about impossible time combinations
-        if total_hours > 24:
-            warnings.append(f"Impossible: {total_hours}h total exceeds 24h/day")
-        
-        # Minimum realistic time for other activities
-        if total_hours > 22 and total_hours <= 24:
-            warnings.append(f"Only {24 - total_hours}h left for other activities")
-        
-        # Zero sleep warning
-        if sleep_hours == 0:
-            warnings.append("Zero sleep = cannot function")
-        elif sleep_hours == 1:
-            warnings.append("1h sleep = severe impairment")
-        elif sleep_hours == 2:
-            warnings.append("2h sleep = extreme fatigue")
-        
-        # Excessive study warning
-        if hours_studied >= 20:
-            warnings.append("20h+ study = physically impossible")
-        elif hours_studied >= 16:
-            warnings.append("16h+ study = extreme burnout")
-        elif hours_studied >= 14:
-            warnings.append("14h+ study = unsustainable")
-        
-        # Burnout combinations
-        if hours_studied > 12 and sleep_hours < 4:
-            warnings.append("Burnout crisis: too much study, no rest")
-        elif hours_studied > 10 and sleep_hours < 5:
-            warnings.append("Severe burnout risk")
-        elif hours_studied > 8 and sleep_hours < 6:
-            warnings.append("Study-sleep imbalance")
-        
-        # Excessive sleep
-        if sleep_hours >= 20:
-            warnings.append("20h+ sleep = health emergency")
-        elif sleep_hours >= 16:
-            warnings.append("16h+ sleep = possible illness")
-        elif sleep_hours > 12:
-            warnings.append("Excessive sleep (>12h)")
-        
-        # No preparation
-        if hours_studied == 0 and sample_papers == 0:
-            warnings.append("No preparation = will fail")
-        elif hours_studied == 0:
-            warnings.append("No study time")
-        elif hours_studied < 2 and sample_papers < 2:
-            warnings.append("Severely underprepared")
-    
-    return {"errors": errors, "warnings": warnings}
-
+def run_prediction(data: dict, validation_result: dict, include_percentile: bool = True):
+    """Score validated input and build the prediction payload.
 
-@csrf_exempt
-@api_view(["POST"])
-def predict_performance(request):
-    """Advanced prediction endpoint with feature engineering and constraints."""
+    Returns ``(payload, status)`` so every endpoint reports the same body.
+    ``include_percentile=False`` leaves out ``percentile``, which depends on
+    the stored rows rather than on the input and model alone.
+    """
     
-    validation_result = validate_input(request.data)
-    if validation_result["errors"]:
-        return Response({"errors": validation_result["errors"]}, status=400)
+    from . import drift
     
+    tenant = data.get("tenant")
     try:
-        model_data = joblib.load(MODEL_PATH)
+        model_data = model_registry.tier_bundle(
+            load_model_bundle(model_path(tenant), tenant or model_registry.DEFAULT_TENANT), data.get("tier")
+        )
         model = model_data['model']
         scaler = model_data['scaler']
         feature_columns = model_data['feature_columns']
     except FileNotFoundError:
-        return Response({"error": "Model not found. Train the model first."}, status=500)
+        return model_not_found(tenant)
+    except model_registry.MissingTier:
+        return tier_not_found(data["tier"])
     except Exception as e:
-        return Response({"error": f"Failed to load model: {str(e)}"}, status=500)
+        return {"error": f"Failed to load model: {str(e)}"}, 500
     
-    data = request.data
+    drift.live_histograms(tenant or model_registry.DEFAULT_TENANT).update(data)
     
     try:
         # Engineer features for prediction
@@ -468,11 +341,538 @@ def predict_performance(request):
             }
         }
         
+        if include_percentile:
+            response_data["percentile"] = percentile_rank(adjusted_prediction)
+        
         # Add validation warnings if any
         if validation_result["warnings"]:
             response_data["input_warnings"] = validation_result["warnings"]
         
-        return Response(response_data)
+        return response_data, 200
         
     except Exception as exc:
-        return Response({"error": f"Prediction failed: {str(exc)}"}, status=500)
+        return {"error": f"Prediction failed: {str(exc)}"}, 500
+
+
+# ============ CACHEABLE GET PREDICTIONS ============
+
+_INTEGER = re.compile(r"-?[0-9]+")
+_BOOLEANS = {"true": True, "false": False, "1": True, "0": False, "yes": True, "no": False}
+
+
+def parse_query(params) -> dict:
+    """Read the request fields from query parameters, coercing well-formed values.
+
+    Values that don't parse are passed through as strings so validation
+    reports them with the usual messages.
+    """
+    data = {field: params[field] for field in codec.ROUTING_FIELDS if field in params}
+    for field in codec.REQUEST_FIELDS:
+        value = params.get(field)
+        if value is None:
+            continue
+        if field == "extracurricular":
+            data[field] = _BOOLEANS.get(value.lower(), value)
+        elif _INTEGER.fullmatch(value):
+            data[field] = int(value)
+        else:
+            data[field] = value
+    return data
+
+
+def canonical_query(data: dict) -> str:
+    """The one query string for validated input: fixed field order, plain ints, true/false."""
+    return "&".join(
+        [
+            f"{field}={str(data[field]).lower() if field == 'extracurricular' else data[field]}"
+            for field in codec.REQUEST_FIELDS
+        ]
+        + [f"{field}={data[field]}" for field in codec.ROUTING_FIELDS if field in data]
+    )
+
+
+def prediction_etag(query: str, version: str, representation: str) -> str:
+    """Strong ETag for a canonical query answered by model ``version``."""
+    digest = hashlib.sha256(f"{version}\n{representation}\n{query}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def predict_from_query(request):
+    """GET predictions: redirect to the canonical query, then answer with validators.
+
+    Every spelling of the same input ends up at one URL, so browsers and a
+    reverse proxy share a single cache entry per input. The ETag changes
+    with the model file, which revalidates cached answers after retraining.
+    """
+    data = parse_query(request.query_params)
+    validation_result = validate_input(data)
+    errors = {**validation_result["errors"], **tenant_errors(data), **tier_errors(data)}
+    if errors:
+        return Response({"errors": errors}, status=400)
+    
+    query = canonical_query(data)
+    if request.META.get("QUERY_STRING", "") != query:
+        return HttpResponsePermanentRedirect(f"{request.path}?{query}")
+    
+    tenant = data.get("tenant")
+    try:
+        version = model_version(model_path(tenant))
+    except FileNotFoundError:
+        payload, status = model_not_found(tenant)
+        return Response(payload, status=status)
+    
+    etag = prediction_etag(query, version, request.accepted_renderer.format)
+    cache_control = f"public, max-age={getattr(settings, 'PREDICT_CACHE_MAX_AGE', 300)}"
+    if _etag_matches(request.META.get("HTTP_IF_NONE_MATCH", ""), etag):
+        response = HttpResponseNotModified()
+    else:
+        # The cached representation must depend only on the query and the model
+        payload, status = run_prediction(data, validation_result, include_percentile=False)
+        response = Response(payload, status=status)
+        if status != 200:
+            return response
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    # The body and ETag depend on the negotiated renderer
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+@csrf_exempt
+@admission_control
+@api_view(["GET", "POST"])
+def predict_performance(request):
+    """Advanced prediction endpoint with feature engineering and constraints.
+    
+    An optional ``tenant`` field (body or query) scores with that tenant's
+    model instead of the default one, and an optional ``tier`` picks the
+    full model or one of its distilled, lower-latency tiers.
+    """
+    
+    if request.method == "GET":
+        return predict_from_query(request)
+    
+    validation_result = validate_input(request.data)
+    errors = {**validation_result["errors"], **tenant_errors(request.data), **tier_errors(request.data)}
+    if errors:
+        return Response({"errors": errors}, status=400)
+    
+    payload, status = run_prediction(request.data, validation_result)
+    return Response(payload, status=status)
+
+
+_PRE_ENCODED = {
+    "not_found": codec.pre_encode(MODEL_NOT_FOUND),
+    "unsupported": codec.pre_encode({"detail": "Unsupported media type in request."}),
+    "malformed": codec.pre_encode({"detail": "Malformed request."}),
+    "method": codec.pre_encode({"detail": "Method not allowed."}),
+}
+
+
+def _encoded_response(body: bytes, media_type: str, status: int = 200) -> HttpResponse:
+    return HttpResponse(body, content_type=media_type, status=status)
+
+
+@csrf_exempt
+@admission_control
+def predict_performance_fast(request):
+    """Lean prediction endpoint: same payloads as predict_performance without DRF.
+
+    Accepts JSON or msgpack bodies and answers in the media type named by
+    the Accept header.
+    """
+    media_type = codec.negotiate(request.META.get("HTTP_ACCEPT", ""))
+    
+    if request.method != "POST":
+        response = _encoded_response(_PRE_ENCODED["method"][media_type], media_type, 405)
+        response["Allow"] = "POST"
+        return response
+    
+    try:
+        data = codec.decode(request.body, request.content_type)
+    except codec.UnsupportedMediaType:
+        return _encoded_response(_PRE_ENCODED["unsupported"][media_type], media_type, 415)
+    except codec.MalformedRequest:
+        return _encoded_response(_PRE_ENCODED["malformed"][media_type], media_type, 400)
+    
+    validation_result = validate_input(data)
+    errors = {**validation_result["errors"], **tenant_errors(data), **tier_errors(data)}
+    if errors:
+        return _encoded_response(codec.encode({"errors": errors}, media_type), media_type, 400)
+    
+    payload, status = run_prediction(data, validation_result)
+    if payload is MODEL_NOT_FOUND:
+        return _encoded_response(_PRE_ENCODED["not_found"][media_type], media_type, status)
+    return _encoded_response(codec.encode(payload, media_type), media_type, status)
+
+
+# ============ STREAMING PREDICTIONS ============
+
+@csrf_exempt
+@admission_control
+def predict_stream(request):
+    """Score newline-delimited JSON records from the request body as they arrive.
+    
+    Answers with one NDJSON result line per record, streamed back chunk by
+    chunk (see performance/streaming.py). Optional ``tenant`` and ``tier``
+    query parameters pick the model.
+    """
+    from . import streaming
+    
+    if request.method != "POST":
+        response = JsonResponse({"detail": "Method not allowed."}, status=405)
+        response["Allow"] = "POST"
+        return response
+    if request.content_type not in codec.NDJSON_TYPES:
+        return JsonResponse({"detail": f"Expected {codec.NDJSON} request body."}, status=415)
+    
+    routing = {field: request.GET[field] for field in codec.ROUTING_FIELDS if field in request.GET}
+    errors = {**tenant_errors(routing), **tier_errors(routing)}
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+    tenant = routing.get("tenant")
+    try:
+        bundle = model_registry.tier_bundle(
+            load_model_bundle(model_path(tenant), tenant or model_registry.DEFAULT_TENANT), routing.get("tier")
+        )
+    except FileNotFoundError:
+        payload, status = model_not_found(tenant)
+        return JsonResponse(payload, status=status)
+    except model_registry.MissingTier:
+        payload, status = tier_not_found(routing["tier"])
+        return JsonResponse(payload, status=status)
+    
+    # Reads the body through the request's file interface, so it is never buffered whole
+    return StreamingHttpResponse(streaming.score_stream(request, bundle, tenant), content_type=codec.NDJSON)
+
+
+# ============ EXPLANATIONS ============
+
+EXPLAIN_CACHE_SIZE = 4096
+
+_explainers = {}
+
+
+def get_explainer(version: str, model) -> "TreeExplainer":
+    """TreeSHAP tables for the current model, built once per model version."""
+    from .explain import TreeExplainer
+    
+    explainer = _explainers.get(version)
+    if explainer is None:
+        _explainers.clear()
+        explainer = _explainers[version] = TreeExplainer(model)
+    return explainer
+
+
+@lru_cache(maxsize=EXPLAIN_CACHE_SIZE)
+def explain_input(version: str, hours_studied, previous_scores, extracurricular, sleep_hours, sample_papers) -> dict:
+    """Prediction and attributions for one input, cached per input and model version.
+    
+    Attributions explain the model's raw output; ``constraint_adjustment``
+    is what the realistic constraints then add to reach the final score.
+    """
+    from .explain import raw_attributions
+    
+    data = {
+        "hours_studied": hours_studied,
+        "previous_scores": previous_scores,
+        "extracurricular": extracurricular,
+        "sleep_hours": sleep_hours,
+        "sample_papers": sample_papers,
+    }
+    model_data = load_model_bundle()
+    feature_columns = model_data["feature_columns"]
+    explainer = get_explainer(version, model_data["model"])
+    
+    features_scaled = model_data["scaler"].transform(engineer_features_for_prediction(data)[feature_columns])
+    raw_prediction = float(model_data["model"].predict(features_scaled)[0])
+    adjusted_prediction = apply_realistic_constraints_single(raw_prediction, data)
+    attributions = dict(zip(feature_columns, explainer.shap_values(features_scaled).tolist()))
+    
+    return {
+        "predicted_performance_index": round(float(adjusted_prediction), 2),
+        "model_output": round(raw_prediction, 4),
+        "base_value": round(explainer.expected_value, 4),
+        "constraint_adjustment": round(float(adjusted_prediction) - raw_prediction, 4),
+        "input_attributions": {
+            field: round(value, 4) for field, value in raw_attributions(attributions).items()
+        },
+        "feature_attributions": {column: round(value, 4) for column, value in attributions.items()},
+        "model_version": version,
+    }
+
+
+@csrf_exempt
+@admission_control
+@api_view(["POST"])
+def explain_prediction(request):
+    """Per-input attributions of the prediction, from exact TreeSHAP over the model's trees."""
+    
+    validation_result = validate_input(request.data)
+    if validation_result["errors"]:
+        return Response({"errors": validation_result["errors"]}, status=400)
+    
+    try:
+        version = model_version()
+        payload = dict(explain_input(version, *(request.data[field] for field in codec.REQUEST_FIELDS)))
+    except FileNotFoundError:
+        return Response(MODEL_NOT_FOUND, status=500)
+    except Exception as exc:
+        return Response({"error": f"Explanation failed: {str(exc)}"}, status=500)
+    
+    if validation_result["warnings"]:
+        payload["input_warnings"] = validation_result["warnings"]
+    return Response(payload)
+
+
+@csrf_exempt
+@admission_control
+@api_view(["POST"])
+def plan_performance(request):
+    """Find the lowest-effort study plans that reach a target performance index."""
+    
+    data = request.data
+    validation_result = validate_input(data)
+    errors = dict(validation_result["errors"])
+    
+    target = data.get("target_performance_index")
+    if target is None:
+        errors["target_performance_index"] = "Required"
+    elif isinstance(target, bool) or not isinstance(target, (int, float)) or not (0 <= target <= 100):
+        errors["target_performance_index"] = "Must be 0-100"
+    
+    max_plans = data.get("max_plans", 3)
+    if isinstance(max_plans, bool) or not isinstance(max_plans, int) or not (1 <= max_plans <= 10):
+        errors["max_plans"] = "Must be 1-10"
+    
+    if errors:
+        return Response({"errors": errors}, status=400)
+    
+    try:
+        model_data = load_model_bundle()
+    except FileNotFoundError:
+        return Response(MODEL_NOT_FOUND, status=500)
+    except Exception as e:
+        return Response({"error": f"Failed to load model: {str(e)}"}, status=500)
+    
+    from .planner import find_plans
+    
+    try:
+        result = find_plans(model_data, data, float(target), max_plans=max_plans)
+    except Exception as exc:
+        return Response({"error": f"Planning failed: {str(exc)}"}, status=500)
+    
+    if validation_result["warnings"]:
+        result["input_warnings"] = validation_result["warnings"]
+    
+    return Response(result)
+
+
+# ============ SIMILAR STUDENTS ============
+
+@csrf_exempt
+@admission_control
+@api_view(["POST"])
+def similar_students(request):
+    """The ``k`` stored students whose inputs are closest to these, and how they actually did."""
+    from . import neighbors
+    
+    validation_result = validate_input(request.data)
+    errors = dict(validation_result["errors"])
+    k = request.data.get("k", 5)
+    if isinstance(k, bool) or not isinstance(k, int) or not (1 <= k <= neighbors.MAX_K):
+        errors["k"] = f"Must be 1-{neighbors.MAX_K}"
+    if errors:
+        return Response({"errors": errors}, status=400)
+    
+    try:
+        index = neighbors.get_index(neighbors.INDEX_PATH)
+    except FileNotFoundError:
+        return Response(
+            {"error": "Similar-students index not built. Run `python manage.py build_neighbors`."}, status=409
+        )
+    
+    distances, ids, inputs, outcomes = index.query([request.data[field] for field in codec.REQUEST_FIELDS], k)
+    students = []
+    for distance, row_id, row, outcome in zip(distances.tolist(), ids.tolist(), inputs.tolist(), outcomes.tolist()):
+        student = dict(zip(codec.REQUEST_FIELDS, row))
+        student["extracurricular"] = bool(student["extracurricular"])
+        students.append({
+            "id": row_id,
+            **student,
+            "performance_index": round(outcome, 2),
+            "distance": round(distance, 4),
+        })
+    return Response({"k": k, "indexed_students": len(index), "neighbors": students})
+
+
+# ============ BATCH SCORING JOBS ============
+
+def job_payload(request, job) -> dict:
+    payload = {
+        "id": str(job.id),
+        "status": job.status,
+        "tenant": job.tenant or None,
+        "model_version": job.model_version or None,
+        "rows_total": job.rows_total,
+        "rows_done": job.rows_done,
+        "progress": round(job.rows_done / job.rows_total, 4) if job.rows_total else None,
+        "error": job.error or None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "status_url": request.build_absolute_uri(reverse("scoring-job", args=[job.id])),
+    }
+    if job.status == job.DONE:
+        payload["result_url"] = request.build_absolute_uri(reverse("scoring-job-result", args=[job.id]))
+    return payload
+
+
+@csrf_exempt
+@api_view(["POST"])
+@parser_classes([MultiPartParser])
+def create_scoring_job(request):
+    """Queue a CSV upload (``file``) for background scoring; poll the returned status URL.
+    
+    The CSV needs the five inputs under their API or dataset column names;
+    the worker validates every row and reports invalid ones in an ``errors``
+    column. An optional ``tenant`` scores it with that tenant's model.
+    """
+    
+    upload = request.FILES.get("file")
+    errors = tenant_errors(request.data)
+    if upload is None:
+        errors["file"] = "Required"
+    elif not upload.size:
+        errors["file"] = "Empty file"
+    else:
+        missing = jobs.missing_columns(jobs.read_header(upload))
+        if missing:
+            errors["file"] = f"Missing columns: {', '.join(missing)}"
+    if errors:
+        return Response({"errors": errors}, status=400)
+    
+    tenant = request.data.get("tenant")
+    if not os.path.exists(model_path(tenant)):
+        payload, status = model_not_found(tenant)
+        return Response(payload, status=status)
+    
+    payload = job_payload(request, jobs.create_job(upload, tenant or ""))
+    response = Response(payload, status=202)
+    response["Location"] = payload["status_url"]
+    return response
+
+
+@api_view(["GET"])
+def scoring_job(request, job_id):
+    """Status and progress of a scoring job."""
+    return Response(job_payload(request, get_object_or_404(ScoringJob, id=job_id)))
+
+
+def scoring_job_result(request, job_id):
+    """Download the scored CSV of a finished job."""
+    job = get_object_or_404(ScoringJob, id=job_id)
+    if job.status != job.DONE:
+        return JsonResponse({"error": f"Job is {job.status}; results are available once it is done."}, status=409)
+    return FileResponse(job.result_file.open("rb"), as_attachment=True, filename=f"{job.id}-scored.csv",
+                        content_type="text/csv")
+
+
+def staff_only(view):
+    """Restrict an operations endpoint to logged-in staff users."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({"detail": "Staff access required."}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@staff_only
+def profile_stats(request):
+    """Aggregated profiles from the sampling request profiler.
+    
+    ``?format=collapsed`` returns collapsed stacks for flame graphs (sampler
+    mode); otherwise a top-N function table. DELETE clears the aggregate.
+    """
+    
+    if request.method == "DELETE":
+        profile_aggregate.reset()
+        return HttpResponse(status=204)
+    
+    if request.GET.get("format") == "collapsed":
+        return HttpResponse(profile_aggregate.collapsed(), content_type="text/plain")
+    
+    try:
+        limit = int(request.GET.get("top", 30))
+    except ValueError:
+        return JsonResponse({"errors": {"top": "Must be an integer"}}, status=400)
+    
+    config = get_profiler_config()
+    return JsonResponse({
+        "enabled": config["ENABLED"],
+        "mode": config["MODE"],
+        "sample_rate": config["SAMPLE_RATE"],
+        "profiled_requests": profile_aggregate.requests,
+        "functions": profile_aggregate.top_functions(limit, request.GET.get("sort", "cumulative")),
+    })
+
+
+@staff_only
+def admission_stats(request):
+    """Admission control counters: in-flight, queued, shed and queue wait times."""
+    return JsonResponse(get_limiter().stats())
+
+
+@staff_only
+def model_cache_stats(request):
+    """Loaded tenant models, memory use against the budget, and per-tenant hit/load/eviction counters.
+    
+    DELETE unloads every cached model; counters are kept.
+    """
+    
+    if request.method == "DELETE":
+        clear_model_cache()
+        return HttpResponse(status=204)
+    
+    return JsonResponse(model_registry.get_cache().stats())
+
+
+@staff_only
+def drift_stats(request):
+    """Live input distributions compared with the training data, per feature.
+    
+    Reports the default model's traffic, or with ``?tenant=`` that tenant's
+    traffic against its own model. DELETE clears those live histograms,
+    e.g. after retraining.
+    """
+    from . import drift
+    
+    tenant = request.GET.get("tenant")
+    errors = tenant_errors({"tenant": tenant})
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+    histograms = drift.live_histograms(tenant or model_registry.DEFAULT_TENANT)
+    
+    if request.method == "DELETE":
+        histograms.reset()
+        return HttpResponse(status=204)
+    
+    try:
+        reference = load_model_bundle(model_path(tenant), tenant or model_registry.DEFAULT_TENANT).get("drift_reference")
+    except FileNotFoundError:
+        payload, status = model_not_found(tenant)
+        return JsonResponse(payload, status=status)
+    if reference is None:
+        return JsonResponse({"error": "Model has no drift reference. Retrain the model to add one."}, status=409)
+    
+    try:
+        min_samples = int(request.GET.get("min_samples", drift.MIN_SAMPLES))
+    except ValueError:
+        return JsonResponse({"errors": {"min_samples": "Must be an integer"}}, status=400)
+    
+    return JsonResponse(drift.drift_report(reference, histograms.snapshot(), min_samples))
@@ -30,6 +30,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "performance.profiling.SamplingProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "student_ml.urls"
@@ -84,9 +85,53 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Uploaded batch-scoring CSVs and their results (see performance/jobs.py)
+MEDIA_ROOT = BASE_DIR / "media"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [],
     "DEFAULT_PERMISSION_CLASSES": [],
 }
+
+# Sampling profiler for the prediction endpoints (see performance/profiling.py).
+# The middleware removes itself at startup while ENABLED is False.
+PREDICTION_PROFILER = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.01,
+    "MODE": "cprofile",
+}
+
+# Admission control for the prediction endpoints (see performance/admission.py).
+# Requests beyond MAX_IN_FLIGHT wait in a queue of MAX_QUEUE for at most
+# QUEUE_TIMEOUT seconds; the rest get a 503 with Retry-After.
+PREDICT_ADMISSION = {
+    "ENABLED": True,
+    "MAX_IN_FLIGHT": 8,
+    "MAX_QUEUE": 16,
+    "QUEUE_TIMEOUT": 0.5,
+    "RETRY_AFTER": 1,
+}
+
+# Seconds browsers and proxies may reuse a GET prediction without revalidating.
+# Responses carry an ETag tied to the model file, so after max-age a retrained
+# model is picked up with a conditional request.
+PREDICT_CACHE_MAX_AGE = 300
+
+# Per-tenant models (see performance/model_registry.py). A request with a
+# "tenant" field is scored by ARTIFACT_DIR/<tenant>/model.pkl. Loaded models
+# share an LRU cache that evicts once their total size passes MEMORY_BUDGET bytes.
+MODEL_REGISTRY = {
+    "ARTIFACT_DIR": "performance/tenants",
+    "MEMORY_BUDGET": 512 * 1024 ** 2,
+}
+
+# Percentile of each prediction among stored outcomes (see performance/percentiles.py).
+# New rows are merged every REFRESH_INTERVAL seconds; a full reread every
+# REBUILD_INTERVAL seconds picks up updated and deleted rows.
+PREDICT_PERCENTILES = {
+    "ENABLED": True,
+    "REFRESH_INTERVAL": 5.0,
+    "REBUILD_INTERVAL": 3600.0,
+}